@@ -0,0 +1,350 @@
+""" Benchmark suite for the LIGGGHTS wrapper
+
+Runs a set of benchmarks for both interfaces (INTERNAL and FILE-IO)
+over a range of particle counts (and number of steps per run) and writes
+the results to a JSON file.  Two of these JSON files (e.g. from two
+different commits) can be compared in order to find regressions.
+
+Usage::
+
+    # run benchmarks
+    python bench/benchmark_suite.py run --output results.json
+
+    # run a smaller sweep
+    python bench/benchmark_suite.py run --sizes 1000 10000 --steps 10 \\
+        --interfaces file-io --output results.json
+
+    # compare results (exit code is 1 if a regression was found)
+    python bench/benchmark_suite.py compare old.json new.json
+
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+from simphony.core.cuba import CUBA
+
+from simliggghts import LiggghtsWrapper
+from simliggghts.io.file_utility import read_data_file, write_data_file
+from simliggghts.testing.md_example_configurator import MDExampleConfigurator
+
+from util import get_lattice_particles
+
+INTERFACES = {"internal": True, "file-io": False}
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+DEFAULT_STEPS = [1, 100]
+
+# relative increase of the time which is flagged as a regression
+DEFAULT_THRESHOLD = 0.1
+
+# setup returns the state which is passed to the (timed) method
+_Benchmark = namedtuple(
+    '_Benchmark', ['name', 'setup', 'method', 'uses_steps', 'uses_engine'])
+
+
+class _State(object):
+    """ State passed from the setup to the timed method of a benchmark
+
+    """
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def _create_wrapper(is_internal, particles, number_steps):
+    wrapper = LiggghtsWrapper(use_internal_interface=is_internal)
+    MDExampleConfigurator.set_configuration(wrapper,
+                                            number_time_steps=number_steps)
+    if particles is not None:
+        wrapper.add_dataset(particles)
+    return wrapper
+
+
+def _setup_empty_wrapper(particles, is_internal, number_steps, temp_dir):
+    return _State(wrapper=_create_wrapper(is_internal, None, number_steps),
+                  particles=particles)
+
+
+def _setup_wrapper(particles, is_internal, number_steps, temp_dir):
+    wrapper = _create_wrapper(is_internal, particles, number_steps)
+    return _State(wrapper=wrapper,
+                  dataset=wrapper.get_dataset(particles.name),
+                  temp_dir=temp_dir)
+
+
+def _setup_run_wrapper(particles, is_internal, number_steps, temp_dir):
+    state = _setup_wrapper(particles, is_internal, number_steps, temp_dir)
+    # first run includes the set up of the simulation
+    state.wrapper.run()
+    return state
+
+
+def _setup_read_write(particles, is_internal, number_steps, temp_dir):
+    filename = os.path.join(temp_dir, "data.liggghts")
+    write_data_file(filename, [particles])
+    return _State(particles=particles, filename=filename,
+                  output_filename=os.path.join(temp_dir, "output.liggghts"))
+
+
+def add_dataset(state):
+    state.wrapper.add_dataset(state.particles)
+
+
+def remove_particle(state):
+    # remove a few particles (each removal is benchmarked)
+    uids = [p.uid for _, p in zip(range(10), state.dataset.iter(
+        item_type=CUBA.PARTICLE))]
+    state.dataset.remove(uids)
+
+
+def flush_read(state):
+    data_manager = state.wrapper._data_manager
+    if state.wrapper._use_internal_interface:
+        data_manager.flush()
+        data_manager.read()
+    else:
+        filename = os.path.join(state.temp_dir, "data.liggghts")
+        data_manager.flush(filename)
+        data_manager.read(filename)
+
+
+def run(state):
+    state.wrapper.run()
+
+
+def iterate(state):
+    for _ in state.dataset.iter(item_type=CUBA.PARTICLE):
+        pass
+
+
+def iterate_views(state):
+    for _ in state.dataset.iter_particle_views():
+        pass
+
+
+def update_particles(state):
+    state.dataset.update(list(state.dataset.iter(item_type=CUBA.PARTICLE)))
+
+
+def read_file(state):
+    read_data_file(state.filename)
+
+
+def write_file(state):
+    write_data_file(state.output_filename, [state.particles])
+
+
+BENCHMARKS = [
+    _Benchmark("add_dataset", _setup_empty_wrapper, add_dataset,
+               uses_steps=False, uses_engine=True),
+    _Benchmark("remove_particle", _setup_wrapper, remove_particle,
+               uses_steps=False, uses_engine=True),
+    _Benchmark("flush_read", _setup_wrapper, flush_read,
+               uses_steps=False, uses_engine=True),
+    _Benchmark("first_run", _setup_wrapper, run,
+               uses_steps=True, uses_engine=True),
+    _Benchmark("run", _setup_run_wrapper, run,
+               uses_steps=True, uses_engine=True),
+    _Benchmark("iterate", _setup_wrapper, iterate,
+               uses_steps=False, uses_engine=True),
+    _Benchmark("iterate_views", _setup_wrapper, iterate_views,
+               uses_steps=False, uses_engine=True),
+    _Benchmark("update_particles", _setup_wrapper, update_particles,
+               uses_steps=False, uses_engine=True),
+    _Benchmark("read_data_file", _setup_read_write, read_file,
+               uses_steps=False, uses_engine=False),
+    _Benchmark("write_data_file", _setup_read_write, write_file,
+               uses_steps=False, uses_engine=False)]
+
+
+def run_benchmark(benchmark, particles, is_internal, number_steps, repeat):
+    """ Run a benchmark
+
+    The setup of the benchmark is not timed and is repeated for each
+    timed call.
+
+    Returns
+    -------
+    times : list of float
+        time (in seconds) of each repetition
+
+    """
+    times = []
+    for _ in range(repeat):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            state = benchmark.setup(particles, is_internal, number_steps,
+                                    temp_dir)
+            start = time.time()
+            benchmark.method(state)
+            times.append(time.time() - start)
+        finally:
+            shutil.rmtree(temp_dir)
+    return times
+
+
+def run_suite(sizes, steps, interfaces, benchmark_names, repeat):
+    """ Run the benchmarks over all sizes, steps and interfaces
+
+    Returns
+    -------
+    results : list of dict
+        one entry per benchmark/interface/size/steps
+
+    """
+    results = []
+    benchmarks = [b for b in BENCHMARKS
+                  if not benchmark_names or b.name in benchmark_names]
+    for number_particles in sizes:
+        particles = get_lattice_particles(number_particles)
+        for benchmark in benchmarks:
+            benchmark_interfaces = interfaces if benchmark.uses_engine \
+                else [None]
+            benchmark_steps = steps if benchmark.uses_steps else [None]
+            for interface in benchmark_interfaces:
+                for number_steps in benchmark_steps:
+                    times = run_benchmark(
+                        benchmark, particles,
+                        INTERFACES.get(interface, False),
+                        number_steps if number_steps is not None else 0,
+                        repeat)
+                    result = {"benchmark": benchmark.name,
+                              "interface": interface,
+                              "number_particles": number_particles,
+                              "number_steps": number_steps,
+                              "time": min(times),
+                              "times": times}
+                    print(_describe(result), "{:.6f} s".format(min(times)))
+                    results.append(result)
+    return results
+
+
+def _describe(result):
+    description = "{}__{}_particles".format(result["benchmark"],
+                                            result["number_particles"])
+    if result["number_steps"] is not None:
+        description += "_{}_steps".format(result["number_steps"])
+    if result["interface"] is not None:
+        description += "_{}".format(result["interface"].upper())
+    return description + ":"
+
+
+def _key(result):
+    return (result["benchmark"], result["interface"],
+            result["number_particles"], result["number_steps"])
+
+
+def _get_metadata():
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"],
+            stderr=subprocess.STDOUT).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def compare(old_results, new_results, threshold=DEFAULT_THRESHOLD):
+    """ Compare two sets of results
+
+    Parameters
+    ----------
+    old_results, new_results : list of dict
+        results (see run_suite)
+    threshold : float
+        relative increase of time which is flagged as a regression
+
+    Returns
+    -------
+    comparisons : list of tuple
+        (description, old time, new time, is_regression) for each
+        result which is found in both sets
+
+    """
+    old = dict((_key(result), result) for result in old_results)
+    comparisons = []
+    for result in new_results:
+        if _key(result) not in old:
+            continue
+        old_time = old[_key(result)]["time"]
+        new_time = result["time"]
+        is_regression = new_time > old_time * (1.0 + threshold)
+        comparisons.append(
+            (_describe(result), old_time, new_time, is_regression))
+    return comparisons
+
+
+def _main_run(args):
+    results = run_suite(args.sizes, args.steps, args.interfaces,
+                        args.benchmarks, args.repeat)
+    with open(args.output, "w") as output:
+        json.dump({"metadata": _get_metadata(), "results": results},
+                  output, indent=2, sort_keys=True)
+    return 0
+
+
+def _main_compare(args):
+    with open(args.old) as old, open(args.new) as new:
+        old_results = json.load(old)["results"]
+        new_results = json.load(new)["results"]
+
+    number_regressions = 0
+    for description, old_time, new_time, is_regression in compare(
+            old_results, new_results, args.threshold):
+        print("{} {:.6f} s -> {:.6f} s ({:+.1f} %){}".format(
+            description, old_time, new_time,
+            (new_time / old_time - 1.0) * 100.0 if old_time else 0.0,
+            "  REGRESSION" if is_regression else ""))
+        number_regressions += is_regression
+
+    print("{} regression(s) found".format(number_regressions))
+    return 1 if number_regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers()
+
+    run_parser = subparsers.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--sizes", type=int, nargs="+",
+                            default=DEFAULT_SIZES,
+                            help="number of particles")
+    run_parser.add_argument("--steps", type=int, nargs="+",
+                            default=DEFAULT_STEPS,
+                            help="number of time steps per run")
+    run_parser.add_argument("--interfaces", nargs="+",
+                            choices=sorted(INTERFACES),
+                            default=sorted(INTERFACES))
+    run_parser.add_argument("--benchmarks", nargs="+",
+                            choices=[b.name for b in BENCHMARKS],
+                            help="benchmarks to run (default: all)")
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--output", default="bench_results.json")
+    run_parser.set_defaults(function=_main_run)
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="compare two result files")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float,
+                                default=DEFAULT_THRESHOLD)
+    compare_parser.set_defaults(function=_main_compare)
+
+    args = parser.parse_args(argv)
+    return args.function(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
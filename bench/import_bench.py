@@ -0,0 +1,67 @@
+""" Benchmark of the time needed to import simliggghts
+
+Each measurement is done in a new python process (as the import is only
+performed once per process).
+
+"""
+from __future__ import print_function
+
+import subprocess
+import sys
+
+# each snippet prints the time (in seconds) it needed and the
+# "heavy" modules which were imported by it
+_import_snippets = [
+    ("import simliggghts", "import simliggghts"),
+    ("read_data_file",
+     "import simliggghts; simliggghts.read_data_file"),
+    ("LiggghtsWrapper",
+     "import simliggghts; simliggghts.LiggghtsWrapper")]
+
+_measure_template = """
+import sys
+import time
+start = time.time()
+{snippet}
+end = time.time()
+heavy = [m for m in ('yaml', 'numpy', 'simliggghts.io',
+                     'simliggghts.liggghts_wrapper', 'liggghts')
+         if m in sys.modules]
+print(end - start)
+print(' '.join(heavy))
+"""
+
+
+def measure(snippet, repeat=10):
+    """ Measure the time needed to run a snippet in a fresh process
+
+    Parameters
+    ----------
+    snippet : str
+        python code to be measured
+    repeat : int
+        number of processes started
+
+    Returns
+    -------
+    best : float
+        shortest time (in seconds) needed
+    heavy_modules : list of str
+        heavy modules which were imported by the snippet
+    """
+    times = []
+    heavy_modules = []
+    for _ in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, "-c", _measure_template.format(snippet=snippet)])
+        lines = output.decode().splitlines()
+        times.append(float(lines[0]))
+        heavy_modules = lines[1].split() if len(lines) > 1 else []
+    return min(times), heavy_modules
+
+
+if __name__ == '__main__':
+    for name, snippet in _import_snippets:
+        best, heavy_modules = measure(snippet)
+        print("{}: {:.1f} ms (heavy modules imported: {})".format(
+            name, best * 1000.0, ", ".join(heavy_modules) or "none"))
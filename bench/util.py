@@ -5,7 +5,11 @@ import os
 import tempfile
 import shutil
 
-from .. import read_data_file
+from simphony.core.cuba import CUBA
+from simphony.core.data_container import DataContainer
+from simphony.cuds.particles import Particle, Particles
+
+from simliggghts import read_data_file, CUBAExtension
 
 
 def get_particles(y_range):
@@ -40,6 +44,58 @@ def get_particles(y_range):
     return particles_list
 
 
+def get_lattice_particles(number_particles, name="lattice", spacing=1.0):
+    """ get particles on a simple cubic lattice for benchmarking
+
+    The particles are created without LIGGGHTS so any number of
+    particles can be generated.  The container is configured with
+    material type 1 and a simulation box enclosing the lattice.
+
+    Parameters
+    ----------
+    number_particles : int
+        number of particles
+    name : str
+        name of the particle container
+    spacing : float
+        distance between neighboring particles
+
+    Returns
+    -------
+    particles : Particles
+
+    """
+    side = 1
+    while side ** 3 < number_particles:
+        side += 1
+
+    particles = Particles(name=name)
+    data = DataContainer()
+    data[CUBA.MATERIAL_TYPE] = 1
+    particles.data = data
+    particles.data_extension = {
+        CUBAExtension.BOX_ORIGIN: (0.0, 0.0, 0.0),
+        CUBAExtension.BOX_VECTORS: [(side * spacing, 0.0, 0.0),
+                                    (0.0, side * spacing, 0.0),
+                                    (0.0, 0.0, side * spacing)]}
+
+    def _iter_particles():
+        for i in range(number_particles):
+            x, y, z = i % side, (i // side) % side, i // (side * side)
+            p = Particle(coordinates=((x + 0.5) * spacing,
+                                      (y + 0.5) * spacing,
+                                      (z + 0.5) * spacing))
+            p.data[CUBA.VELOCITY] = (0.0, 0.0, 0.0)
+            p.data[CUBA.ANGULAR_VELOCITY] = (0.0, 0.0, 0.0)
+            p.data[CUBA.DENSITY] = 1.0
+            p.data[CUBA.RADIUS] = 0.4 * spacing
+            p.data[CUBA.EXTERNAL_APPLIED_FORCE] = (0.0, 0.0, 0.0)
+            yield p
+
+    particles.add(_iter_particles())
+    return particles
+
+
 liggghts_script = """# create particles"
 dimension	2
 atom_style	granular
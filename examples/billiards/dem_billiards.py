@@ -15,7 +15,9 @@ def billiards_example(show):
     particles_list = liggghts.read_data_file("billiards_init.data")
 
     # configure dem-wrapper
-    dem = liggghts.LiggghtsWrapper(use_internal_interface=True)
+    # (all balls are of the same material type)
+    dem = liggghts.LiggghtsWrapper(use_internal_interface=True,
+                                   number_types=1)
 
     # Add particle data to wrapper
     dem.add_dataset(particles_list[0])
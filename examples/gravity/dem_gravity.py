@@ -1,6 +1,8 @@
 import click
 import time
 
+import numpy
+
 from simphony.engine import liggghts
 from simphony.core.cuba import CUBA
 
@@ -57,25 +59,25 @@ def gravity_example(show):
         pc_wall.update_particles([par])
 
     # Adapt properties of mobile particles
-    for par in pc_fall.iter_particles():
-        # Particle mass modification
-        dens = 2.0
-        par.data[CUBA.DENSITY] = dens
-
-        rad = par.data[CUBA.RADIUS]
-        par.data[CUBA.MASS] = rad * rad * rad * 4.0 / 3.0 * 3.141592654 * dens
-
-        pc_fall.update_particles([par])
-
-        # External force field (gravity)
-        F_grav = -par.data[CUBA.MASS]*9.81
-        par.data[CUBA.EXTERNAL_APPLIED_FORCE] = tuple([0.0, F_grav, 0.0])
+    views = list(pc_fall.iter_particle_views())
+    for par in views:
+        # Particle density modification
+        par.data[CUBA.DENSITY] = 2.0
 
         # Particle velocity modification
         # v_partyx = 0.1
         # par.data[CUBA.VELOCITY] = tuple([v_partx, 0.0, 0.0])
 
-        pc_fall.update_particles([par])
+    pc_fall.update_particles(views)
+
+    # External force field (gravity), using the mass of each particle
+    # (computed at once from the radius and density of the particles)
+    # and set for all particles at once
+    # (alternatively: dem.BC_extension[liggghts.CUBAExtension.GRAVITY])
+    derived = pc_fall.derived_quantities
+    forces = numpy.zeros((len(derived.uids), 3))
+    forces[:, 1] = -derived.mass*9.81
+    pc_fall.set_external_forces(forces, derived.uids)
 
     # Visualisation of the initial state
     if show:
@@ -1,12 +1,45 @@
-from .liggghts_wrapper import LiggghtsWrapper
-from .cuba_extension import CUBAExtension
-from .io.file_utility import read_data_file
+import importlib
+import sys
+import types
 
 from simphony.engine import ABCEngineExtension
 from simphony.engine import EngineInterface
 from simphony.engine.decorators import register
 
-__all__ = ["LiggghtsWrapper", "EngineType", "CUBAExtension", 'read_data_file']
+__all__ = ["LiggghtsWrapper", "CUBAExtension", 'read_data_file',
+           "ParticleInsertion", "MpiSettings"]
+
+# The public names are only imported when they are first accessed so that
+# importing the package (e.g. when simphony loads the engine plugins) does
+# not pull in the wrapper, the io package, yaml, numpy etc.
+#
+# mapping from public name to the (relative) module providing it
+_lazy_attributes = {"LiggghtsWrapper": ".liggghts_wrapper",
+                    "CUBAExtension": ".cuba_extension",
+                    "read_data_file": ".io.file_utility",
+                    "ParticleInsertion": ".config.insertion",
+                    "MpiSettings": ".config.parallel"}
+
+
+class _LazyModule(types.ModuleType):
+    """ Module which imports its public attributes on first access
+
+    """
+    def __getattr__(self, name):
+        try:
+            module_name = _lazy_attributes[name]
+        except KeyError:
+            raise AttributeError(
+                "module '{}' has no attribute '{}'".format(__name__, name))
+
+        value = getattr(importlib.import_module(module_name, __name__), name)
+
+        # cache it so that __getattr__ is not called again
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(_lazy_attributes))
 
 
 @register
@@ -49,6 +82,8 @@ class SimliggghtsExtension(ABCEngineExtension):
         -------
         ABCEngineExtension: A wrapper configured with cuds and ready to run
         """
+        from .liggghts_wrapper import LiggghtsWrapper
+
         use_internal_interface = False
         if engine_interface == EngineInterface.Internal:
             use_internal_interface = True
@@ -59,3 +94,12 @@ class SimliggghtsExtension(ABCEngineExtension):
 
         return LiggghtsWrapper(cuds=cuds,
                                use_internal_interface=use_internal_interface)
+
+
+# replace this module with a lazy version of it. A reference to the
+# original module is kept as python 2 clears the globals of a module
+# once it is garbage collected.
+_module = _LazyModule(__name__, __doc__)
+_module.__dict__.update(sys.modules[__name__].__dict__)
+_module._original_module = sys.modules[__name__]
+sys.modules[__name__] = _module
@@ -2,6 +2,8 @@ import uuid
 import abc
 
 from .liggghts_particles import LiggghtsParticles
+from .common.instrumentation import Instrumentation
+from .common.snapshot import SnapshotCache
 
 
 class ABCDataManager(object):
@@ -16,11 +18,25 @@ class ABCDataManager(object):
     occurs through the many abstract methods in this class.  See subclasses
     to understand how the communication occurs.
 
+    Parameters
+    ----------
+    instrumentation : Instrumentation, optional
+        records statistics of the communication with LIGGGHTS (if enabled)
+    spatial_sort_interval : int, optional
+        if given, the particles of each container are sorted spatially
+        (see sort_spatially) every spatial_sort_interval reads
 
     """
     __metaclass__ = abc.ABCMeta
 
-    def __init__(self):
+    def __init__(self, instrumentation=None, spatial_sort_interval=None):
+        if instrumentation is None:
+            instrumentation = Instrumentation()
+        self._instrumentation = instrumentation
+
+        self._spatial_sort_interval = spatial_sort_interval
+        self._number_reads = 0
+
         # map from name to unique name
         self._unames = {}
 
@@ -31,6 +47,23 @@ class ABCDataManager(object):
         # where the the key is the unique name
         self._lpcs = {}
 
+        # read-only snapshots of the data (extension) of each container
+        self._data_snapshots = SnapshotCache()
+        self._data_extension_snapshots = SnapshotCache()
+
+        # map from material type to unique name of the container which
+        # particles inserted by liggghts (of this type) are added to and
+        # the number of particles inserted (of each type)
+        self._insertion_targets = {}
+        self._number_inserted = {}
+
+    @property
+    def instrumentation(self):
+        """ Instrumentation of the communication with LIGGGHTS
+
+        """
+        return self._instrumentation
+
     def get_name(self, uname):
         """
         Get the name of a particle container
@@ -48,6 +81,26 @@ class ABCDataManager(object):
         """
         return self._names[uname]
 
+    def get_uname(self, name):
+        """
+        Get the unique name of a particle container
+
+        Unlike its name, the unique name of a particle container does not
+        change when the container is renamed.
+
+        Parameters
+        ----------
+        name : string
+            name of particle container
+
+        Returns
+        -------
+        uname :
+            unique name of particle container
+
+        """
+        return self._unames[name]
+
     def rename(self, uname, new_name):
         """ Rename a particle container
 
@@ -87,6 +140,11 @@ class ABCDataManager(object):
 
         """
         self._handle_delete_particles(self._unames[name])
+        for material_type, uname in self._insertion_targets.items():
+            if uname == self._unames[name]:
+                self.remove_insertion_target(material_type)
+        self._data_snapshots.discard(self._unames[name])
+        self._data_extension_snapshots.discard(self._unames[name])
         del self._lpcs[self._unames[name]]
         del self._unames[name]
 
@@ -118,6 +176,57 @@ class ABCDataManager(object):
 
         return liggghts_pc
 
+    def set_insertion_target(self, name, material_type):
+        """Set the container which inserted particles of a type are added to
+
+        Particles which LIGGGHTS inserted during a run (see
+        ParticleInsertion) are discovered when the state is read and are
+        added (with new uids) to the container of their type.
+
+        Parameters
+        ----------
+        name : string
+            name of particle container
+        material_type : int
+            type of the inserted particles
+
+        """
+        self._insertion_targets[material_type] = self._unames[name]
+        self._number_inserted.setdefault(material_type, 0)
+
+    def remove_insertion_target(self, material_type):
+        """Remove the container which inserted particles of a type are added
+        to
+
+        """
+        del self._insertion_targets[material_type]
+        del self._number_inserted[material_type]
+
+    def get_number_inserted(self, material_type):
+        """Returns number of particles of a type which LIGGGHTS inserted
+
+        """
+        return self._number_inserted.get(material_type, 0)
+
+    def _get_insertion_target(self, material_type, number):
+        """Returns unique name of container which inserted particles of a
+        type are added to (and counts them)
+
+        Raises
+        ------
+        RuntimeError
+            if no container is set for the type
+
+        """
+        try:
+            uname = self._insertion_targets[material_type]
+        except KeyError:
+            raise RuntimeError(
+                "LIGGGHTS inserted particles of type {} but no particle "
+                "container was set for them".format(material_type))
+        self._number_inserted[material_type] += number
+        return uname
+
     @abc.abstractmethod
     def _handle_delete_particles(self, uname):
         """Handle when a Particles is deleted
@@ -175,6 +284,32 @@ class ABCDataManager(object):
 
         """
 
+    @abc.abstractmethod
+    def get_data_snapshot(self, uname):
+        """Returns read-only snapshot of the data of a particle container
+
+        Unlike get_data, no copy is made (see ReadOnlyDataContainer).
+
+        Parameters
+        ----------
+        uname : string
+            non-changing unique name of particles
+
+        """
+
+    @abc.abstractmethod
+    def get_data_extension_snapshot(self, uname):
+        """Returns read-only snapshot of the data extension of a container
+
+        Unlike get_data_extension, no copy is made.
+
+        Parameters
+        ----------
+        uname : string
+            non-changing unique name of particles
+
+        """
+
     @abc.abstractmethod
     def set_data_extension(self, data, uname):
         """Sets extension data container associated with particle container
@@ -274,6 +409,123 @@ class ABCDataManager(object):
 
         """
 
+    def iter_particle_views(self, uname, uids=None):
+        """Iterate over lightweight views of the particles of a certain type
+
+        The views (see ParticleView) provide the same attributes as a
+        Particle (uid, coordinates and data) but only look up the values
+        when accessed. Changes to a view are written through when it is
+        passed to update_particles. By default, particles are returned.
+
+        Parameters
+        ----------
+        uids : list of particle uids
+            sequence of uids of particles that should be iterated over. If
+            uids is None then all particles will be iterated over.
+        uname : string
+            non-changing unique name of particles
+
+        """
+        return self.iter_particles(uname, uids)
+
+    @abc.abstractmethod
+    def get_derived_quantities(self, uname):
+        """Returns quantities derived from the radius and density of particles
+
+        The returned DerivedQuantities (e.g. mass, volume or moment of
+        inertia of each particle) are computed at once for all particles of
+        the container and cached until a radius or density changes.
+
+        Parameters
+        ----------
+        uname : string
+            non-changing unique name of particles
+
+        """
+
+    @abc.abstractmethod
+    def set_values(self, uname, cuba, values, uids=None):
+        """Set a value of several particles at once
+
+        Parameters
+        ----------
+        uname : string
+            non-changing unique name of particles
+        cuba : CUBA
+            CUBA key of value (e.g. CUBA.EXTERNAL_APPLIED_FORCE)
+        values : array_like
+            values of the particles (e.g. of shape (N, 3) for vectors)
+        uids : sequence of uids, optional
+            uids of the particles (in the order of values). If uids is
+            None then the values are given in the order the particles
+            are iterated over.
+
+        Raises
+        ------
+        KeyError
+            if a particle does not exist or cuba is not supported
+        ValueError
+            if the number of values does not match
+
+        """
+
+    @abc.abstractmethod
+    def get_all_values(self, cuba):
+        """Returns a value of all particles (of all containers) as array
+
+        Parameters
+        ----------
+        cuba : CUBA
+            CUBA key of value (e.g. CUBA.RADIUS)
+
+        Raises
+        ------
+        KeyError
+            if not every particle has a value for cuba
+
+        """
+
+    @abc.abstractmethod
+    def get_all_types(self):
+        """Returns the material type of all particles (of all containers)
+
+        The type of a particle is its own CUBA.MATERIAL_TYPE or (if it
+        has none) the one of its container. The types are in the same
+        order as the values of get_all_values.
+
+        """
+
+    @abc.abstractmethod
+    def sort_spatially(self, uname):
+        """Order the particles of a container along a Morton curve
+
+        Afterwards, the particles are iterated over (and the values of
+        the derived quantities are ordered) along a Morton curve of their
+        coordinates, i.e. particles close to each other in space are
+        mostly next to each other. Added particles come last until the
+        particles are sorted again.
+
+        Parameters
+        ----------
+        uname : string
+            non-changing unique name of particles
+
+        """
+
+    def _sort_periodically(self):
+        """Sort the particles of all containers (every
+        spatial_sort_interval calls)
+
+        """
+        if not self._spatial_sort_interval:
+            return
+
+        self._number_reads += 1
+        if self._number_reads % self._spatial_sort_interval == 0:
+            with self._instrumentation.phase("sort"):
+                for uname in self._lpcs:
+                    self.sort_spatially(uname)
+
     @abc.abstractmethod
     def number_of_particles(self, uname):
         """Get number of particles in a container
@@ -0,0 +1,203 @@
+""" Schema of the per-atom values exchanged with LIGGGHTS
+
+For each atom style, the schema lists which CUBA keys of a particle are
+stored as per-atom values in LIGGGHTS, under which name, with which type
+and how many values each atom has. Per-atom values of a fix (i.e. a
+'fix property/atom') can be registered at runtime, e.g.::
+
+    schema.register(AtomField(CUBA.TEMPERATURE, "temp", fix=True,
+                              default=300.0))
+
+"""
+from collections import namedtuple
+
+from simphony.core.cuba import CUBA
+
+from .atom_style import AtomStyle
+
+
+class AtomField(namedtuple("AtomField",
+                           ["cuba", "liggghts_name", "dtype", "count",
+                            "fix", "required", "default"])):
+    """ Description of a per-atom value
+
+    Parameters
+    ----------
+    cuba : CUBA
+        CUBA key of the value
+    liggghts_name : str
+        name of the value in LIGGGHTS (for values of a fix: the fix id
+        which is also the name of the property)
+    dtype : str, optional
+        'double' or 'int'
+    count : int, optional
+        number of values per atom (e.g. 3 for a vector)
+    fix : bool, optional
+        if the value is stored by a fix (extracted with extract_fix)
+        instead of by the atom style (extracted with extract_atom)
+    required : bool, optional
+        if every particle has to provide the value. Otherwise the default
+        is used and the value is only exchanged with LIGGGHTS once a
+        particle provides it.
+    default : number, optional
+        value used for particles which do not provide one
+
+    """
+    __slots__ = ()
+
+    def __new__(cls, cuba, liggghts_name, dtype="double", count=1,
+                fix=False, required=False, default=0.0):
+        if dtype not in _TYPECODES:
+            raise ValueError("Unsupported dtype '{}'".format(dtype))
+        if count < 1:
+            raise ValueError("count has to be positive")
+        return super(AtomField, cls).__new__(
+            cls, cuba, liggghts_name, dtype, count, fix, required, default)
+
+    @property
+    def typecode(self):
+        """ typecode of the values (for array.array)
+
+        """
+        return _TYPECODES[self.dtype]
+
+    @property
+    def liggghts_type(self):
+        """ type used by extract_atom (0/1 int vector/array, 2/3 double
+        vector/array) or by extract_fix (1 vector, 2 array)
+
+        """
+        if self.fix:
+            return 1 if self.count == 1 else 2
+        return (0 if self.dtype == "int" else 2) + (self.count > 1)
+
+    def get_fix_command(self):
+        """ Return command creating the fix storing this (fix) value
+
+        """
+        style = "scalar" if self.count == 1 else "vector"
+        defaults = " ".join([str(self.default)] * self.count)
+        return "fix {0} all property/atom {0} {1} no no no {2}\n".format(
+            self.liggghts_name, style, defaults)
+
+
+# typecodes (of array.array) of the supported dtypes
+_TYPECODES = {"double": "d", "int": "i"}
+
+
+class AtomSchema(object):
+    """ Schema of the per-atom values of an atom style
+
+    Parameters
+    ----------
+    fields : sequence of AtomField
+        fields of the atom style
+
+    """
+    def __init__(self, fields):
+        self._fields = []
+        self._field_of_cuba = {}
+        self._registered = []
+        for field in fields:
+            self._add(field)
+
+    @property
+    def fields(self):
+        """ Fields (in the order they were added)
+
+        """
+        return tuple(self._fields)
+
+    @property
+    def registered_fields(self):
+        """ Fields which were registered at runtime
+
+        """
+        return tuple(self._registered)
+
+    @property
+    def cuba_keys(self):
+        """ CUBA keys of the fields
+
+        """
+        return tuple(field.cuba for field in self._fields)
+
+    def get_field(self, cuba):
+        """ Returns field of CUBA key
+
+        Raises
+        ------
+        KeyError
+            if there is no field for cuba
+        """
+        return self._field_of_cuba[cuba]
+
+    def __contains__(self, cuba):
+        return cuba in self._field_of_cuba
+
+    def register(self, field):
+        """ Register an additional field (e.g. of a fix property/atom)
+
+        Parameters
+        ----------
+        field : AtomField
+            field to be added
+
+        Raises
+        ------
+        ValueError
+            if there is already a field for the CUBA key or LIGGGHTS name
+        """
+        self._add(field)
+        self._registered.append(field)
+
+    def get_fix_commands(self):
+        """ Return commands creating the fixes of the registered fields
+
+        """
+        return "".join(field.get_fix_command()
+                       for field in self._registered if field.fix)
+
+    def copy(self):
+        """ Return copy of schema (which can be extended separately)
+
+        """
+        schema = AtomSchema(
+            field for field in self._fields if field not in self._registered)
+        for field in self._registered:
+            schema.register(field)
+        return schema
+
+    def _add(self, field):
+        if field.cuba in self._field_of_cuba:
+            raise ValueError(
+                "There is already a field for {}".format(field.cuba))
+        if any(field.liggghts_name == other.liggghts_name
+               for other in self._fields):
+            raise ValueError(
+                "There is already a field named '{}'".format(
+                    field.liggghts_name))
+        self._fields.append(field)
+        self._field_of_cuba[field.cuba] = field
+
+
+# schema of each atom-style
+ATOM_SCHEMAS = {
+    AtomStyle.GRANULAR:
+        AtomSchema([
+            AtomField(CUBA.MATERIAL_TYPE, "type", dtype="int",
+                      required=True, default=1),
+            AtomField(CUBA.VELOCITY, "v", count=3, required=True),
+            AtomField(CUBA.ANGULAR_VELOCITY, "omega", count=3, required=True),
+            AtomField(CUBA.DENSITY, "density", required=True),
+            AtomField(CUBA.RADIUS, "radius", required=True),
+            # created by the infrastructure of the external forces
+            AtomField(CUBA.EXTERNAL_APPLIED_FORCE, "df", count=3, fix=True)])
+}
+
+
+def get_schema(atom_style):
+    """ Return (a copy of) the schema of an atom style
+
+    """
+    return ATOM_SCHEMAS[atom_style].copy()
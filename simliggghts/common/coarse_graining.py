@@ -0,0 +1,160 @@
+""" Coarse-graining of particles into parcels
+
+With a coarse-graining factor f, roughly f**3 neighbouring particles (of
+the same material type) are replaced by a single, larger parcel of the
+same total volume (and hence mass). The parcels are simulated instead of
+the particles (with LIGGGHTS scaling the contact models by f) and the
+results are mapped back onto the original particles: each particle keeps
+its offset to the centre of its parcel and moves with it.
+
+"""
+from collections import namedtuple
+import uuid
+
+import numpy
+
+from simphony.core.cuba import CUBA
+from simphony.core.data_container import DataContainer
+from simphony.cuds.particles import Particle
+
+from .spatial_sort import spatial_order
+
+
+class ParcelMap(namedtuple("ParcelMap",
+                           ["uids", "parcel_uids", "offsets", "data"])):
+    """ Map from the original particles to the parcels replacing them
+
+    Attributes
+    ----------
+    uids : list of uuid.UUID
+        uid of each original particle
+    parcel_uids : list of uuid.UUID
+        uid of the parcel of each original particle
+    offsets : numpy.ndarray
+        offset of each original particle to the centre of its parcel
+        (shape (N, 3))
+    data : list of DataContainer
+        data of each original particle
+
+    """
+    __slots__ = ()
+
+
+def get_parcel_size(factor):
+    """ Returns the number of particles replaced by one parcel
+
+    """
+    return max(int(round(factor ** 3)), 1)
+
+
+def coarsen(particles, factor):
+    """ Replace particles by parcels
+
+    The particles are grouped (per material type) along a space-filling
+    curve so that each parcel replaces get_parcel_size(factor) particles
+    close to each other (the last parcel of a type may replace fewer). A
+    parcel is placed at the centre of mass of its particles, moves with
+    their momentum and has their total volume (its density is the one of
+    its particles).
+
+    Parameters
+    ----------
+    particles : iterable of Particle
+        original particles
+    factor : float
+        coarse-graining factor (larger than 1)
+
+    Returns
+    -------
+    parcels : list of Particle
+        parcels replacing the particles
+    parcel_map : ParcelMap
+        map from the original particles to the parcels
+
+    """
+    particles = list(particles)
+    size = get_parcel_size(factor)
+
+    # particles without uid are given one (as when they are added)
+    uids = [particle.uid if particle.uid is not None else uuid.uuid4()
+            for particle in particles]
+    parcel_uids = [None] * len(particles)
+    offsets = numpy.zeros((len(particles), 3))
+
+    coordinates = numpy.array(
+        [particle.coordinates for particle in particles],
+        dtype=numpy.double).reshape(-1, 3)
+    volumes = numpy.array(
+        [particle.data.get(CUBA.RADIUS, 0.0) ** 3 for particle in particles],
+        dtype=numpy.double)
+    masses = volumes * numpy.array(
+        [particle.data.get(CUBA.DENSITY, 1.0) for particle in particles],
+        dtype=numpy.double)
+    velocities = numpy.array(
+        [particle.data.get(CUBA.VELOCITY, (0.0, 0.0, 0.0))
+         for particle in particles], dtype=numpy.double).reshape(-1, 3)
+
+    by_type = {}
+    for index in spatial_order(coordinates):
+        material_type = particles[index].data.get(CUBA.MATERIAL_TYPE)
+        by_type.setdefault(material_type, []).append(index)
+
+    parcels = []
+    for material_type in sorted(by_type):
+        indices = by_type[material_type]
+        for start in xrange(0, len(indices), size):
+            members = indices[start:start + size]
+            mass = masses[members].sum()
+            weights = masses[members] / mass if mass > 0.0 else \
+                numpy.full(len(members), 1.0 / len(members))
+            centre = weights.dot(coordinates[members])
+
+            data = DataContainer(particles[members[0]].data)
+            data[CUBA.RADIUS] = float(volumes[members].sum() ** (1.0 / 3.0))
+            if mass > 0.0:
+                data[CUBA.DENSITY] = float(mass / volumes[members].sum())
+            data[CUBA.VELOCITY] = tuple(
+                weights.dot(velocities[members]).tolist())
+            parcel = Particle(uid=uuid.uuid4(),
+                              coordinates=tuple(centre.tolist()), data=data)
+            parcels.append(parcel)
+
+            for index in members:
+                parcel_uids[index] = parcel.uid
+                offsets[index] = coordinates[index] - centre
+
+    parcel_map = ParcelMap(uids, parcel_uids, offsets,
+                           [DataContainer(particle.data)
+                            for particle in particles])
+    return parcels, parcel_map
+
+
+def refine(parcels, parcel_map):
+    """ Map (the current state of) the parcels back onto the particles
+
+    The particles of parcels which are not given (e.g. as they were
+    removed) are skipped.
+
+    Parameters
+    ----------
+    parcels : dict
+        map from uid to (current) parcel
+    parcel_map : ParcelMap
+        map from the original particles to the parcels
+
+    Returns
+    -------
+    particles : iterator of Particle
+        original particles (with the position and velocity of their
+        parcel)
+
+    """
+    for uid, parcel_uid, offset, data in zip(*parcel_map):
+        parcel = parcels.get(parcel_uid)
+        if parcel is None:
+            continue
+        data = DataContainer(data)
+        data[CUBA.VELOCITY] = parcel.data[CUBA.VELOCITY]
+        coordinates = tuple(
+            (numpy.asarray(parcel.coordinates) + offset).tolist())
+        yield Particle(uid=uid, coordinates=coordinates, data=data)
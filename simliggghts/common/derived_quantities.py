@@ -0,0 +1,176 @@
+import math
+
+import numpy
+
+from simphony.core.cuba import CUBA
+
+
+def sphere_volume(radius):
+    """ Returns volume of sphere(s)
+
+    Parameters
+    ----------
+    radius : float or numpy.ndarray
+        radius (or array of radii)
+
+    """
+    return 4.0 / 3.0 * math.pi * radius ** 3
+
+
+def sphere_mass(radius, density):
+    """ Returns mass of sphere(s)
+
+    Parameters
+    ----------
+    radius : float or numpy.ndarray
+        radius (or array of radii)
+    density : float or numpy.ndarray
+        density (or array of densities)
+
+    """
+    return sphere_volume(radius) * density
+
+
+def sphere_moment_of_inertia(radius, density):
+    """ Returns moment of inertia of (solid) sphere(s)
+
+    Parameters
+    ----------
+    radius : float or numpy.ndarray
+        radius (or array of radii)
+    density : float or numpy.ndarray
+        density (or array of densities)
+
+    """
+    return 0.4 * sphere_mass(radius, density) * radius ** 2
+
+
+class DerivedQuantities(object):
+    """ Quantities derived from the radius and density of particles
+
+    The quantities (e.g. the mass) of the particles are computed for
+    all particles at once from the radius and density columns of the store
+    of the particles. They are cached until the radius or density of a
+    particle changes (i.e. the version of one of these columns in the
+    store changes).
+
+    The values are returned as read-only arrays in the order of 'uids'.
+
+    Parameters
+    ----------
+    store :
+        store of the particles, providing index_of(uid), get_array(cuba)
+        (values of all particles) and get_version(cuba) (which changes
+        whenever a value of cuba is changed)
+    uids : sequence of uuid.UUID
+        uids of the particles
+
+    """
+    def __init__(self, store, uids):
+        self._store = store
+        self.uids = tuple(uids)
+
+        # index in store of each particle (determined once needed)
+        self._indices = None
+
+        # versions of radius and density columns used to compute
+        # the cached values and the cached values (by name)
+        self._versions = None
+        self._values = {}
+
+    @property
+    def volume(self):
+        """ Volume of each particle
+
+        """
+        return self._get("volume", lambda radius, density:
+                         sphere_volume(radius))
+
+    @property
+    def mass(self):
+        """ Mass of each particle
+
+        """
+        return self._get("mass", lambda radius, density:
+                         self.volume * density)
+
+    @property
+    def moment_of_inertia(self):
+        """ Moment of inertia of each particle
+
+        """
+        return self._get("moment_of_inertia", lambda radius, density:
+                         0.4 * self.mass * radius ** 2)
+
+    @property
+    def total_volume(self):
+        """ Total volume of the particles
+
+        """
+        return float(self.volume.sum())
+
+    @property
+    def total_mass(self):
+        """ Total mass of the particles
+
+        """
+        return float(self.mass.sum())
+
+    def volume_weighted_mean(self, cuba):
+        """ Returns volume-weighted mean of a value of the particles
+
+        Parameters
+        ----------
+        cuba : CUBA
+            CUBA key of value (e.g. CUBA.VELOCITY)
+
+        """
+        values = self._store.get_array(cuba)[self._get_indices()]
+        volume = self.volume
+        if values.ndim > 1:
+            volume = volume[:, numpy.newaxis]
+        return (values * volume).sum(axis=0) / self.total_volume
+
+    def _get(self, name, compute):
+        """ Returns (cached) quantity
+
+        Parameters
+        ----------
+        name : str
+            name of quantity
+        compute : callable
+            computes the quantity from the radius and density arrays
+
+        """
+        store = self._store
+        versions = (store.get_version(CUBA.RADIUS),
+                    store.get_version(CUBA.DENSITY))
+        if versions != self._versions:
+            self._versions = versions
+            self._values = {}
+
+        values = self._values.get(name)
+        if values is None:
+            values = numpy.asarray(compute(*self._get_radius_and_density()))
+            values.flags.writeable = False
+            self._values[name] = values
+        return values
+
+    def _get_radius_and_density(self):
+        """ Returns (cached) radius and density arrays
+
+        """
+        columns = self._values.get("radius_and_density")
+        if columns is None:
+            indices = self._get_indices()
+            columns = (self._store.get_array(CUBA.RADIUS)[indices],
+                       self._store.get_array(CUBA.DENSITY)[indices])
+            self._values["radius_and_density"] = columns
+        return columns
+
+    def _get_indices(self):
+        if self._indices is None:
+            self._indices = numpy.array(
+                [self._store.index_of(uid) for uid in self.uids],
+                dtype=numpy.intp)
+        return self._indices
@@ -0,0 +1,301 @@
+import time
+from collections import OrderedDict
+
+
+class PhaseStatistics(object):
+    """ Statistics of a phase of a run (e.g. 'flush' or 'read')
+
+    Attributes
+    ----------
+    name : str
+        name of phase
+    calls : int
+        number of times the phase was entered
+    wall_time : float
+        total wall time (in seconds) spent in phase
+    bytes_transferred : int
+        number of bytes transferred to/from LIGGGHTS in phase
+    number_particles : int
+        number of particles handled in phase (None if not known)
+
+    """
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.wall_time = 0.0
+        self.bytes_transferred = 0
+        self.number_particles = None
+
+    def to_dict(self):
+        return {"calls": self.calls,
+                "wall_time": self.wall_time,
+                "bytes_transferred": self.bytes_transferred,
+                "number_particles": self.number_particles}
+
+
+class RunStatistics(object):
+    """ Statistics of a run of the wrapper
+
+    Attributes
+    ----------
+    phases : OrderedDict
+        map from phase name to PhaseStatistics (in order of first use)
+    liggghts_timing : dict
+        LIGGGHTS' own timing breakdown (e.g. {'Pair': 0.2, 'Neigh': 0.1})
+        in seconds. Empty if it is not known.
+    wall_time : float
+        total wall time (in seconds) of the top-level (i.e. not nested)
+        phases
+    neighbor_builds : int
+        number of times LIGGGHTS rebuilt the neighbor lists during the
+        run (None if it is not known)
+    dangerous_builds : int
+        number of rebuilds where a particle might have moved too far
+        since the last rebuild (None if it is not known)
+    neighbor_settings : NeighborSettings
+        neighbor settings used in the run (None if they were not tuned)
+    time_step_estimate : TimeStepEstimate
+        stable time step (and the Rayleigh and Hertz time) of the run
+        (None if the time step was not selected automatically)
+
+    """
+    def __init__(self):
+        self.phases = OrderedDict()
+        self.liggghts_timing = {}
+        self.wall_time = 0.0
+        self.neighbor_builds = None
+        self.dangerous_builds = None
+        self.neighbor_settings = None
+        self.time_step_estimate = None
+
+    def get_phase(self, name):
+        """ Returns statistics of phase (created if needed)
+
+        """
+        try:
+            return self.phases[name]
+        except KeyError:
+            phase = PhaseStatistics(name)
+            self.phases[name] = phase
+            return phase
+
+    @property
+    def bytes_transferred(self):
+        return sum(
+            phase.bytes_transferred for phase in self.phases.itervalues())
+
+    def to_dict(self):
+        """ Returns statistics as dictionary (e.g. to be stored as json)
+
+        """
+        return {"wall_time": self.wall_time,
+                "phases": OrderedDict(
+                    (name, phase.to_dict())
+                    for name, phase in self.phases.iteritems()),
+                "liggghts_timing": dict(self.liggghts_timing),
+                "neighbor_builds": self.neighbor_builds,
+                "dangerous_builds": self.dangerous_builds,
+                "neighbor_settings": None if self.neighbor_settings is None
+                else dict(self.neighbor_settings._asdict()),
+                "time_step_estimate": None if self.time_step_estimate is None
+                else dict(self.time_step_estimate._asdict())}
+
+    def __str__(self):
+        lines = ["{:<12} {:>6} {:>12} {:>14} {:>10}".format(
+            "phase", "calls", "time (s)", "bytes", "particles")]
+        for phase in self.phases.itervalues():
+            lines.append("{:<12} {:>6} {:>12.6f} {:>14} {:>10}".format(
+                phase.name, phase.calls, phase.wall_time,
+                phase.bytes_transferred,
+                "" if phase.number_particles is None
+                else phase.number_particles))
+        for section in sorted(self.liggghts_timing):
+            lines.append("LIGGGHTS {:<12} {:>12.6f}".format(
+                section, self.liggghts_timing[section]))
+        if self.neighbor_builds is not None:
+            lines.append("neighbor list builds {} (dangerous {})".format(
+                self.neighbor_builds, self.dangerous_builds))
+        if self.time_step_estimate is not None:
+            lines.append("time step {} (Rayleigh {}, Hertz {})".format(
+                *self.time_step_estimate))
+        return "\n".join(lines)
+
+
+class Instrumentation(object):
+    """ Opt-in instrumentation of the phases of a run
+
+    When disabled, entering a phase does nothing (and costs close to
+    nothing).  When enabled, the wall time, bytes transferred and number
+    of particles are recorded for each phase of the current run.
+
+    Phases can be nested; the transferred bytes and number of particles
+    are recorded on the innermost phase.
+
+    Independent of the statistics, hooks (e.g. profilers, see
+    simliggghts.common.profiling) can be attached which are notified when
+    a phase is entered and exited.
+
+    Parameters
+    ----------
+    enabled : bool
+        if statistics are recorded
+
+    Attributes
+    ----------
+    hooks : list
+        hooks (with enter(name) and exit(name) methods) which are called
+        when a phase is entered and exited
+
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.hooks = []
+
+        # statistics of the current (or last) run
+        self.statistics = None
+
+        # stack of currently entered phases
+        self._active = []
+
+    def begin_run(self):
+        """ Start recording statistics of a new run
+
+        """
+        self.statistics = RunStatistics() if self.enabled else None
+        self._active = []
+
+    def phase(self, name, number_particles=None, record_statistics=True):
+        """ Returns context manager of a phase
+
+        Parameters
+        ----------
+        name : str
+            name of the phase
+        number_particles : int, optional
+            number of particles handled in the phase
+        record_statistics : bool, optional
+            if false, then the phase is only passed to the hooks (e.g. for
+            phases occurring outside of a run)
+
+        """
+        statistics = self.statistics if record_statistics else None
+        if statistics is None and not self.hooks:
+            return _NULL_PHASE
+        return _Phase(self, name, number_particles, statistics)
+
+    def add_bytes(self, number_bytes):
+        """ Record bytes transferred in current phase
+
+        """
+        if self._active:
+            self._active[-1].bytes_transferred += number_bytes
+
+    def set_number_particles(self, number_particles):
+        """ Record number of particles handled in current phase
+
+        """
+        if self._active:
+            self._active[-1].number_particles = number_particles
+
+    def set_liggghts_timing(self, timing):
+        """ Record LIGGGHTS' own timing breakdown
+
+        Parameters
+        ----------
+        timing : dict
+            map from LIGGGHTS section (e.g. 'Pair') to time in seconds
+
+        """
+        if self.statistics is not None:
+            self.statistics.liggghts_timing = dict(timing)
+
+    def set_neighbor_builds(self, builds, dangerous_builds):
+        """ Record number of neighbor list builds of LIGGGHTS
+
+        Parameters
+        ----------
+        builds : int
+            number of builds
+        dangerous_builds : int
+            number of dangerous builds
+
+        """
+        if self.statistics is not None:
+            self.statistics.neighbor_builds = builds
+            self.statistics.dangerous_builds = dangerous_builds
+
+    def set_neighbor_settings(self, settings):
+        """ Record the neighbor settings used in the run
+
+        """
+        if self.statistics is not None:
+            self.statistics.neighbor_settings = settings
+
+    def set_time_step_estimate(self, estimate):
+        """ Record the automatically selected time step of the run
+
+        """
+        if self.statistics is not None:
+            self.statistics.time_step_estimate = estimate
+
+
+class _Phase(object):
+    """ Context manager recording the statistics of a phase
+
+    """
+    def __init__(self, instrumentation, name, number_particles, statistics):
+        self._instrumentation = instrumentation
+        self._name = name
+        self._number_particles = number_particles
+        self._statistics = statistics
+        self._phase = None
+
+    def __enter__(self):
+        if self._statistics is not None:
+            self._phase = self._statistics.get_phase(self._name)
+            self._phase.calls += 1
+            if self._number_particles is not None:
+                self._phase.number_particles = self._number_particles
+            self._instrumentation._active.append(self._phase)
+
+        # copy so that hooks can be removed while in a phase
+        self._hooks = list(self._instrumentation.hooks)
+        for hook in self._hooks:
+            hook.enter(self._name)
+
+        self._start = time.time()
+        return self._phase
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed = time.time() - self._start
+
+        for hook in reversed(self._hooks):
+            hook.exit(self._name)
+
+        if self._phase is not None:
+            self._phase.wall_time += elapsed
+
+            # phases (e.g. of iterators) are not necessarily exited in
+            # the reverse order of being entered
+            active = self._instrumentation._active
+            for i in range(len(active) - 1, -1, -1):
+                if active[i] is self._phase:
+                    del active[i]
+                    break
+            if not active:
+                self._statistics.wall_time += elapsed
+        return False
+
+
+class _NullPhase(object):
+    """ Context manager used when instrumentation is disabled
+
+    """
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
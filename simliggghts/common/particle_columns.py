@@ -0,0 +1,345 @@
+import numpy
+
+from simphony.core.data_container import DataContainer
+from simphony.cuds.particles import Particle
+
+from .spatial_sort import spatial_order
+
+
+class ParticleColumns(object):
+    """ Columnar store of the particles of a particle container
+
+    Instead of storing a Particle (with its own DataContainer) for each
+    particle, the coordinates and each of the supported CUBA values are
+    stored in a column (i.e. one list per CUBA key). Values of
+    unsupported CUBA keys are dropped when particles are added or updated,
+    which only involves looking up the supported keys (a column selection)
+    instead of rebuilding the data of each particle.
+
+    As not every particle has to provide every supported CUBA key, a
+    presence mask is kept for each column so that particles keep exactly
+    the (supported) data they were given.
+
+    Removing a particle moves the last particle into its place, so the
+    order of the particles changes. The particles can be reordered
+    spatially (see sort_spatially) so that particles which are close to
+    each other are mostly stored (and iterated over) next to each other.
+
+    Parameters
+    ----------
+    cuba_keys : sequence of CUBA
+        supported CUBA keys (i.e. which are stored)
+
+    """
+    def __init__(self, cuba_keys):
+        self._cuba_keys = tuple(cuba_keys)
+
+        # index -> uid and uid -> index
+        self._uids = []
+        self._index_of_uid = {}
+
+        # coordinates (tuple) of each particle
+        self._coordinates = []
+
+        # map from CUBA to column of values and its presence mask
+        self._columns = dict((key, []) for key in self._cuba_keys)
+        self._present = dict((key, bytearray()) for key in self._cuba_keys)
+
+        # version of each column (incremented whenever it changes)
+        self._versions = dict((key, 0) for key in self._cuba_keys)
+
+    def __len__(self):
+        return len(self._uids)
+
+    def has(self, uid):
+        """ Returns if particle with uid is stored
+
+        """
+        return uid in self._index_of_uid
+
+    def iter_uids(self):
+        """ Iterate over the uids of the stored particles
+
+        """
+        return iter(self._uids)
+
+    def index_of(self, uid):
+        """ Get index of a particle
+
+        Raises
+        ------
+        KeyError
+            if there is no particle with uid
+        """
+        return self._index_of_uid[uid]
+
+    def add(self, particle):
+        """ Add a particle (which has to have an uid)
+
+        Raises
+        ------
+        ValueError
+            if a particle with the same uid is already stored
+        """
+        if particle.uid in self._index_of_uid:
+            raise ValueError(
+                "particle with same uid ({}) already exists".format(
+                    particle.uid))
+
+        self._index_of_uid[particle.uid] = len(self._uids)
+        self._uids.append(particle.uid)
+        self._coordinates.append(tuple(particle.coordinates))
+
+        self._bump_versions()
+        data = particle.data
+        for key in self._cuba_keys:
+            if key in data:
+                self._columns[key].append(data[key])
+                self._present[key].append(1)
+            else:
+                self._columns[key].append(None)
+                self._present[key].append(0)
+
+    def update(self, particle):
+        """ Replace coordinates and data of a stored particle
+
+        Raises
+        ------
+        ValueError
+            if there is no particle with the same uid
+        """
+        try:
+            index = self._index_of_uid[particle.uid]
+        except KeyError:
+            raise ValueError(
+                "particle id ({}) was not found".format(particle.uid))
+
+        self._coordinates[index] = tuple(particle.coordinates)
+
+        self._bump_versions()
+        data = particle.data
+        for key in self._cuba_keys:
+            if key in data:
+                self._columns[key][index] = data[key]
+                self._present[key][index] = 1
+            else:
+                self._columns[key][index] = None
+                self._present[key][index] = 0
+
+    def remove(self, uid):
+        """ Remove a particle
+
+        Raises
+        ------
+        KeyError
+            if there is no particle with uid
+        """
+        index = self._index_of_uid.pop(uid)
+        last = len(self._uids) - 1
+
+        # move the last particle into the place of the removed one
+        if index != last:
+            moved_uid = self._uids[last]
+            self._uids[index] = moved_uid
+            self._index_of_uid[moved_uid] = index
+            self._coordinates[index] = self._coordinates[last]
+            for key in self._cuba_keys:
+                self._columns[key][index] = self._columns[key][last]
+                self._present[key][index] = self._present[key][last]
+
+        self._bump_versions()
+        del self._uids[last]
+        del self._coordinates[last]
+        for key in self._cuba_keys:
+            del self._columns[key][last]
+            del self._present[key][last]
+
+    def reorder(self, order):
+        """ Reorder the particles
+
+        Parameters
+        ----------
+        order : sequence of int
+            current index of each particle in the new order (i.e. a
+            permutation of the indices)
+
+        """
+        order = list(order)
+        if sorted(order) != range(len(self._uids)):
+            raise ValueError("order has to be a permutation of the indices")
+
+        self._uids = [self._uids[i] for i in order]
+        self._index_of_uid = dict(
+            (uid, index) for index, uid in enumerate(self._uids))
+        self._coordinates = [self._coordinates[i] for i in order]
+        for key in self._cuba_keys:
+            column = self._columns[key]
+            present = self._present[key]
+            self._columns[key] = [column[i] for i in order]
+            self._present[key] = bytearray(present[i] for i in order)
+        self._bump_versions()
+
+    def sort_spatially(self):
+        """ Reorder the particles along a Morton curve of their coordinates
+
+        """
+        self.reorder(spatial_order(self._coordinates).tolist())
+
+    def get_particle(self, uid):
+        """ Get (a copy of) a particle
+
+        Raises
+        ------
+        KeyError
+            if there is no particle with uid
+        """
+        index = self._index_of_uid[uid]
+        return Particle(uid=uid,
+                        coordinates=self._coordinates[index],
+                        data=self._get_data(index))
+
+    def iter_particles(self, uids=None):
+        """ Iterate over (copies of) the particles
+
+        Parameters
+        ----------
+        uids : list of particle uids, optional
+            uids of particles to be iterated over (default: all)
+
+        """
+        if uids is None:
+            uids = list(self._uids)
+        for uid in uids:
+            yield self.get_particle(uid)
+
+    # Methods used by ParticleView #########################################
+
+    def get_keys_at(self, index):
+        """ Get the CUBA keys of the particle at index
+
+        """
+        return tuple(key for key in self._cuba_keys
+                     if self._present[key][index])
+
+    def get_coordinates_at(self, index):
+        """ Get coordinates of particle at index
+
+        """
+        return self._coordinates[index]
+
+    def get_value_at(self, cuba, index):
+        """ Get value of particle at index
+
+        Raises
+        ------
+        KeyError
+            if the particle does not have a value for cuba
+        """
+        if cuba not in self._present or not self._present[cuba][index]:
+            raise KeyError(cuba)
+        return self._columns[cuba][index]
+
+    def set_values_at(self, index, coordinates=None, data=None):
+        """ Set coordinates and/or values of particle at index
+
+        Values of unsupported CUBA keys are ignored.
+
+        """
+        if coordinates is not None:
+            self._coordinates[index] = tuple(coordinates)
+
+        for key, value in (data or {}).iteritems():
+            if key in self._columns:
+                self._columns[key][index] = value
+                self._present[key][index] = 1
+                self._versions[key] += 1
+
+    def remove_values_at(self, index, keys):
+        """ Remove values (of CUBA keys) of particle at index
+
+        Unsupported CUBA keys are ignored.
+
+        """
+        for key in keys:
+            if key in self._columns:
+                self._columns[key][index] = None
+                self._present[key][index] = 0
+                self._versions[key] += 1
+
+    def get_array(self, cuba, default=None):
+        """ Get values of all particles as array (ordered by index)
+
+        Parameters
+        ----------
+        cuba : CUBA
+            CUBA key of value
+        default : optional
+            value of the particles without a value for cuba (if not
+            given, every particle has to have a value)
+
+        Raises
+        ------
+        KeyError
+            if cuba is not supported or (without default) not every
+            particle has a value for cuba
+        """
+        if cuba not in self._present:
+            raise KeyError(cuba)
+        if 0 in self._present[cuba]:
+            if default is None:
+                raise KeyError(cuba)
+            return numpy.array(
+                [value if present else default for value, present in zip(
+                    self._columns[cuba], self._present[cuba])],
+                dtype=numpy.double)
+        return numpy.array(self._columns[cuba], dtype=numpy.double)
+
+    def set_array(self, cuba, indices, values):
+        """ Set values of several particles at once
+
+        Parameters
+        ----------
+        cuba : CUBA
+            CUBA key of value
+        indices : sequence of int
+            indices of the particles
+        values : array_like
+            values of the particles (in the order of indices)
+
+        Raises
+        ------
+        KeyError
+            if cuba is not supported
+        ValueError
+            if the number of values does not match
+        """
+        column = self._columns[cuba]
+        present = self._present[cuba]
+        values = numpy.asarray(values, dtype=numpy.double)
+        if len(values) != len(indices):
+            raise ValueError(
+                "{} values were given for {} particles".format(
+                    len(values), len(indices)))
+
+        for index, value in zip(indices, values.tolist()):
+            column[index] = tuple(value) if isinstance(value, list) \
+                else value
+            present[index] = 1
+        self._versions[cuba] += 1
+
+    def get_version(self, cuba):
+        """ Get version of a column (changes whenever a value changes)
+
+        """
+        return self._versions[cuba]
+
+    def _bump_versions(self):
+        for key in self._cuba_keys:
+            self._versions[key] += 1
+
+    def _get_data(self, index):
+        data = DataContainer()
+        for key in self._cuba_keys:
+            if self._present[key][index]:
+                data[key] = self._columns[key][index]
+        return data
@@ -0,0 +1,209 @@
+from collections import Mapping
+
+from simphony.core.data_container import DataContainer
+from simphony.cuds.particles import Particle
+
+
+class ParticleView(Particle):
+    """ Lightweight view of a particle stored in a particle store
+
+    Instead of copying the coordinates and data of a particle (as done
+    when creating a Particle), the view only holds the index of the particle
+    in the store (e.g. ParticleDataCache). Coordinates and data are
+    looked up when accessed.
+
+    Changes made to the view (i.e. setting coordinates or data values)
+    are kept in the view and only written through to the store when the
+    view is passed to update_particles of the particle container.
+
+    A view is only valid as long as its particle stays at the same index
+    of the store, i.e. until particles of the store are removed or
+    reordered (e.g. sorted spatially, as done periodically after a run).
+    An outdated view is relocated and written like any other particle.
+
+    The view is a Particle (so it is accepted wherever a Particle is) but
+    Particle.__init__ is not called, so none of its attributes are stored
+    in the (never created) instance dictionary.
+
+    Parameters
+    ----------
+    store :
+        store of the particles, providing get_coordinates_at(index),
+        get_value_at(cuba, index), get_keys_at(index) (the CUBA keys of
+        the data), set_values_at(index, coordinates, data) and
+        remove_values_at(index, keys)
+    index : int
+        index of the particle in the store
+    uid : uuid.UUID
+        uid of the particle
+
+    """
+    __slots__ = ("uid", "_store", "_index", "_coordinates", "_data")
+
+    def __init__(self, store, index, uid):
+        # Particle.__init__ is deliberately not called
+        self.uid = uid
+        self._store = store
+        self._index = index
+
+        # changes which have not been written to the store
+        self._coordinates = None
+        self._data = None
+
+    @property
+    def coordinates(self):
+        if self._coordinates is not None:
+            return self._coordinates
+        return self._store.get_coordinates_at(self._index)
+
+    @coordinates.setter
+    def coordinates(self, value):
+        self._coordinates = tuple(value)
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = _ViewData(self._store, self._index)
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = _ViewData(self._store, self._index,
+                               replacement=DataContainer(value))
+
+    def is_view_of(self, store):
+        """ Returns if this is a (valid) view of a particle of store
+
+        The view is not valid anymore once its particle moved to another
+        index (as particles were removed or the particles were sorted).
+
+        Raises
+        ------
+        KeyError
+            if the particle was removed from store
+
+        """
+        return store is self._store and \
+            store.index_of(self.uid) == self._index
+
+    def relocate(self):
+        """ Point the view at the current index of its particle
+
+        The unchanged values of an outdated view are then looked up at
+        the index the particle moved to.
+
+        Raises
+        ------
+        KeyError
+            if the particle was removed from the store
+
+        """
+        self._index = self._store.index_of(self.uid)
+        if self._data is not None:
+            self._data._index = self._index
+
+    def write_back(self):
+        """ Write any changes of the view through to the store
+
+        """
+        if self._data is not None and self._data._replaced:
+            # values which are not part of the replacing data are removed
+            # (as when updating with a Particle)
+            removed = [key for key in self._store.get_keys_at(self._index)
+                       if key not in self._data._keys]
+            if removed:
+                self._store.remove_values_at(self._index, removed)
+
+        changes = self._data._changes if self._data is not None else None
+        if self._coordinates is not None or changes:
+            self._store.set_values_at(self._index,
+                                      coordinates=self._coordinates,
+                                      data=changes)
+        self._coordinates = None
+        self._data = None
+
+    def to_particle(self):
+        """ Returns a (stand-alone) Particle with the values of the view
+
+        """
+        return Particle(uid=self.uid,
+                        coordinates=self.coordinates,
+                        data=DataContainer(self.data))
+
+    def __repr__(self):
+        return "ParticleView(uid={}, index={})".format(self.uid, self._index)
+
+
+class _ViewData(object):
+    """ Data (mapping from CUBA to value) of a particle view
+
+    Values are looked up in the store unless they have been changed.
+
+    Parameters
+    ----------
+    store :
+        store of the particles
+    index : int
+        index of the particle in the store
+    replacement : DataContainer, optional
+        data replacing all of the data of the particle
+
+    """
+    __slots__ = ("_store", "_index", "_changes", "_keys", "_replaced")
+
+    def __init__(self, store, index, replacement=None):
+        self._store = store
+        self._index = index
+        self._replaced = replacement is not None
+        if replacement is None:
+            self._changes = {}
+            self._keys = store.get_keys_at(index)
+        else:
+            self._changes = dict(replacement)
+            self._keys = tuple(replacement)
+
+    def __getitem__(self, key):
+        try:
+            return self._changes[key]
+        except KeyError:
+            if key not in self._keys:
+                raise
+            return self._store.get_value_at(key, self._index)
+
+    def __setitem__(self, key, value):
+        if key not in self._keys:
+            self._keys = self._keys + (key,)
+        self._changes[key] = value
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def keys(self):
+        return list(self._keys)
+
+    def values(self):
+        return [self[key] for key in self._keys]
+
+    def items(self):
+        return [(key, self[key]) for key in self._keys]
+
+    def iteritems(self):
+        for key in self._keys:
+            yield key, self[key]
+
+    def get(self, key, default=None):
+        return self[key] if key in self._keys else default
+
+    def update(self, other):
+        for key, value in dict(other).iteritems():
+            self[key] = value
+
+
+# so that the data of a view is accepted wherever a mapping is expected
+Mapping.register(_ViewData)
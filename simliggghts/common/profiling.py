@@ -0,0 +1,265 @@
+""" Profiling hooks
+
+This module provides hooks which can be attached to the phases of the
+wrapper (e.g. 'run', 'flush', 'liggghts', 'read' or 'iterate') in order
+to profile them. Each profiled phase writes a report to a directory.
+
+Example::
+
+    from simliggghts.common.profiling import CProfileHook
+
+    with wrapper.profile(CProfileHook("profiles", phases=["flush"])):
+        wrapper.run()
+
+"""
+import abc
+import os
+
+
+class ProfilingHook(object):
+    """ Base class of hooks profiling phases
+
+    Only one phase is profiled at a time by a hook; phases which are entered
+    while a phase is profiled are part of the report of the enclosing phase.
+
+    Parameters
+    ----------
+    directory : str
+        directory where the reports are written to (created if needed)
+    phases : sequence of str, optional
+        names of the phases to be profiled. If not given, then all phases
+        are profiled.
+    every : int, optional
+        only every n-th entry of a phase is profiled
+
+    """
+    __metaclass__ = abc.ABCMeta
+
+    def __init__(self, directory, phases=None, every=1):
+        if every < 1:
+            raise ValueError("every must be a positive number")
+
+        self.directory = directory
+        self.phases = None if phases is None else frozenset(phases)
+        self.every = every
+
+        # map from phase name to number of times it was entered
+        self._counts = {}
+
+        # (name, count, state) of the phase which is currently profiled
+        self._current = None
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def enter(self, name):
+        """ Called when a phase is entered
+
+        """
+        if self.phases is not None and name not in self.phases:
+            return
+
+        count = self._counts.get(name, 0) + 1
+        self._counts[name] = count
+
+        if self._current is None and (count - 1) % self.every == 0:
+            self._current = (name, count, self._start())
+
+    def exit(self, name):
+        """ Called when a phase is exited
+
+        """
+        if self._current is not None and self._current[0] == name:
+            name, count, state = self._current
+            self._current = None
+            self._stop(state, os.path.join(
+                self.directory, "{}_{:04d}".format(name, count)))
+
+    @abc.abstractmethod
+    def _start(self):
+        """ Start profiling
+
+        Returns
+        -------
+        state :
+            state which is passed to _stop
+        """
+
+    @abc.abstractmethod
+    def _stop(self, state, filename_base):
+        """ Stop profiling and write report
+
+        Parameters
+        ----------
+        state :
+            state returned by _start
+        filename_base : str
+            name of report file (without extension)
+
+        """
+
+
+class CProfileHook(ProfilingHook):
+    """ Profile phases using cProfile
+
+    For each profiled phase, the statistics are dumped to a '.prof' file
+    (which can be loaded with pstats) and a summary is written to a
+    '.txt' file.
+
+    Parameters
+    ----------
+    directory : str
+        directory where the reports are written to
+    phases : sequence of str, optional
+        names of the phases to be profiled (default: all)
+    every : int, optional
+        only every n-th entry of a phase is profiled
+    sort : str, optional
+        key used to sort the summary
+    limit : int, optional
+        number of functions listed in the summary
+
+    """
+    def __init__(self, directory, phases=None, every=1,
+                 sort="cumulative", limit=40):
+        super(CProfileHook, self).__init__(directory, phases, every)
+        self.sort = sort
+        self.limit = limit
+
+    def _start(self):
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def _stop(self, profiler, filename_base):
+        import pstats
+        profiler.disable()
+        profiler.dump_stats(filename_base + ".prof")
+        with open(filename_base + ".txt", "w") as report:
+            stats = pstats.Stats(profiler, stream=report)
+            stats.sort_stats(self.sort).print_stats(self.limit)
+
+
+class PyinstrumentHook(ProfilingHook):
+    """ Profile phases using the sampling profiler pyinstrument
+
+    For each profiled phase, a '.txt' and a '.html' report is written.
+
+    Parameters
+    ----------
+    directory : str
+        directory where the reports are written to
+    phases : sequence of str, optional
+        names of the phases to be profiled (default: all)
+    every : int, optional
+        only every n-th entry of a phase is profiled
+    interval : float, optional
+        sampling interval (in seconds)
+
+    Raises
+    ------
+    ImportError
+        if pyinstrument is not installed
+
+    """
+    def __init__(self, directory, phases=None, every=1, interval=0.001):
+        import pyinstrument
+        super(PyinstrumentHook, self).__init__(directory, phases, every)
+        self._pyinstrument = pyinstrument
+        self.interval = interval
+
+    def _start(self):
+        profiler = self._pyinstrument.Profiler(interval=self.interval)
+        profiler.start()
+        return profiler
+
+    def _stop(self, profiler, filename_base):
+        profiler.stop()
+        with open(filename_base + ".txt", "w") as report:
+            report.write(profiler.output_text(unicode=False, color=False))
+        with open(filename_base + ".html", "w") as report:
+            report.write(profiler.output_html())
+
+
+class TracemallocHook(ProfilingHook):
+    """ Trace memory allocations of phases using tracemalloc
+
+    A snapshot is taken when a phase is entered and exited; the difference
+    (i.e. where memory was allocated during the phase) is written to a
+    '.txt' file.
+
+    Parameters
+    ----------
+    directory : str
+        directory where the reports are written to
+    phases : sequence of str, optional
+        names of the phases to be profiled (default: all)
+    every : int, optional
+        only every n-th entry of a phase is profiled
+    frames : int, optional
+        number of frames stored per allocation
+    key_type : str, optional
+        how allocations are grouped ('lineno', 'filename' or 'traceback')
+    limit : int, optional
+        number of entries listed in the report
+
+    Raises
+    ------
+    ImportError
+        if tracemalloc is not available (python 2 requires pytracemalloc)
+
+    """
+    def __init__(self, directory, phases=None, every=1, frames=1,
+                 key_type="lineno", limit=40):
+        import tracemalloc
+        super(TracemallocHook, self).__init__(directory, phases, every)
+        self._tracemalloc = tracemalloc
+        self.frames = frames
+        self.key_type = key_type
+        self.limit = limit
+
+    def _start(self):
+        tracemalloc = self._tracemalloc
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(self.frames)
+        return started, tracemalloc.take_snapshot()
+
+    def _stop(self, state, filename_base):
+        tracemalloc = self._tracemalloc
+        started, before = state
+        after = tracemalloc.take_snapshot()
+        if started:
+            tracemalloc.stop()
+
+        # the allocations of tracemalloc itself (and of this hook) are not
+        # of interest
+        snapshot_filters = [
+            tracemalloc.Filter(False, _get_source_file(tracemalloc.__file__)),
+            tracemalloc.Filter(False, _get_source_file(__file__))]
+        differences = after.filter_traces(snapshot_filters).compare_to(
+            before.filter_traces(snapshot_filters), self.key_type)
+
+        with open(filename_base + ".txt", "w") as report:
+            report.write("total: {} bytes\n".format(
+                sum(difference.size_diff for difference in differences)))
+            for difference in differences[:self.limit]:
+                report.write("{}\n".format(difference))
+                if self.key_type == "traceback":
+                    for line in difference.traceback.format():
+                        report.write("    {}\n".format(line))
+
+
+def _get_source_file(filename):
+    """ Returns the source file of a module file
+
+    The frames of traced allocations refer to the '.py' file while the
+    __file__ of a module is the compiled file once it was imported from
+    it (python 2).
+
+    """
+    base, extension = os.path.splitext(filename)
+    if extension in (".pyc", ".pyo"):
+        return base + ".py"
+    return filename
@@ -0,0 +1,80 @@
+from collections import Mapping
+
+
+class ReadOnlyDataContainer(Mapping):
+    """ Read-only view of the data (or data extension) of a container
+
+    The view does not copy the data; it is only valid as long as the
+    viewed data is not changed in place (the data managers replace the
+    stored data instead of changing it).  Use copy() to get a mutable
+    copy.
+
+    Parameters
+    ----------
+    data : DataContainer or dict
+        data which is viewed
+    version : int
+        version of the data (a new version is created whenever the data
+        of a container is replaced)
+
+    """
+    def __init__(self, data, version=0):
+        self._data = data
+        self.version = version
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def copy(self):
+        """ Returns a mutable copy (of the same type as the viewed data)
+
+        """
+        return type(self._data)(self._data)
+
+    def __repr__(self):
+        return "ReadOnlyDataContainer({!r})".format(self._data)
+
+
+class SnapshotCache(object):
+    """ Cache of read-only snapshots of data stored per key
+
+    A snapshot is created once and returned on following requests until
+    the stored data (object) of the key is replaced.
+
+    """
+    def __init__(self):
+        self._snapshots = {}
+        self._version = 0
+
+    def get(self, key, data):
+        """ Returns snapshot of data (stored under key)
+
+        Parameters
+        ----------
+        key :
+            key (e.g. unique name of a particle container)
+        data : DataContainer or dict
+            currently stored data of key
+
+        """
+        snapshot = self._snapshots.get(key)
+        if snapshot is None or snapshot._data is not data:
+            self._version += 1
+            snapshot = ReadOnlyDataContainer(data, self._version)
+            self._snapshots[key] = snapshot
+        return snapshot
+
+    def discard(self, key):
+        """ Discard snapshot of key (e.g. when a container is removed)
+
+        """
+        self._snapshots.pop(key, None)
@@ -0,0 +1,81 @@
+""" Spatial ordering of particles along a Morton (Z-order) curve
+
+Particles which are close to each other in space are mostly close to each
+other along the curve, so ordering particles by their Morton code gives
+a spatially coherent order (e.g. for stencil-style analysis).
+
+"""
+import numpy
+
+# number of bits of each coordinate (3 * 21 bits fit into 64 bits)
+MORTON_BITS = 21
+
+
+def morton_codes(coordinates, bits=MORTON_BITS):
+    """ Returns Morton code of each point
+
+    The coordinates are scaled to the bounding box of the points which
+    is divided into 2**bits cells in each direction.
+
+    Parameters
+    ----------
+    coordinates : array_like
+        coordinates of the points (shape (N, 3))
+    bits : int, optional
+        number of bits of each (scaled) coordinate (at most 21)
+
+    Returns
+    -------
+    codes : numpy.ndarray
+        code (uint64) of each point
+
+    """
+    if not 1 <= bits <= MORTON_BITS:
+        raise ValueError(
+            "bits has to be between 1 and {}".format(MORTON_BITS))
+
+    coordinates = numpy.asarray(coordinates, dtype=numpy.double)
+    if len(coordinates) == 0:
+        return numpy.zeros(0, dtype=numpy.uint64)
+
+    lower = coordinates.min(axis=0)
+    extent = coordinates.max(axis=0) - lower
+    extent[extent == 0.0] = 1.0
+
+    cells = (1 << bits) - 1
+    scaled = ((coordinates - lower) / extent * cells).astype(numpy.uint64)
+
+    codes = numpy.zeros(len(coordinates), dtype=numpy.uint64)
+    for axis in range(3):
+        codes |= _spread_bits(scaled[:, axis]) << numpy.uint64(axis)
+    return codes
+
+
+def spatial_order(coordinates, bits=MORTON_BITS):
+    """ Returns indices which order points along the Morton curve
+
+    Parameters
+    ----------
+    coordinates : array_like
+        coordinates of the points (shape (N, 3))
+    bits : int, optional
+        number of bits of each (scaled) coordinate (at most 21)
+
+    """
+    return numpy.argsort(morton_codes(coordinates, bits), kind="mergesort")
+
+
+def _spread_bits(values):
+    """ Spread the (21 lower) bits of values so that two zero bits are
+    between each of them
+
+    """
+    values = values & numpy.uint64(0x1fffff)
+    for shift, mask in [(32, 0x1f00000000ffff),
+                        (16, 0x1f0000ff0000ff),
+                        (8, 0x100f00f00f00f00f),
+                        (4, 0x10c30c30c30c30c3),
+                        (2, 0x1249249249249249)]:
+        values = (values | (values << numpy.uint64(shift))) & \
+            numpy.uint64(mask)
+    return values
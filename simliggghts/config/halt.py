@@ -0,0 +1,151 @@
+""" Conditions ending a run (evaluated by LIGGGHTS)
+
+A condition is expressed over computes and variables of LIGGGHTS so that
+a long run can be stopped by LIGGGHTS itself ('fix halt') as soon as the
+condition holds, e.g.::
+
+    condition = kinetic_energy_below(1e-8) & max_speed_below(1e-3)
+
+"""
+import hashlib
+
+# ids of the fix and the variable checking the condition
+HALT_FIX_ID = "simphony_halt"
+HALT_VARIABLE = "simphony_halt"
+
+_OPERATORS = ("<", "<=", ">", ">=", "==", "!=")
+
+
+class HaltCondition(object):
+    """ Condition (over computes and variables of LIGGGHTS) ending a run
+
+    Conditions can be combined with '&' (both hold) and '|' (either
+    holds).
+
+    Parameters
+    ----------
+    expression : str
+        expression of an equal-style variable which is non-zero if the
+        condition holds
+    commands : sequence of str, optional
+        commands defining the computes, variables and regions which the
+        expression refers to
+
+    """
+    def __init__(self, expression, commands=()):
+        self.expression = expression
+        self.commands = tuple(commands)
+
+    def __and__(self, other):
+        return self._combine(other, "&&")
+
+    def __or__(self, other):
+        return self._combine(other, "||")
+
+    def __repr__(self):
+        return "HaltCondition({!r})".format(self.expression)
+
+    def get_compute_ids(self):
+        """ Returns ids of the computes defined by the commands
+
+        """
+        return [command.split()[1] for command in self.commands
+                if command.startswith("compute ")]
+
+    def _combine(self, other, operator):
+        commands = list(self.commands)
+        commands.extend(command for command in other.commands
+                        if command not in commands)
+        return HaltCondition(
+            "({}) {} ({})".format(self.expression, operator,
+                                  other.expression),
+            commands)
+
+
+def kinetic_energy_below(threshold):
+    """ Condition that the kinetic energy of all particles is below
+    threshold
+
+    """
+    return HaltCondition(
+        "c_simphony_ke < {!r}".format(float(threshold)),
+        ["compute simphony_ke all ke"])
+
+
+def max_speed_below(threshold):
+    """ Condition that the speed of each particle is below threshold
+
+    """
+    return HaltCondition(
+        "c_simphony_vmax < {!r}".format(float(threshold)),
+        ["variable simphony_speed atom sqrt(vx*vx+vy*vy+vz*vz)",
+         "compute simphony_vmax all reduce max v_simphony_speed"])
+
+
+def region_count(bounds, operator, number):
+    """ Condition on the number of particles in a (box) region
+
+    Parameters
+    ----------
+    bounds : sequence of (float, float)
+        lower and upper bound of the region in each direction
+    operator : str
+        comparison of the number of particles in the region with number
+        (one of '<', '<=', '>', '>=', '==' and '!=')
+    number : int
+        number of particles
+
+    Raises
+    ------
+    ValueError
+        if the operator or the bounds are not valid
+
+    """
+    if operator not in _OPERATORS:
+        raise ValueError(
+            "operator has to be one of {}".format(", ".join(_OPERATORS)))
+    bounds = tuple(tuple(float(value) for value in bound)
+                   for bound in bounds)
+    if len(bounds) != 3 or any(len(bound) != 2 or bound[0] >= bound[1]
+                               for bound in bounds):
+        raise ValueError(
+            "bounds have to be given as (lower, upper) bounds for each "
+            "of the 3 directions")
+
+    region_id = "halt_region_" + hashlib.md5(repr(bounds)).hexdigest()[:8]
+    variable = "simphony_count_" + region_id
+    return HaltCondition(
+        "v_{} {} {}".format(variable, operator, int(number)),
+        ["region {} block {} units box".format(
+            region_id, " ".join("{!r} {!r}".format(*bound)
+                                for bound in bounds)),
+         "variable {} equal count(all,{})".format(variable, region_id)])
+
+
+def get_halt_commands(condition, check_every):
+    """ Return commands stopping a run once the condition holds
+
+    Parameters
+    ----------
+    condition : HaltCondition
+        condition ending the run
+    check_every : int
+        number of steps between two checks of the condition
+
+    """
+    command_str = "".join(command + "\n" for command in condition.commands)
+    command_str += 'variable {} equal "{}"\n'.format(
+        HALT_VARIABLE, condition.expression)
+    command_str += "fix {} all halt {} v_{} > 0.5 error soft\n".format(
+        HALT_FIX_ID, int(check_every), HALT_VARIABLE)
+    return command_str
+
+
+def get_halt_cleanup_commands(condition):
+    """ Return commands removing the fix and computes of the condition
+
+    """
+    command_str = "unfix {}\n".format(HALT_FIX_ID)
+    for compute_id in condition.get_compute_ids():
+        command_str += "uncompute {}\n".format(compute_id)
+    return command_str
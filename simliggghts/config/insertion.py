@@ -0,0 +1,246 @@
+""" Insertion of particles by LIGGGHTS
+
+Instead of creating the particles in Python (and sending them to
+LIGGGHTS), LIGGGHTS' own insertion fixes create them during a run from a
+distribution of particle sizes:
+
+- a 'fix particletemplate/sphere' for each radius
+- a 'fix particledistribution/discrete' of these templates
+- a 'fix insert/pack' filling a region or a 'fix insert/stream' inserting
+  particles through a face (given as mesh)
+
+"""
+from collections import namedtuple
+import hashlib
+import os
+
+import numpy
+
+from .script_writer import ConfigurationError
+
+# first seed (the seeds of LIGGGHTS have to be primes larger than 10000)
+_FIRST_SEED = 15485863
+
+
+class ParticleInsertion(namedtuple("ParticleInsertion",
+                                   ["radii", "density", "number",
+                                    "fractions", "region", "face", "rate",
+                                    "velocity", "insert_every"])):
+    """ Insertion of particles (of a size distribution) by LIGGGHTS
+
+    If a region is given, the region is filled (up to number particles in
+    the region) with 'fix insert/pack'. Otherwise number particles are
+    inserted through the face with 'fix insert/stream' (at rate).
+
+    Parameters
+    ----------
+    radii : sequence of float
+        radius of the particles of each size
+    density : float
+        density of the particles
+    number : int
+        number of particles (in the region or inserted in total)
+    fractions : sequence of float, optional
+        mass fraction of each size (default: equal fractions)
+    region : sequence of (float, float), optional
+        lower and upper bound of the (box) region in each direction
+    face : str, optional
+        STL or VTK file of the face the particles are inserted through
+    rate : float, optional
+        number of particles inserted per time (through the face)
+    velocity : tuple of float, optional
+        velocity of the inserted particles
+    insert_every : int, optional
+        number of steps between two insertions (default: the region is
+        only filled once and LIGGGHTS derives the interval for a face
+        from the velocity)
+
+    """
+    __slots__ = ()
+
+    def __new__(cls, radii, density, number, fractions=None, region=None,
+                face=None, rate=None, velocity=(0.0, 0.0, 0.0),
+                insert_every=None):
+        radii = tuple(float(radius) for radius in radii)
+        if fractions is None:
+            fractions = (1.0 / len(radii),) * len(radii) if radii else ()
+        fractions = tuple(float(fraction) for fraction in fractions)
+        if region is not None:
+            region = tuple(tuple(float(value) for value in bounds)
+                           for bounds in region)
+        velocity = tuple(float(value) for value in velocity)
+        return super(ParticleInsertion, cls).__new__(
+            cls, radii, float(density), int(number), fractions, region,
+            face, rate, velocity, insert_every)
+
+    @property
+    def mode(self):
+        """ 'pack' (filling a region) or 'stream' (through a face)
+
+        """
+        return "pack" if self.region is not None else "stream"
+
+
+def check_insertions(insertions, number_types):
+    """ Check the insertions (of each atom type)
+
+    Parameters
+    ----------
+    insertions : dict
+        map from atom type to ParticleInsertion
+    number_types : int
+        number of atom types
+
+    Raises
+    ------
+    ConfigurationError
+        if an insertion is not configured correctly
+
+    """
+    if not isinstance(insertions, dict):
+        raise ConfigurationError(
+            "PARTICLE_INSERTIONS must be given as dict (from material type "
+            "to insertion)")
+
+    for material_type, insertion in insertions.iteritems():
+        if not 1 <= material_type <= number_types:
+            raise ConfigurationError(
+                "Material type of insertion has to be between 1 and {} "
+                "(not {})".format(number_types, material_type))
+        if not isinstance(insertion, ParticleInsertion):
+            raise ConfigurationError(
+                "Insertion has to be a ParticleInsertion")
+        _check_insertion(insertion)
+
+
+def get_insertion_commands(insertions):
+    """ Return the commands of the insertions (of each atom type)
+
+    The ids of the fixes (and of the region) contain the atom type of the
+    inserted particles; the regions are named after their bounds so that
+    a region is never defined twice with different bounds.
+
+    Parameters
+    ----------
+    insertions : dict
+        map from atom type to ParticleInsertion
+
+    """
+    command_str = ""
+    seeds = _primes(_FIRST_SEED)
+    for material_type in sorted(insertions):
+        insertion = insertions[material_type]
+        if insertion.number <= 0:
+            continue
+
+        template_ids = []
+        for i, radius in enumerate(insertion.radii, 1):
+            template_id = "ins_pts_{}_{}".format(material_type, i)
+            template_ids.append(template_id)
+            command_str += (
+                "fix {} all particletemplate/sphere {} atom_type {} "
+                "density constant {!r} radius constant {!r}\n").format(
+                template_id, next(seeds), material_type, insertion.density,
+                radius)
+
+        distribution_id = "ins_pdd_{}".format(material_type)
+        command_str += \
+            "fix {} all particledistribution/discrete {} {} {}\n".format(
+                distribution_id, next(seeds), len(template_ids),
+                " ".join("{} {!r}".format(template_id, fraction)
+                         for template_id, fraction in zip(
+                             template_ids, insertion.fractions)))
+
+        options = "vel constant {!r} {!r} {!r} ".format(*insertion.velocity)
+        if insertion.mode == "pack":
+            region_id = get_region_id(insertion.region)
+            command_str += "region {} block {} units box\n".format(
+                region_id, " ".join("{!r} {!r}".format(*bounds)
+                                    for bounds in insertion.region))
+            command_str += (
+                "fix ins_{} all insert/pack seed {} distributiontemplate {} "
+                "{}insert_every {} overlapcheck yes all_in yes "
+                "particles_in_region {} region {}\n").format(
+                material_type, next(seeds), distribution_id, options,
+                insertion.insert_every or "once", insertion.number,
+                region_id)
+        else:
+            face_id = "ins_face_{}".format(material_type)
+            command_str += "fix {} all mesh/surface file {} type {}\n".format(
+                face_id, os.path.abspath(insertion.face), material_type)
+            if insertion.rate is not None:
+                options += "particlerate {!r} ".format(float(insertion.rate))
+            if insertion.insert_every is not None:
+                options += "insert_every {} ".format(insertion.insert_every)
+            command_str += (
+                "fix ins_{} all insert/stream seed {} distributiontemplate {} "
+                "nparticles {} {}overlapcheck yes all_in no "
+                "insertion_face {}\n").format(
+                material_type, next(seeds), distribution_id,
+                insertion.number, options, face_id)
+
+    return command_str
+
+
+def get_region_id(bounds):
+    """ Returns id of the (box) region with bounds
+
+    """
+    return "ins_region_" + hashlib.md5(repr(bounds)).hexdigest()[:8]
+
+
+def _check_insertion(insertion):
+    """ Check a single insertion
+
+    """
+    if not insertion.radii or min(insertion.radii) <= 0.0:
+        raise ConfigurationError(
+            "Insertion needs (positive) radii of the particles")
+    if len(insertion.fractions) != len(insertion.radii):
+        raise ConfigurationError(
+            "Insertion needs a fraction for each of the {} radii".format(
+                len(insertion.radii)))
+    if min(insertion.fractions) < 0.0 or \
+            abs(sum(insertion.fractions) - 1.0) > 1e-6:
+        raise ConfigurationError(
+            "Fractions of the insertion have to add up to 1")
+    if insertion.density <= 0.0:
+        raise ConfigurationError("Density of insertion has to be positive")
+    if numpy.shape(insertion.velocity) != (3,):
+        raise ConfigurationError(
+            "Velocity of insertion must be given as vector (of 3 values)")
+
+    if (insertion.region is None) == (insertion.face is None):
+        raise ConfigurationError(
+            "Insertion needs either a region or a face")
+    if insertion.region is not None:
+        if numpy.shape(insertion.region) != (3, 2) or any(
+                lower >= upper for lower, upper in insertion.region):
+            raise ConfigurationError(
+                "Region of insertion must be given as (lower, upper) bounds "
+                "for each of the 3 directions")
+    else:
+        if os.path.splitext(insertion.face)[1].lower() not in (".stl",
+                                                               ".vtk"):
+            raise ConfigurationError(
+                "Face of insertion '{}' has to be a STL or VTK file".format(
+                    insertion.face))
+        if not os.path.isfile(insertion.face):
+            raise ConfigurationError(
+                "Face of insertion '{}' does not exist".format(
+                    insertion.face))
+        if insertion.rate is not None and insertion.rate <= 0.0:
+            raise ConfigurationError(
+                "Rate of insertion has to be positive")
+
+
+def _primes(start):
+    """ Generate the primes (larger than or equal to start)
+
+    """
+    candidate = start
+    while True:
+        if all(candidate % divisor
+               for divisor in xrange(2, int(candidate ** 0.5) + 1)):
+            yield candidate
+        candidate += 1
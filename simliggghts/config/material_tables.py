@@ -0,0 +1,170 @@
+import numpy
+
+from simphony.core.cuba import CUBA
+
+from ..cuba_extension import CUBAExtension
+from .script_writer import ConfigurationError
+
+
+class MaterialTables(object):
+    """ Material parameters of each atom type and each pair of atom types
+
+    The parameters of each atom type (Young's modulus, Poisson's ratio) are
+    stored as vectors of length T and the parameters of each pair of atom
+    types (coefficient of restitution, friction coefficient and cohesion
+    energy density) as symmetric TxT matrices, T being the number of atom
+    types. The tables are validated once when they are created.
+
+    The pair parameters can either be given as (T, T) arrays or as flat
+    sequences of T*T values (in the row-major order used by LIGGGHTS).
+
+    Parameters
+    ----------
+    number_types : int
+        number of atom types
+    young_modulus : sequence of float
+        Young's modulus of each type
+    poisson_ratio : sequence of float
+        Poisson's ratio of each type
+    restitution_coefficient : sequence or array of float
+        coefficient of restitution of each pair of types
+    friction_coefficient : sequence or array of float
+        friction coefficient of each pair of types
+    cohesion_energy_density : sequence or array of float, optional
+        cohesion energy density of each pair of types
+    coarse_graining_factor : float, optional
+        coarse-graining factor (the parameters are the ones of the
+        original particles, LIGGGHTS scales the contact models of the
+        parcels by the factor)
+
+    Raises
+    ------
+    ConfigurationError
+        if a table does not have the right size or a pair table is not
+        symmetric (or the coarse-graining factor is smaller than 1)
+
+    """
+    def __init__(self, number_types, young_modulus, poisson_ratio,
+                 restitution_coefficient, friction_coefficient,
+                 cohesion_energy_density=None, coarse_graining_factor=None):
+        if number_types < 1:
+            raise ConfigurationError(
+                "Number of atom types has to be positive "
+                "(not {})".format(number_types))
+        self.number_types = number_types
+
+        self.young_modulus = _per_type_table(
+            young_modulus, number_types, "Youngs modulus")
+        self.poisson_ratio = _per_type_table(
+            poisson_ratio, number_types, "Poisson ratio")
+        self.restitution_coefficient = _per_pair_table(
+            restitution_coefficient, number_types, "restitution coefficient")
+        self.friction_coefficient = _per_pair_table(
+            friction_coefficient, number_types, "friction coefficient")
+        self.cohesion_energy_density = None
+        if cohesion_energy_density is not None:
+            self.cohesion_energy_density = _per_pair_table(
+                cohesion_energy_density, number_types,
+                "cohesion energy density")
+        if coarse_graining_factor is not None and \
+                not coarse_graining_factor >= 1.0:
+            raise ConfigurationError(
+                "Coarse-graining factor has to be at least 1 "
+                "(not {})".format(coarse_graining_factor))
+        self.coarse_graining_factor = coarse_graining_factor
+
+    @classmethod
+    def from_SP(cls, SP, number_types):
+        """ Create tables from the system parameters
+
+        The cohesion energy density is only used if the cohesion pair
+        potential is used. The coarse-graining factor is optional.
+
+        Parameters
+        ----------
+        SP : dict
+            container of attributes related to the system parameters
+        number_types : int
+            number of atom types
+
+        """
+        cohesion_energy_density = None
+        if "cohesion" in SP.get(CUBAExtension.PAIR_POTENTIALS, ()):
+            cohesion_energy_density = SP[CUBA.COHESION_ENERGY_DENSITY]
+
+        return cls(number_types,
+                   SP[CUBA.YOUNG_MODULUS],
+                   SP[CUBA.POISSON_RATIO],
+                   SP[CUBA.RESTITUTION_COEFFICIENT],
+                   SP[CUBA.FRICTION_COEFFICIENT],
+                   cohesion_energy_density,
+                   SP.get(CUBAExtension.COARSE_GRAINING_FACTOR))
+
+    def get_commands(self):
+        """ Return the liggghts commands defining the material data
+
+        """
+        number_types = self.number_types
+        commands = [
+            "fix m1 all property/global youngsModulus peratomtype {}\n".format(
+                _join(self.young_modulus)),
+            "fix m2 all property/global poissonsRatio peratomtype {}\n".format(
+                _join(self.poisson_ratio)),
+            ("fix m3 all property/global coefficientRestitution "
+             "peratomtypepair {} {}\n").format(
+                number_types, _join(self.restitution_coefficient)),
+            ("fix m4 all property/global coefficientFriction "
+             "peratomtypepair {} {}\n").format(
+                number_types, _join(self.friction_coefficient))]
+
+        if self.cohesion_energy_density is not None:
+            commands.append(
+                ("fix m5 all property/global cohesionEnergyDensity "
+                 "peratomtypepair {} {}\n").format(
+                    number_types, _join(self.cohesion_energy_density)))
+
+        if self.coarse_graining_factor is not None and \
+                self.coarse_graining_factor > 1.0:
+            commands.append("coarsegraining {!r}\n".format(
+                float(self.coarse_graining_factor)))
+
+        return "".join(commands)
+
+
+def _per_type_table(values, number_types, name):
+    """ Return values (one per type) as vector
+
+    """
+    table = numpy.array(values, dtype=numpy.double)
+    if table.shape != (number_types,):
+        raise ConfigurationError(
+            "Need {} for {} materials. Only found {} entries.".format(
+                name, number_types, table.size))
+    return table
+
+
+def _per_pair_table(values, number_types, name):
+    """ Return values (one per pair of types) as symmetric matrix
+
+    """
+    table = numpy.array(values, dtype=numpy.double)
+    if table.ndim == 1 and table.size == number_types * number_types:
+        table = table.reshape(number_types, number_types)
+    if table.shape != (number_types, number_types):
+        raise ConfigurationError(
+            "Need {} for {} materials. Only found {} entries, "
+            "but {} are required.".format(
+                name, number_types, table.size, number_types * number_types))
+    if not numpy.array_equal(table, table.T):
+        raise ConfigurationError(
+            "The {} of pairs of materials has to be symmetric".format(name))
+    return table
+
+
+def _join(table):
+    """ Return values of table (row-major) as space-separated string
+
+    """
+    # converting to a list (of python floats) at once is a lot faster
+    # than formatting each numpy value
+    return " ".join(map(str, table.ravel().tolist())) + " "
@@ -0,0 +1,112 @@
+""" Neighbor list settings derived from the particles
+
+The skin, the bin size and how often LIGGGHTS checks if the neighbor
+lists have to be rebuilt are derived from the radius distribution and
+the maximum speed of the particles as well as the time step.
+
+"""
+from collections import namedtuple
+import math
+
+import numpy
+
+# skin as fraction of the smallest radius
+SKIN_FRACTION = 0.5
+
+# fraction of the skin a particle may move between two checks
+# (a rebuild is required once a particle moved half of the skin)
+CHECK_FRACTION = 0.25
+
+# maximum number of steps between two checks
+MAX_EVERY = 20
+
+# settings used if there are no particles
+DEFAULT_SKIN = 0.1e-3
+
+
+class NeighborSettings(namedtuple("NeighborSettings",
+                                  ["skin", "bin_size", "every"])):
+    """ Settings of the neighbor lists
+
+    Attributes
+    ----------
+    skin : float
+        extra distance beyond the cutoff
+    bin_size : float or None
+        size of the bins (None for the default of LIGGGHTS, i.e. half
+        of the largest cutoff)
+    every : int
+        number of steps between checks if the lists have to be rebuilt
+
+    """
+    __slots__ = ()
+
+    def get_commands(self):
+        """ Return commands applying the settings
+
+        """
+        command_str = "neighbor {:.6g} bin\n".format(self.skin)
+        command_str += "neigh_modify delay 0 every {} check yes".format(
+            self.every)
+        if self.bin_size is not None:
+            command_str += " binsize {:.6g}".format(self.bin_size)
+        return command_str + "\n"
+
+
+def get_neighbor_settings(radii, velocities, time_step):
+    """ Return neighbor settings suitable for the particles
+
+    - the skin is a fraction of the smallest radius (so that the
+      neighbor lists of the small particles stay short)
+    - the bins are sized for the interaction of two particles of median
+      radius, but not smaller than a quarter of the largest cutoff (which
+      would make the stencil of the bins too large)
+    - the lists are checked often enough that the fastest particle moves
+      at most a fraction of the skin between two checks
+
+    The values are rounded (to two significant digits) so that small
+    changes of the particles do not change the settings.
+
+    Parameters
+    ----------
+    radii : array_like
+        radius of each particle
+    velocities : array_like
+        velocity of each particle (shape (N, 3))
+    time_step : float
+        time step
+
+    """
+    radii = numpy.asarray(radii, dtype=numpy.double)
+    if len(radii) == 0:
+        return NeighborSettings(DEFAULT_SKIN, None, 1)
+
+    skin = _round(SKIN_FRACTION * radii.min())
+
+    max_cutoff = 2.0 * radii.max() + skin
+    bin_size = _round(max(0.5 * (2.0 * numpy.median(radii) + skin),
+                          0.25 * max_cutoff))
+    if bin_size >= _round(0.5 * max_cutoff):
+        # use the default bin size of LIGGGHTS
+        bin_size = None
+
+    velocities = numpy.asarray(velocities, dtype=numpy.double)
+    max_speed = numpy.sqrt((velocities ** 2).sum(axis=1)).max() \
+        if len(velocities) else 0.0
+    if max_speed * time_step > 0.0:
+        every = int(CHECK_FRACTION * skin / (max_speed * time_step))
+        every = min(max(every, 1), MAX_EVERY)
+    else:
+        every = MAX_EVERY
+
+    return NeighborSettings(skin, bin_size, every)
+
+
+def _round(value):
+    """ Round value to two significant digits
+
+    """
+    if value <= 0.0:
+        return value
+    digits = 1 - int(math.floor(math.log10(value)))
+    return round(value, digits)
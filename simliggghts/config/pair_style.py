@@ -1,5 +1,3 @@
-import yaml
-
 from ..cuba_extension import CUBAExtension
 
 
@@ -137,6 +135,8 @@ class PairStyle(object):
         styles = []
         if (CUBAExtension.PAIR_POTENTIALS in SP and
                 SP[CUBAExtension.PAIR_POTENTIALS]):
+            # yaml is only needed (and imported) when parsing pair potentials
+            import yaml
             keywords = yaml.safe_load(SP[CUBAExtension.PAIR_POTENTIALS])
             my_pair_style = SP[CUBAExtension.PAIR_POTENTIALS]
 
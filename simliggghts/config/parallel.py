@@ -0,0 +1,110 @@
+""" Running LIGGGHTS on several processes (file-io interface)
+
+LIGGGHTS is started through an MPI launcher (e.g. 'mpirun -np 4
+liggghts') and decomposes the box into a grid of processors. Optionally
+the particles are balanced between the processors, once before the run
+('balance') and/or every few steps ('fix balance').
+
+"""
+from collections import namedtuple
+import shlex
+
+# command starting the MPI processes
+DEFAULT_LAUNCHER = "mpirun -np {number_processes}"
+
+# id of the fix balancing the particles during a run
+BALANCE_FIX_ID = "simphony_balance"
+
+# imbalance (maximum over average number of particles per processor)
+# which triggers a balancing and the number of iterations of a balancing
+_BALANCE_THRESHOLD = 1.1
+_BALANCE_ITERATIONS = 10
+
+
+class MpiSettings(namedtuple("MpiSettings",
+                             ["number_processes", "launcher", "processors",
+                              "balance", "balance_every"])):
+    """ Settings of running LIGGGHTS on several processes
+
+    Parameters
+    ----------
+    number_processes : int
+        number of MPI processes
+    launcher : str, optional
+        command starting the processes where '{number_processes}' is
+        replaced (e.g. 'mpiexec -n {number_processes}')
+    processors : tuple of (int or '*'), optional
+        number of processors in each direction (where '*' lets LIGGGHTS
+        choose), i.e. the grid the box is decomposed into
+    balance : bool, optional
+        if true, the particles are balanced between the processors
+        before each run
+    balance_every : int, optional
+        if given, the particles are balanced every balance_every steps
+        during the run
+
+    Raises
+    ------
+    ValueError
+        if the settings are not valid
+
+    """
+    __slots__ = ()
+
+    def __new__(cls, number_processes, launcher=DEFAULT_LAUNCHER,
+                processors=("*", "*", "*"), balance=False,
+                balance_every=None):
+        number_processes = int(number_processes)
+        if number_processes < 1:
+            raise ValueError("number_processes has to be positive")
+
+        processors = tuple(value if value == "*" else int(value)
+                           for value in processors)
+        if len(processors) != 3:
+            raise ValueError(
+                "processors has to be given for each of the 3 directions")
+        if "*" not in processors and \
+                processors[0] * processors[1] * processors[2] != \
+                number_processes:
+            raise ValueError(
+                "grid of processors {} does not match the {} "
+                "processes".format(processors, number_processes))
+
+        if balance_every is not None and balance_every < 1:
+            raise ValueError("balance_every has to be positive")
+
+        return super(MpiSettings, cls).__new__(
+            cls, number_processes, launcher, processors, bool(balance),
+            balance_every)
+
+    def get_launcher_args(self):
+        """ Return arguments starting the processes (before the executable)
+
+        """
+        return shlex.split(self.launcher.format(
+            number_processes=self.number_processes))
+
+    def get_processors_commands(self):
+        """ Return commands setting the grid of processors
+
+        The commands have to be given before the box is created.
+
+        """
+        return "processors {} {} {}\n".format(*self.processors)
+
+    def get_balance_commands(self):
+        """ Return commands balancing the particles (before and during a
+        run)
+
+        """
+        style = "shift xyz {} {!r}".format(_BALANCE_ITERATIONS,
+                                           _BALANCE_THRESHOLD)
+        command_str = ""
+        if self.balance:
+            command_str += "balance {!r} {}\n".format(_BALANCE_THRESHOLD,
+                                                      style)
+        if self.balance_every is not None:
+            command_str += "fix {} all balance {} {!r} {}\n".format(
+                BALANCE_FIX_ID, self.balance_every, _BALANCE_THRESHOLD,
+                style)
+        return command_str
@@ -0,0 +1,399 @@
+from collections import namedtuple
+from functools import partial
+
+from simphony.core.cuba import CUBA
+
+from ..cuba_extension import CUBAExtension
+from .halt import get_halt_cleanup_commands, get_halt_commands
+from .insertion import get_insertion_commands
+from .script_writer import (ScriptWriter, _check_configuration_BC,
+                            _check_configuration_CM, _check_configuration_SP,
+                            _get_body_forces, _get_box_planes, _get_boundary,
+                            _get_fixed_groups, _get_integration,
+                            _get_material_data, _get_mesh_walls,
+                            _get_number_types, _get_pair_style_liggghts,
+                            DEM_DUMMY, READ_DATA, WRITE_DATA)
+
+# block of commands, rendered from the values of 'keys' which are
+# (component, CUBA) pairs (component being "SP", "BC" or "CM")
+_Block = namedtuple("_Block", ["name", "keys", "render"])
+
+
+def _render_pair_style(SP, BC, change_existing, number_types):
+    return _get_pair_style_liggghts(SP) + "pair_coeff      * *\n"
+
+
+def _render_material(SP, BC, change_existing, number_types):
+    return _get_material_data(SP, number_types)
+
+
+def _render_boundary(SP, BC, change_existing, number_types):
+    return _get_boundary(BC, change_existing)
+
+
+def _render_integration(SP, BC, change_existing, number_types):
+    return _get_integration(BC)
+
+
+def _render_box_planes(SP, BC, change_existing, number_types):
+    return _get_box_planes(SP, BC)
+
+
+def _render_mesh_walls(SP, BC, change_existing, number_types):
+    return _get_mesh_walls(BC)
+
+
+def _render_body_forces(SP, BC, change_existing, number_types):
+    return _get_body_forces(BC, number_types)
+
+
+def _render_insertions(SP, BC, change_existing, number_types):
+    return get_insertion_commands(BC.get(CUBAExtension.PARTICLE_INSERTIONS,
+                                         {}))
+
+
+# blocks of the setup of a run (in the order they are issued)
+_SETUP_BLOCKS = [
+    _Block("pair_style",
+           [("SP", CUBAExtension.PAIR_POTENTIALS)],
+           _render_pair_style),
+    _Block("material",
+           [("SP", CUBAExtension.PAIR_POTENTIALS),
+            ("SP", CUBA.YOUNG_MODULUS),
+            ("SP", CUBA.POISSON_RATIO),
+            ("SP", CUBA.RESTITUTION_COEFFICIENT),
+            ("SP", CUBA.FRICTION_COEFFICIENT),
+            ("SP", CUBA.COHESION_ENERGY_DENSITY),
+            ("SP", CUBAExtension.COARSE_GRAINING_FACTOR)],
+           _render_material),
+    _Block("boundary",
+           [("BC", CUBAExtension.BOX_FACES)],
+           _render_boundary),
+    _Block("integration",
+           [("BC", CUBAExtension.FIXED_GROUP)],
+           _render_integration),
+    _Block("box_planes",
+           [("SP", CUBAExtension.BOX_ORIGIN),
+            ("SP", CUBAExtension.BOX_VECTORS),
+            ("BC", CUBAExtension.BOX_FACES)],
+           _render_box_planes),
+    _Block("mesh_walls",
+           [("BC", CUBAExtension.MESH_WALLS)],
+           _render_mesh_walls),
+    _Block("body_forces",
+           [("BC", CUBAExtension.GRAVITY),
+            ("BC", CUBAExtension.BODY_FORCE),
+            ("BC", CUBAExtension.FIXED_GROUP)],
+           _render_body_forces),
+    _Block("insertions",
+           [("BC", CUBAExtension.PARTICLE_INSERTIONS)],
+           _render_insertions)]
+
+
+class ScriptBuilder(object):
+    """ Stateful builder of LIGGGHTS commands
+
+    Unlike the ScriptWriter, the builder keeps track of the configuration
+    (SP, BC and CM) it has seen:
+
+    - a configuration component is only validated if it changed since
+      it was last validated successfully
+    - each block of commands (e.g. the material data) is only rendered
+      if the values it depends on changed
+    - the setup commands for the internal interface are returned as a
+      delta to the commands issued before (see get_setup_commands)
+
+    Parameters
+    ----------
+    atom_style: str
+        atom_style
+    number_types : int, optional
+        number of atom types (default: MAX_NUMBER_TYPES)
+
+    """
+    def __init__(self, atom_style, number_types=None):
+        self._script_writer = ScriptWriter(atom_style)
+        self.number_types = _get_number_types(number_types)
+
+        # map from component name to the (frozen) configuration which
+        # was successfully validated
+        self._validated = {}
+
+        # map from (block name, change_existing) to
+        # (frozen input values, rendered commands)
+        self._rendered = {}
+
+        # list of (block name, commands) which were last issued
+        self._issued = []
+
+        # neighbor settings which were last issued
+        self._issued_neighbor = None
+
+        # ids of the regions which were defined (a region can not be
+        # defined again and the ids are derived from their geometry)
+        self._defined_regions = set()
+
+        # ids of the groups which were defined (only those can be cleared)
+        self._defined_groups = set()
+
+    def reset(self):
+        """ Forget which commands were issued (e.g. if LIGGGHTS restarted)
+
+        """
+        self._issued = []
+        self._issued_neighbor = None
+        self._defined_regions = set()
+        self._defined_groups = set()
+
+    def check_configuration(self, SP, BC, CM):
+        """ Check configuration (only components which changed)
+
+        Raises
+        ------
+        ConfigurationError
+            if anything is wrong with the configuration
+        """
+        checks = [("SP", SP, partial(_check_configuration_SP,
+                                     number_types=self.number_types)),
+                  ("BC", BC, partial(_check_configuration_BC,
+                                     number_types=self.number_types)),
+                  ("CM", CM, _check_configuration_CM)]
+        for name, component, check in checks:
+            frozen = _freeze(component)
+            if name not in self._validated or \
+                    self._validated[name] != frozen:
+                check(component)
+                self._validated[name] = frozen
+
+    def get_setup_commands(self, SP, BC):
+        """ Return setup commands which changed since the last call
+
+        The returned commands start at the first block which differs from
+        the previously issued ones (all following blocks are included, as
+        a later command can override an earlier one). Fixes which are no
+        longer defined are removed. Regions are only defined once. If
+        nothing changed, an empty string is returned.
+
+        Parameters
+        ----------
+        SP : dict
+            container of attributes related to the system parameters
+        BC : dict
+            container of attributes related to the boundary conditions
+
+        """
+        blocks = [(block.name, self._render(block, SP, BC, True))
+                  for block in _SETUP_BLOCKS]
+
+        first_changed = 0
+        for previous, current in zip(self._issued, blocks):
+            if previous != current:
+                break
+            first_changed += 1
+
+        commands = ""
+        if first_changed < len(blocks):
+            removed = _get_fix_ids(self._issued) - _get_fix_ids(blocks)
+            for fix_id in sorted(removed):
+                commands += "unfix {}\n".format(fix_id)
+            for _, block_commands in blocks[first_changed:]:
+                commands += self._skip_defined_regions(block_commands)
+
+        self._issued = blocks
+        return commands
+
+    def _skip_defined_regions(self, commands):
+        """ Return commands without the regions which are already defined
+
+        """
+        lines = []
+        for line in commands.splitlines(True):
+            words = line.split()
+            if len(words) > 1 and words[0] == "region":
+                if words[1] in self._defined_regions:
+                    continue
+                self._defined_regions.add(words[1])
+            lines.append(line)
+        return "".join(lines)
+
+    def get_group_commands(self, BC):
+        """ Return commands defining the groups of particles
+
+        Unlike the setup commands, the groups have to be defined again
+        before each run (as only the atoms which exist when a group is
+        defined belong to it) and before the setup commands which refer
+        to them (e.g. the integration of the 'mobile' group). The groups
+        defined by a previous call are cleared first.
+
+        Parameters
+        ----------
+        BC : dict
+            container of attributes related to the boundary conditions
+
+        """
+        commands = _get_fixed_groups(BC, self.number_types,
+                                     self._defined_groups)
+        for line in commands.splitlines():
+            self._defined_groups.add(line.split()[1])
+        return commands
+
+    def get_halt_commands(self, condition, check_every):
+        """ Return commands stopping the next run once condition holds
+
+        The commands have to be removed after the run (see
+        get_halt_cleanup_commands).
+
+        Parameters
+        ----------
+        condition : HaltCondition
+            condition (see simliggghts.config.halt)
+        check_every : int
+            number of steps between two checks of the condition
+
+        """
+        return self._skip_defined_regions(
+            get_halt_commands(condition, check_every))
+
+    def get_halt_cleanup_commands(self, condition):
+        """ Return commands removing the fix (and computes) of a condition
+
+        """
+        return get_halt_cleanup_commands(condition)
+
+    def get_neighbor_commands(self, settings):
+        """ Return commands applying neighbor settings (if they changed)
+
+        Parameters
+        ----------
+        settings : NeighborSettings
+            neighbor settings (see simliggghts.config.neighbor)
+
+        """
+        if settings == self._issued_neighbor:
+            return ""
+        self._issued_neighbor = settings
+        return settings.get_commands()
+
+    def get_run(self, CM):
+        """ Return run commands
+
+        """
+        return ScriptWriter.get_run(CM)
+
+    def get_script(self, SP, BC, CM, input_data_file, output_data_file,
+                   neighbor=None, halt_condition=None, check_every=None,
+                   mpi=None):
+        """ Return complete command-script (e.g. for the file-io interface)
+
+        Parameters
+        ----------
+        SP : dict
+            container of attributes related to the system parameters
+        BC : dict
+            container of attributes related to the boundary conditions
+        CM : dict
+            container of attributes related to the computational method
+        input_data_file: string
+            name of data file to be read at beginning of run (input)
+        output_data_file: string
+            name of data file to be written after run (output)
+        neighbor : NeighborSettings, optional
+            neighbor settings (otherwise the ones of the initial setup
+            are used)
+        halt_condition : HaltCondition, optional
+            condition stopping the run (checked every check_every steps)
+        check_every : int, optional
+            number of steps between two checks of the halt condition
+        mpi : MpiSettings, optional
+            settings of running liggghts on several processes (grid of
+            processors and balancing)
+
+        Returns
+        -------
+        command script - string
+            lines of a LIGGGHTS command script
+
+        """
+        result = "# Control file generated by SimPhoNy\n"
+        result += "dimension 3\n"
+        if mpi is not None:
+            result += mpi.get_processors_commands()
+        result += _get_boundary(BC, False)
+        result += self._script_writer.get_initial_setup()
+
+        # TODO hard-coding certain values for DEM example
+        result += DEM_DUMMY
+
+        if input_data_file:
+            result += READ_DATA.format(INPUT_DATAFILE=input_data_file)
+
+        # no group is defined yet (liggghts is started for the script)
+        result += _get_fixed_groups(BC, self.number_types)
+
+        # the boundary is already set before the box is created
+        for block in _SETUP_BLOCKS:
+            if block.name != "boundary":
+                result += self._render(block, SP, BC, False)
+
+        if neighbor is not None:
+            result += neighbor.get_commands()
+
+        if mpi is not None:
+            result += mpi.get_balance_commands()
+
+        if halt_condition is not None:
+            result += get_halt_commands(halt_condition, check_every)
+
+        result += self.get_run(CM)
+
+        if output_data_file:
+            result += WRITE_DATA.format(OUTPUT_DATAFILE=output_data_file)
+
+        return result
+
+    def _render(self, block, SP, BC, change_existing):
+        """ Render block (if its input values changed)
+
+        """
+        components = {"SP": SP, "BC": BC}
+        values = tuple(_freeze(components[component].get(key))
+                       for component, key in block.keys)
+
+        key = (block.name, change_existing)
+        cached = self._rendered.get(key)
+        if cached is not None and cached[0] == values:
+            return cached[1]
+
+        commands = block.render(SP, BC, change_existing, self.number_types)
+        self._rendered[key] = (values, commands)
+        return commands
+
+
+def _freeze(value):
+    """ Return hashable and comparable version of a (configuration) value
+
+    """
+    if isinstance(value, dict):
+        return tuple(sorted(((str(key), _freeze(item))
+                             for key, item in value.iteritems()),
+                            key=lambda pair: pair[0]))
+    elif isinstance(value, (list, tuple)):
+        return (type(value).__name__,) + tuple(_freeze(v) for v in value)
+    elif hasattr(value, "tolist"):
+        # e.g. numpy arrays
+        return _freeze(value.tolist())
+    else:
+        return value
+
+
+def _get_fix_ids(blocks):
+    """ Return ids of fixes defined in blocks of commands
+
+    """
+    fix_ids = set()
+    for _, commands in blocks:
+        for line in commands.splitlines():
+            words = line.split()
+            if len(words) > 1 and words[0] == "fix":
+                fix_ids.add(words[1])
+    return fix_ids
@@ -1,3 +1,7 @@
+import os
+
+import numpy
+
 from simphony.core.cuba import CUBA
 
 from .pair_style import PairStyle
@@ -26,11 +30,14 @@ class ScriptWriter(object):
     ----------
     atom_style: str
         atom_style
+    number_types : int, optional
+        number of atom types (default: MAX_NUMBER_TYPES)
 
     """
 
-    def __init__(self, atom_style):
+    def __init__(self, atom_style, number_types=None):
         self._atom_style = atom_style
+        self._number_types = number_types
 
     @staticmethod
     def check_configuration_CM(CM):
@@ -67,34 +74,15 @@ class ScriptWriter(object):
 
         """
 
-        result = "# Control file generated by SimPhoNy\n"
-
-        result += "dimension 3\n"
-
-        result += ScriptWriter.get_boundary(BC)
-
-        result += self.get_initial_setup()
-
-        # TODO hard-coding certain values for DEM example
-        result += DEM_DUMMY
-
-        result += ScriptWriter.get_pair_style(SP)
-
-        if input_data_file:
-            result += READ_DATA.format(INPUT_DATAFILE=input_data_file)
-
-        result += ScriptWriter.get_box_planes(SP)
-
-        result += ScriptWriter.get_fix(CM)
-
-        # result += "dump 1 all custom 100 test.flow id type x y z vx vy"
-
-        result += ScriptWriter.get_run(CM)
-
-        if output_data_file:
-            result += WRITE_DATA.format(OUTPUT_DATAFILE=output_data_file)
-
-        return result
+        # the script is generated using the same blocks of commands
+        # as used for the internal interface
+        from .script_builder import ScriptBuilder
+        builder = ScriptBuilder(self._atom_style, self._number_types)
+        return builder.get_script(SP=SP,
+                                  BC=BC,
+                                  CM=CM,
+                                  input_data_file=input_data_file,
+                                  output_data_file=output_data_file)
 
     @staticmethod
     def get_run(CM):
@@ -152,7 +140,7 @@ class ScriptWriter(object):
 
     @staticmethod
     def get_fixed_groups(BC):
-        """ get liggghts commands to fix particles with specific type
+        """ get liggghts commands defining the groups of (fixed) particles
 
         Parameters:
         ----------
@@ -235,9 +223,16 @@ def _check_configuration_CM(CM):
         raise ConfigurationError(msg)
 
 
-def _check_configuration_SP(SP):
+def _check_configuration_SP(SP, number_types=None):
     """ Check if everything is configured correctly
 
+    Parameters
+    ----------
+    SP : dict
+        container of attributes related to the system parameters
+    number_types : int, optional
+        number of atom types (default: MAX_NUMBER_TYPES)
+
     Raises
     ------
     ConfigurationError
@@ -271,67 +266,33 @@ def _check_configuration_SP(SP):
         raise ConfigurationError(msg)
 
     # Correct format?
-    if type(SP[CUBA.YOUNG_MODULUS]) is not list:
-        msg = "YOUNG_MODULUS must be given as list"
-        raise ConfigurationError(msg)
-    if type(SP[CUBA.POISSON_RATIO]) is not list:
-        msg = "POISSON_RATIO must be given as list"
-        raise ConfigurationError(msg)
-    if type(SP[CUBA.RESTITUTION_COEFFICIENT]) is not list:
-        msg = "RESTITUTION_COEFFICIENT must be given as list"
-        raise ConfigurationError(msg)
-    if type(SP[CUBA.FRICTION_COEFFICIENT]) is not list:
-        msg = "FRICTION_COEFFICIENT must be given as list"
-        raise ConfigurationError(msg)
-    if CUBAExtension.PAIR_POTENTIALS in SP:
-        if "cohesion" in SP[CUBAExtension.PAIR_POTENTIALS]:
-            if type(SP[CUBA.COHESION_ENERGY_DENSITY]) is not list:
-                msg = "COHESION_ENERGY_DENSITY must be given as list"
-                raise ConfigurationError(msg)
-
-    # Each attribute defined for each material?
-    if len(SP[CUBA.YOUNG_MODULUS]) != globals.MAX_NUMBER_TYPES:
-        msg = "Need Youngs modulus for {} materials. ".\
-            format(globals.MAX_NUMBER_TYPES)
-        msg += "Only found {} entry.".format(len(SP[CUBA.YOUNG_MODULUS]))
-        raise ConfigurationError(msg)
-    if len(SP[CUBA.POISSON_RATIO]) != globals.MAX_NUMBER_TYPES:
-        msg = "Need Poisson ratio for {} materials. ".\
-            format(globals.MAX_NUMBER_TYPES)
-        msg += "Only found {} entry.".format(len(SP[CUBA.POISSON_RATIO]))
-        raise ConfigurationError(msg)
-    if len(SP[CUBA.RESTITUTION_COEFFICIENT]) != (globals.MAX_NUMBER_TYPES *
-                                                 globals.MAX_NUMBER_TYPES):
-        msg = "Need restitution coefficient for {} materials. ".\
-            format(globals.MAX_NUMBER_TYPES)
-        msg += "Only found {} entries, but {} are required.".\
-            format(len(SP[CUBA.RESTITUTION_COEFFICIENT]),
-                   globals.MAX_NUMBER_TYPES * globals.MAX_NUMBER_TYPES)
-        raise ConfigurationError(msg)
-    if len(SP[CUBA.FRICTION_COEFFICIENT]) != (globals.MAX_NUMBER_TYPES *
-                                              globals.MAX_NUMBER_TYPES):
-        msg = "Need friction coefficient for {} materials. ".\
-            format(globals.MAX_NUMBER_TYPES)
-        msg += "Only found {} entries, but {} are required.".\
-            format(len(SP[CUBA.FRICTION_COEFFICIENT]),
-                   globals.MAX_NUMBER_TYPES * globals.MAX_NUMBER_TYPES)
-        raise ConfigurationError(msg)
-    if CUBAExtension.PAIR_POTENTIALS in SP:
-        if "cohesion" in SP[CUBAExtension.PAIR_POTENTIALS]:
-            if len(SP[CUBA.COHESION_ENERGY_DENSITY]) !=\
-                (globals.MAX_NUMBER_TYPES *
-                 globals.MAX_NUMBER_TYPES):
-                msg = "Need cohesion energy density for {} materials. ".\
-                    format(globals.MAX_NUMBER_TYPES)
-                msg += "Only found {} entries, but {} are required.".\
-                    format(len(SP[CUBA.COHESION_ENERGY_DENSITY]),
-                           globals.MAX_NUMBER_TYPES * globals.MAX_NUMBER_TYPES)
-                raise ConfigurationError(msg)
-
-
-def _check_configuration_BC(BC):
+    table_keys = [(CUBA.YOUNG_MODULUS, "YOUNG_MODULUS"),
+                  (CUBA.POISSON_RATIO, "POISSON_RATIO"),
+                  (CUBA.RESTITUTION_COEFFICIENT, "RESTITUTION_COEFFICIENT"),
+                  (CUBA.FRICTION_COEFFICIENT, "FRICTION_COEFFICIENT")]
+    if CUBA.COHESION_ENERGY_DENSITY in sp_requirements:
+        table_keys.append(
+            (CUBA.COHESION_ENERGY_DENSITY, "COHESION_ENERGY_DENSITY"))
+    for key, name in table_keys:
+        if not isinstance(SP[key], (list, numpy.ndarray)):
+            msg = "{} must be given as list (or array)".format(name)
+            raise ConfigurationError(msg)
+
+    # Each attribute defined for each material (pair)?
+    from .material_tables import MaterialTables
+    MaterialTables.from_SP(SP, _get_number_types(number_types))
+
+
+def _check_configuration_BC(BC, number_types=None):
     """ Check if everything is configured correctly
 
+    Parameters
+    ----------
+    BC : dict
+        container of attributes related to the boundary conditions
+    number_types : int, optional
+        number of atom types (default: MAX_NUMBER_TYPES)
+
     Raises
     ------
     ConfigurationError
@@ -369,13 +330,40 @@ def _check_configuration_BC(BC):
         msg = "Need boundary condition information for all 3 directions."
         msg += "Only found {} entry.".format(len(BC[CUBAExtension.BOX_FACES]))
         raise ConfigurationError(msg)
-    if len(BC[CUBAExtension.FIXED_GROUP]) != globals.MAX_NUMBER_TYPES:
+    number_types = _get_number_types(number_types)
+    if len(BC[CUBAExtension.FIXED_GROUP]) != number_types:
         msg = "Need information about fixed groups for {} groups. ".\
-            format(globals.MAX_NUMBER_TYPES)
+            format(number_types)
         msg += "Only found {} entry.".\
             format(len(BC[CUBAExtension.FIXED_GROUP]))
         raise ConfigurationError(msg)
 
+    # External body forces (optional)
+    if CUBAExtension.GRAVITY in BC and \
+            numpy.shape(BC[CUBAExtension.GRAVITY]) != (3,):
+        msg = "GRAVITY must be given as vector (of 3 values)"
+        raise ConfigurationError(msg)
+    if CUBAExtension.BODY_FORCE in BC and \
+            numpy.shape(BC[CUBAExtension.BODY_FORCE]) not in [
+                (3,), (number_types, 3)]:
+        msg = "BODY_FORCE must be given as vector (of 3 values) or "
+        msg += "as list of {} vectors (one for each type)".format(
+            number_types)
+        raise ConfigurationError(msg)
+
+    # Mesh walls (optional)
+    if CUBAExtension.MESH_WALLS in BC:
+        if type(BC[CUBAExtension.MESH_WALLS]) is not list:
+            msg = "MESH_WALLS must be given as list"
+            raise ConfigurationError(msg)
+        for wall in BC[CUBAExtension.MESH_WALLS]:
+            _check_mesh_wall(_get_mesh_wall(wall), number_types)
+
+    # Particle insertions (optional)
+    if CUBAExtension.PARTICLE_INSERTIONS in BC:
+        from .insertion import check_insertions
+        check_insertions(BC[CUBAExtension.PARTICLE_INSERTIONS], number_types)
+
 
 def _get_pair_style_liggghts(SP):
     """ get liggghts pair style command from CUBA
@@ -469,7 +457,84 @@ def _get_box_planes(SP, BC):
     return plane_string
 
 
-def _get_material_data(SP):
+def _get_mesh_walls(BC):
+    """ get liggghts commands of the mesh walls
+
+    Each wall of BC[CUBAExtension.MESH_WALLS] is loaded with a
+    'fix mesh/surface' and all of them are used by a single
+    'fix wall/gran' (with the same model as the box planes).
+
+    """
+    walls = [_get_mesh_wall(wall)
+             for wall in BC.get(CUBAExtension.MESH_WALLS, [])]
+    if not walls:
+        return ""
+
+    command_str = ""
+    mesh_ids = []
+    for i, wall in enumerate(walls, 1):
+        mesh_id = "wall_mesh_{}".format(i)
+        mesh_ids.append(mesh_id)
+        command_str += ("fix {} all mesh/surface file {} type {} "
+                        "scale {!r} move {!r} {!r} {!r}\n").format(
+            mesh_id, os.path.abspath(wall["file"]), wall["material_type"],
+            float(wall["scale"]), *(float(value) for value in wall["offset"]))
+    command_str += ("fix wall_mesh all wall/gran model hertz "
+                    "tangential history mesh n_meshes {} meshes {}\n").format(
+        len(mesh_ids), " ".join(mesh_ids))
+    return command_str
+
+
+def _get_mesh_wall(wall):
+    """ Return description of mesh wall (with the defaults filled in)
+
+    A wall is either given by the name of its geometry file or as dict
+    with the keys 'file' and optionally 'material_type' (default 1),
+    'scale' (default 1.0) and 'offset' (default (0.0, 0.0, 0.0)).
+
+    """
+    if isinstance(wall, basestring):
+        wall = {"file": wall}
+    elif not isinstance(wall, dict) or "file" not in wall:
+        raise ConfigurationError(
+            "Mesh wall must be given as file name or as dict with "
+            "'file' (not {!r})".format(wall))
+    description = {"material_type": 1,
+                   "scale": 1.0,
+                   "offset": (0.0, 0.0, 0.0)}
+    description.update(wall)
+    return description
+
+
+def _check_mesh_wall(wall, number_types):
+    """ Check description of mesh wall
+
+    """
+    unknown = set(wall) - set(["file", "material_type", "scale", "offset"])
+    if unknown:
+        raise ConfigurationError(
+            "Unknown mesh wall attributes: {}".format(
+                ", ".join(sorted(unknown))))
+    extension = os.path.splitext(wall["file"])[1].lower()
+    if extension not in (".stl", ".vtk"):
+        raise ConfigurationError(
+            "Mesh wall '{}' has to be a STL or VTK file".format(
+                wall["file"]))
+    if not os.path.isfile(wall["file"]):
+        raise ConfigurationError(
+            "Mesh wall file '{}' does not exist".format(wall["file"]))
+    if not 1 <= wall["material_type"] <= number_types:
+        raise ConfigurationError(
+            "Material type of mesh wall has to be between 1 and {} "
+            "(not {})".format(number_types, wall["material_type"]))
+    if wall["scale"] <= 0.0:
+        raise ConfigurationError("Scale of mesh wall has to be positive")
+    if numpy.shape(wall["offset"]) != (3,):
+        raise ConfigurationError(
+            "Offset of mesh wall must be given as vector (of 3 values)")
+
+
+def _get_material_data(SP, number_types=None):
     """ get liggghts material data command from CUBA
 
     supported data is:
@@ -478,82 +543,120 @@ def _get_material_data(SP):
       - Coefficient of restitution
       - Friction coefficient
       - Cohesion energy density
+      - Coarse-graining factor
 
     """
+    from .material_tables import MaterialTables
+    return MaterialTables.from_SP(
+        SP, _get_number_types(number_types)).get_commands()
 
-    youngs_modulus = SP[CUBA.YOUNG_MODULUS]
-    poisson_ratio = SP[CUBA.POISSON_RATIO]
-    restitution_coeff = SP[CUBA.RESTITUTION_COEFFICIENT]
-    friction_coeff = SP[CUBA.FRICTION_COEFFICIENT]
 
-    if CUBAExtension.PAIR_POTENTIALS in SP:
-        if "cohesion" in SP[CUBAExtension.PAIR_POTENTIALS]:
-            cohe_energ_dens = SP[CUBA.COHESION_ENERGY_DENSITY]
+def _get_fixed_groups(BC, number_types=None, defined_groups=()):
+    """ get liggghts commands defining the groups of particles by type
 
-    youngs_modulus_str = ""
-    for i in range(0, globals.MAX_NUMBER_TYPES):
-        youngs_modulus_str += str(youngs_modulus[i]) + " "
+    Besides group_1, a group is defined for each fixed type (e.g. for fixed
+    walls) and the group 'mobile' of the particles which are not fixed (and
+    integrated, see _get_integration). As a group only contains the atoms
+    which exist when it is defined, the groups are defined again whenever
+    atoms were added. The groups which are already defined (defined_groups)
+    are cleared first (a group which is not defined can not be cleared).
 
-    poisson_ratio_str = ""
-    for i in range(0, globals.MAX_NUMBER_TYPES):
-        poisson_ratio_str += str(poisson_ratio[i]) + " "
+    """
+    fixed_group_list = BC[CUBAExtension.FIXED_GROUP]
+    types = range(1, _get_number_types(number_types)+1)
+    fixed = [i for i in types if fixed_group_list[i-1]]
 
-    restitution_coeff_str = ""
-    for i in range(0, globals.MAX_NUMBER_TYPES*globals.MAX_NUMBER_TYPES):
-        restitution_coeff_str += str(restitution_coeff[i]) + " "
+    command_str = ""
+    for i in sorted(set([1] + fixed)):
+        group_id = "group_%i" % i
+        if group_id in defined_groups:
+            command_str += "group %s clear\n" % group_id
+        command_str += "group %s type %i\n" % (group_id, i)
+
+    if fixed:
+        mobile = [i for i in types if i not in fixed]
+        if "mobile" in defined_groups:
+            command_str += "group mobile clear\n"
+        if mobile:
+            command_str += "group mobile type %s\n" % " ".join(
+                str(i) for i in mobile)
+        elif "mobile" not in defined_groups:
+            # define the (empty) group as it is integrated
+            command_str += "group mobile subtract all all\n"
 
-    friction_coeff_str = ""
-    for i in range(0, globals.MAX_NUMBER_TYPES*globals.MAX_NUMBER_TYPES):
-        friction_coeff_str += str(friction_coeff[i]) + " "
+    return command_str
 
-    if CUBAExtension.PAIR_POTENTIALS in SP:
-        if "cohesion" in SP[CUBAExtension.PAIR_POTENTIALS]:
-            cohe_energ_dens_str = ""
-            for i in range(0,
-                           globals.MAX_NUMBER_TYPES*globals.MAX_NUMBER_TYPES):
-                cohe_energ_dens_str += str(cohe_energ_dens[i]) + " "
-
-    matdata_string = ""
-    matdata_string +=\
-        "fix m1 all property/global youngsModulus peratomtype {}\n".\
-        format(youngs_modulus_str)
-    matdata_string +=\
-        "fix m2 all property/global poissonsRatio peratomtype {}\n".\
-        format(poisson_ratio_str)
-    matdata_string +=\
-        ("fix m3 all property/global" +
-         " coefficientRestitution peratomtypepair {} {}\n").\
-        format(globals.MAX_NUMBER_TYPES, restitution_coeff_str)
-    matdata_string +=\
-        ("fix m4 all property/global " +
-         "coefficientFriction peratomtypepair {} {}\n").\
-        format(globals.MAX_NUMBER_TYPES, friction_coeff_str)
 
-    if CUBAExtension.PAIR_POTENTIALS in SP:
-        if "cohesion" in SP[CUBAExtension.PAIR_POTENTIALS]:
-            matdata_string +=\
-                ("fix m5 all property/global " +
-                 "cohesionEnergyDensity peratomtypepair {} {}\n").\
-                format(globals.MAX_NUMBER_TYPES, cohe_energ_dens_str)
+def _get_integration(BC):
+    """ get liggghts command integrating the particles
+
+    Particles of fixed groups are excluded from the integration (so that
+    they keep their position and velocity).
+
+    """
+    if any(BC.get(CUBAExtension.FIXED_GROUP, [])):
+        return "fix 1 mobile nve\n"
+    return "fix 1 all nve\n"
 
-    return matdata_string
 
+def _get_body_forces(BC, number_types=None):
+    """ get liggghts commands applying the gravity and body forces
 
-def _get_fixed_groups(BC):
-    """ get information about which groups of particles are to be fixed
-        (e.g. for fixed walls)
+    The gravitational acceleration (BC[CUBAExtension.GRAVITY]) and the
+    body forces (BC[CUBAExtension.BODY_FORCE], one force for all or for
+    each type) are applied with a single 'fix addforce' using atom-style
+    variables. Particles of fixed groups are not subjected to them.
 
     """
-    fixed_group_list = BC[CUBAExtension.FIXED_GROUP]
-    command_str = ""
-    for i in range(1, globals.MAX_NUMBER_TYPES+1):
-        if fixed_group_list[i-1]:
-            command_str += "group group_%i type %i\n" % (i, i)
-            command_str += "fix %i group_%i setforce 0.0 0.0 0.0\n" % (i, i)
+    number_types = _get_number_types(number_types)
+    gravity = BC.get(CUBAExtension.GRAVITY)
+    body_force = BC.get(CUBAExtension.BODY_FORCE)
+    if gravity is None and body_force is None:
+        return ""
+
+    # body force of each type
+    if body_force is None:
+        body_force = [(0.0, 0.0, 0.0)] * number_types
+    elif numpy.shape(body_force) == (3,):
+        body_force = [body_force] * number_types
+    body_force = [tuple(float(value) for value in force)
+                  for force in body_force]
+
+    fixed_group_list = BC.get(CUBAExtension.FIXED_GROUP, [])
+    mobile = "".join("*(type!={})".format(i)
+                     for i, fixed in enumerate(fixed_group_list, 1) if fixed)
 
+    command_str = ""
+    for i, name in enumerate(["x", "y", "z"]):
+        terms = []
+        if gravity is not None and gravity[i]:
+            terms.append("mass*({!r})".format(float(gravity[i])))
+        forces = [force[i] for force in body_force]
+        if len(set(forces)) == 1:
+            if forces[0]:
+                terms.append("({!r})".format(forces[0]))
+        else:
+            terms.extend("({!r})*(type=={})".format(force, material_type)
+                         for material_type, force in enumerate(forces, 1)
+                         if force)
+        if terms:
+            expression = "({}){}".format("+".join(terms), mobile)
+        else:
+            expression = "0.0"
+        command_str += "variable bodyforce_{} atom {}\n".format(
+            name, expression)
+    command_str += "fix bodyforce all addforce " + \
+        "v_bodyforce_x v_bodyforce_y v_bodyforce_z\n"
     return command_str
 
 
+def _get_number_types(number_types):
+    """ Return number of atom types (MAX_NUMBER_TYPES if not given)
+
+    """
+    return globals.MAX_NUMBER_TYPES if number_types is None else number_types
+
+
 def _get_ext_forces(self):
     """ set infrastructure for externally applied force treatment
 
@@ -0,0 +1,55 @@
+import unittest
+
+from simliggghts.config.halt import (HaltCondition, get_halt_cleanup_commands,
+                                     get_halt_commands, kinetic_energy_below,
+                                     max_speed_below, region_count)
+
+
+class TestHalt(unittest.TestCase):
+
+    def test_combine_conditions(self):
+        condition = kinetic_energy_below(1e-8) & max_speed_below(1e-3)
+        self.assertEqual(
+            condition.expression,
+            "(c_simphony_ke < 1e-08) && (c_simphony_vmax < 0.001)")
+        self.assertEqual(condition.get_compute_ids(),
+                         ["simphony_ke", "simphony_vmax"])
+
+        # commands of the same compute are only given once
+        condition = kinetic_energy_below(1e-8) | kinetic_energy_below(1e-4)
+        self.assertIn("||", condition.expression)
+        self.assertEqual(condition.commands,
+                         ("compute simphony_ke all ke",))
+
+    def test_region_count(self):
+        bounds = [(0.0, 1.0), (0.0, 1.0), (0.0, 0.5)]
+        condition = region_count(bounds, ">=", 100)
+        self.assertTrue(condition.expression.endswith(">= 100"))
+        self.assertTrue(
+            condition.commands[0].startswith("region halt_region_"))
+        self.assertEqual(region_count(bounds, ">=", 100).commands,
+                         condition.commands)
+
+        with self.assertRaises(ValueError):
+            region_count(bounds, "=>", 100)
+        with self.assertRaises(ValueError):
+            region_count([(0.0, 1.0), (0.0, 1.0)], ">=", 100)
+        with self.assertRaises(ValueError):
+            region_count([(0.0, 1.0), (1.0, 0.0), (0.0, 1.0)], ">=", 100)
+
+    def test_commands(self):
+        condition = HaltCondition("v_a > 1", ["variable a equal step"])
+        self.assertEqual(
+            get_halt_commands(condition, 50),
+            "variable a equal step\n"
+            "variable simphony_halt equal \"v_a > 1\"\n"
+            "fix simphony_halt all halt 50 v_simphony_halt > 0.5 error soft\n")
+        self.assertEqual(get_halt_cleanup_commands(condition),
+                         "unfix simphony_halt\n")
+        self.assertEqual(
+            get_halt_cleanup_commands(max_speed_below(1.0)),
+            "unfix simphony_halt\nuncompute simphony_vmax\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from simliggghts.config.insertion import (check_insertions,
+                                          get_insertion_commands,
+                                          get_region_id, ParticleInsertion)
+from simliggghts.config.script_writer import ConfigurationError
+
+
+class TestParticleInsertion(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        self.face = os.path.join(temp_dir, "face.stl")
+        with open(self.face, "w") as stl_file:
+            stl_file.write("solid face\nendsolid face\n")
+
+        self.region = [(0.0, 1.0), (0.0, 1.0), (0.5, 1.0)]
+
+    def test_pack(self):
+        insertion = ParticleInsertion([0.01, 0.02], 2500.0, 100,
+                                      fractions=[0.3, 0.7],
+                                      region=self.region,
+                                      velocity=(0.0, 0.0, -1.0))
+        self.assertEqual(insertion.mode, "pack")
+        check_insertions({2: insertion}, 2)
+
+        lines = get_insertion_commands({2: insertion}).splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertTrue(lines[0].startswith(
+            "fix ins_pts_2_1 all particletemplate/sphere "))
+        self.assertTrue(lines[0].endswith(
+            "atom_type 2 density constant 2500.0 radius constant 0.01"))
+        self.assertIn(" 2 ins_pts_2_1 0.3 ins_pts_2_2 0.7", lines[2])
+        region_id = get_region_id(insertion.region)
+        self.assertEqual(lines[3], "region {} block 0.0 1.0 0.0 1.0 0.5 1.0 "
+                         "units box".format(region_id))
+        self.assertTrue(lines[4].startswith("fix ins_2 all insert/pack "))
+        self.assertIn("distributiontemplate ins_pdd_2 vel constant "
+                      "0.0 0.0 -1.0 insert_every once", lines[4])
+        self.assertTrue(lines[4].endswith(
+            "particles_in_region 100 region {}".format(region_id)))
+
+        # seeds are distinct primes
+        seeds = [int(lines[i].split()[4]) for i in range(3)]
+        self.assertEqual(len(set(seeds)), 3)
+        for seed in seeds:
+            self.assertTrue(seed > 10000)
+            self.assertTrue(all(seed % d for d in range(2, 200)))
+
+    def test_stream(self):
+        insertion = ParticleInsertion([0.01], 2500.0, 1000, face=self.face,
+                                      rate=100.0)
+        self.assertEqual(insertion.mode, "stream")
+        self.assertEqual(insertion.fractions, (1.0,))
+        check_insertions({1: insertion}, 2)
+
+        lines = get_insertion_commands({1: insertion}).splitlines()
+        self.assertEqual(lines[2], "fix ins_face_1 all mesh/surface file {} "
+                         "type 1".format(self.face))
+        self.assertIn("nparticles 1000 vel constant 0.0 0.0 0.0 "
+                      "particlerate 100.0 overlapcheck", lines[3])
+        self.assertTrue(lines[3].endswith("insertion_face ins_face_1"))
+
+        # nothing is left to be inserted
+        self.assertEqual(
+            get_insertion_commands({1: insertion._replace(number=0)}), "")
+
+    def test_check(self):
+        for insertions in [
+                [ParticleInsertion([0.01], 2500.0, 10, region=self.region)],
+                {3: ParticleInsertion([0.01], 2500.0, 10,
+                                      region=self.region)},
+                {1: ParticleInsertion([0.01], 2500.0, 10)},
+                {1: ParticleInsertion([0.01], 2500.0, 10, region=self.region,
+                                      face=self.face)},
+                {1: ParticleInsertion([0.01, 0.02], 2500.0, 10,
+                                      fractions=[0.5, 0.6],
+                                      region=self.region)},
+                {1: ParticleInsertion([0.01], 2500.0, 10,
+                                      region=[(1.0, 0.0)] * 3)},
+                {1: ParticleInsertion([0.01], 2500.0, 10,
+                                      face=self.face + ".obj")}]:
+            with self.assertRaises(ConfigurationError):
+                check_insertions(insertions, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
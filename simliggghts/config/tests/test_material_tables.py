@@ -0,0 +1,96 @@
+import unittest
+
+import numpy
+
+from simphony.core.cuba import CUBA
+
+from simliggghts.config.material_tables import MaterialTables
+from simliggghts.config.script_writer import (ConfigurationError,
+                                              _check_configuration_SP,
+                                              _get_material_data)
+from simliggghts.cuba_extension import CUBAExtension
+
+
+def _get_SP(number_types):
+    pairs = numpy.add.outer(numpy.arange(number_types),
+                            numpy.arange(number_types)) * 0.01
+    return {CUBA.YOUNG_MODULUS: [2.e4] * number_types,
+            CUBA.POISSON_RATIO: [0.45] * number_types,
+            CUBA.RESTITUTION_COEFFICIENT: 0.5 + pairs,
+            CUBA.FRICTION_COEFFICIENT: pairs.ravel().tolist(),
+            CUBA.COHESION_ENERGY_DENSITY: pairs,
+            CUBAExtension.PAIR_POTENTIALS: ['repulsion', 'cohesion'],
+            CUBAExtension.BOX_ORIGIN: (0.0, 0.0, 0.0),
+            CUBAExtension.BOX_VECTORS: [(10.0, 0.0, 0.0),
+                                        (0.0, 10.0, 0.0),
+                                        (0.0, 0.0, 10.0)]}
+
+
+class TestMaterialTables(unittest.TestCase):
+
+    def test_tables(self):
+        tables = MaterialTables.from_SP(_get_SP(3), 3)
+
+        self.assertEqual(tables.young_modulus.shape, (3,))
+        self.assertEqual(tables.friction_coefficient.shape, (3, 3))
+        self.assertEqual(tables.friction_coefficient[1, 2], 0.03)
+        self.assertEqual(tables.restitution_coefficient[2, 2], 0.54)
+
+    def test_commands(self):
+        commands = MaterialTables(
+            2, [1.0, 2.0], [0.3, 0.4],
+            [0.9, 0.8, 0.8, 0.7], [[0.1, 0.2], [0.2, 0.3]]).get_commands()
+
+        self.assertEqual(
+            commands,
+            "fix m1 all property/global youngsModulus peratomtype "
+            "1.0 2.0 \n"
+            "fix m2 all property/global poissonsRatio peratomtype "
+            "0.3 0.4 \n"
+            "fix m3 all property/global coefficientRestitution "
+            "peratomtypepair 2 0.9 0.8 0.8 0.7 \n"
+            "fix m4 all property/global coefficientFriction "
+            "peratomtypepair 2 0.1 0.2 0.2 0.3 \n")
+
+    def test_coarse_graining(self):
+        SP = _get_SP(3)
+        SP[CUBAExtension.COARSE_GRAINING_FACTOR] = 2.5
+        commands = MaterialTables.from_SP(SP, 3).get_commands()
+        self.assertTrue(commands.endswith("coarsegraining 2.5\n"))
+
+        SP[CUBAExtension.COARSE_GRAINING_FACTOR] = 1
+        self.assertNotIn("coarsegraining",
+                         MaterialTables.from_SP(SP, 3).get_commands())
+
+        SP[CUBAExtension.COARSE_GRAINING_FACTOR] = 0.5
+        with self.assertRaises(ConfigurationError):
+            MaterialTables.from_SP(SP, 3)
+
+    def test_many_types(self):
+        number_types = 50
+        commands = _get_material_data(_get_SP(number_types), number_types)
+
+        for line in commands.splitlines()[2:]:
+            words = line.split()
+            self.assertEqual(words[6], str(number_types))
+            self.assertEqual(len(words), 7 + number_types * number_types)
+
+    def test_wrong_size(self):
+        SP = _get_SP(3)
+        _check_configuration_SP(SP, 3)
+
+        with self.assertRaises(ConfigurationError):
+            _check_configuration_SP(SP, 4)
+
+        SP[CUBA.FRICTION_COEFFICIENT] = SP[CUBA.FRICTION_COEFFICIENT][:-1]
+        with self.assertRaises(ConfigurationError):
+            _check_configuration_SP(SP, 3)
+
+    def test_not_symmetric(self):
+        with self.assertRaises(ConfigurationError):
+            MaterialTables(2, [1.0, 2.0], [0.3, 0.4],
+                           [0.9, 0.8, 0.7, 0.7], [0.1, 0.2, 0.2, 0.3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from simliggghts.config.neighbor import (NeighborSettings,
+                                         get_neighbor_settings, MAX_EVERY)
+
+
+class TestNeighborSettings(unittest.TestCase):
+
+    def test_monodisperse(self):
+        settings = get_neighbor_settings([1.0e-3] * 4,
+                                         [(0.0, 0.0, 0.0)] * 4, 1.0e-5)
+        self.assertAlmostEqual(settings.skin, 0.5e-3)
+        # the default bin size (half of the cutoff) is used
+        self.assertIsNone(settings.bin_size)
+        self.assertEqual(settings.every, MAX_EVERY)
+
+    def test_polydisperse(self):
+        radii = [1.0e-3] * 9 + [1.0e-2]
+        settings = get_neighbor_settings(radii, [(0.0, 0.0, 0.0)] * 10,
+                                         1.0e-5)
+        self.assertAlmostEqual(settings.skin, 0.5e-3)
+        # sized for the median particles (but bounded by the largest)
+        self.assertAlmostEqual(settings.bin_size, 5.1e-3)
+
+    def test_every_depends_on_speed(self):
+        radii = [1.0e-3] * 2
+        slow = get_neighbor_settings(radii, [(0.0, 0.0, 0.0),
+                                             (0.1, 0.0, 0.0)], 1.0e-5)
+        fast = get_neighbor_settings(radii, [(0.0, 0.0, 0.0),
+                                             (0.0, 0.0, -10.0)], 1.0e-5)
+        self.assertEqual(slow.every, MAX_EVERY)
+        self.assertEqual(fast.every, 1)
+
+        # small changes do not change the settings
+        self.assertEqual(
+            get_neighbor_settings([1.0e-3, 1.001e-3],
+                                  [(0.0, 0.0, 0.0), (0.1, 0.0, 0.0)],
+                                  1.0e-5),
+            slow)
+
+    def test_no_particles(self):
+        settings = get_neighbor_settings([], [], 1.0e-5)
+        self.assertEqual(settings.every, 1)
+
+    def test_commands(self):
+        lines = NeighborSettings(5e-4, 2.5e-3, 4).get_commands().splitlines()
+        self.assertEqual(lines, ["neighbor 0.0005 bin",
+                                 "neigh_modify delay 0 every 4 check yes "
+                                 "binsize 0.0025"])
+
+
+if __name__ == '__main__':
+    unittest.main()
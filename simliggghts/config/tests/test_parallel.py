@@ -0,0 +1,45 @@
+import unittest
+
+from simliggghts.config.parallel import MpiSettings
+
+
+class TestMpiSettings(unittest.TestCase):
+
+    def test_launcher(self):
+        self.assertEqual(MpiSettings(4).get_launcher_args(),
+                         ["mpirun", "-np", "4"])
+        self.assertEqual(
+            MpiSettings(2, launcher="mpiexec -n {number_processes} "
+                        "--bind-to core").get_launcher_args(),
+            ["mpiexec", "-n", "2", "--bind-to", "core"])
+
+    def test_processors(self):
+        self.assertEqual(MpiSettings(4).get_processors_commands(),
+                         "processors * * *\n")
+        self.assertEqual(
+            MpiSettings(4, processors=(2, 2, 1)).get_processors_commands(),
+            "processors 2 2 1\n")
+        self.assertEqual(
+            MpiSettings(4, processors=(2, "*", 1)).get_processors_commands(),
+            "processors 2 * 1\n")
+
+        with self.assertRaises(ValueError):
+            MpiSettings(4, processors=(2, 1, 1))
+        with self.assertRaises(ValueError):
+            MpiSettings(4, processors=(2, 2))
+        with self.assertRaises(ValueError):
+            MpiSettings(0)
+
+    def test_balance(self):
+        self.assertEqual(MpiSettings(2).get_balance_commands(), "")
+        self.assertEqual(MpiSettings(2, balance=True).get_balance_commands(),
+                         "balance 1.1 shift xyz 10 1.1\n")
+        self.assertEqual(
+            MpiSettings(2, balance_every=1000).get_balance_commands(),
+            "fix simphony_balance all balance 1000 1.1 shift xyz 10 1.1\n")
+        with self.assertRaises(ValueError):
+            MpiSettings(2, balance_every=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,297 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from simphony.core.cuba import CUBA
+
+from simliggghts.common.atom_style import AtomStyle
+from simliggghts.config.halt import kinetic_energy_below, region_count
+from simliggghts.config.insertion import ParticleInsertion
+from simliggghts.config.neighbor import NeighborSettings
+from simliggghts.config.parallel import MpiSettings
+from simliggghts.config.script_builder import ScriptBuilder
+from simliggghts.config.script_writer import ConfigurationError
+from simliggghts.cuba_extension import CUBAExtension
+
+
+def _get_configuration():
+    SP = {CUBA.YOUNG_MODULUS: [2.e4, 2.e4],
+          CUBA.POISSON_RATIO: [0.45, 0.45],
+          CUBA.RESTITUTION_COEFFICIENT: [0.95, 0.95, 0.95, 0.95],
+          CUBA.FRICTION_COEFFICIENT: [0.0, 0.0, 0.0, 0.0],
+          CUBAExtension.PAIR_POTENTIALS: ['repulsion'],
+          CUBAExtension.BOX_ORIGIN: (0.0, 0.0, 0.0),
+          CUBAExtension.BOX_VECTORS: [(10.0, 0.0, 0.0),
+                                      (0.0, 10.0, 0.0),
+                                      (0.0, 0.0, 10.0)]}
+    BC = {CUBAExtension.BOX_FACES: ["periodic", "periodic", "periodic"],
+          CUBAExtension.FIXED_GROUP: [0, 0]}
+    CM = {CUBA.NUMBER_OF_TIME_STEPS: 10,
+          CUBA.TIME_STEP: 0.003}
+    return SP, BC, CM
+
+
+class TestScriptBuilder(unittest.TestCase):
+
+    def setUp(self):
+        self.builder = ScriptBuilder(AtomStyle.GRANULAR)
+        self.SP, self.BC, self.CM = _get_configuration()
+
+    def test_check_configuration(self):
+        self.builder.check_configuration(self.SP, self.BC, self.CM)
+        self.builder.check_configuration(self.SP, self.BC, self.CM)
+
+        # a changed configuration is checked again
+        del self.CM[CUBA.TIME_STEP]
+        with self.assertRaises(ConfigurationError):
+            self.builder.check_configuration(self.SP, self.BC, self.CM)
+
+        # as well as one which failed before
+        with self.assertRaises(ConfigurationError):
+            self.builder.check_configuration(self.SP, self.BC, self.CM)
+
+        self.SP[CUBA.YOUNG_MODULUS] = (2.e4, 2.e4)
+        self.CM[CUBA.TIME_STEP] = 0.003
+        with self.assertRaises(ConfigurationError):
+            self.builder.check_configuration(self.SP, self.BC, self.CM)
+
+    def test_setup_commands_are_incremental(self):
+        commands = self.builder.get_setup_commands(self.SP, self.BC)
+        self.assertIn("pair_style", commands)
+        self.assertIn("youngsModulus", commands)
+        self.assertIn("fix 1 all nve", commands)
+
+        # nothing changed
+        self.assertEqual(
+            self.builder.get_setup_commands(self.SP, self.BC), "")
+
+        # only the changed block (and the following ones) are returned
+        self.SP[CUBA.POISSON_RATIO] = [0.3, 0.3]
+        commands = self.builder.get_setup_commands(self.SP, self.BC)
+        self.assertNotIn("pair_style", commands)
+        self.assertIn("poissonsRatio peratomtype 0.3 0.3", commands)
+        self.assertIn("fix 1 all nve", commands)
+        self.assertEqual(
+            self.builder.get_setup_commands(self.SP, self.BC), "")
+
+        # after a reset, all commands are returned
+        self.builder.reset()
+        self.assertIn("pair_style",
+                      self.builder.get_setup_commands(self.SP, self.BC))
+
+    def test_removed_fixes(self):
+        self.BC[CUBAExtension.BOX_FACES] = ["fixed", "periodic", "periodic"]
+        commands = self.builder.get_setup_commands(self.SP, self.BC)
+        self.assertIn("fix xwall_low", commands)
+
+        self.BC[CUBAExtension.BOX_FACES] = ["periodic", "periodic",
+                                            "periodic"]
+        commands = self.builder.get_setup_commands(self.SP, self.BC)
+        self.assertIn("unfix xwall_low", commands)
+        self.assertIn("unfix xwall_up", commands)
+        self.assertIn("change_box all boundary p p p", commands)
+
+    def test_insertions(self):
+        insertion = ParticleInsertion([0.01], 2500.0, 10,
+                                      region=[(0.0, 1.0)] * 3)
+        self.BC[CUBAExtension.PARTICLE_INSERTIONS] = {1: insertion}
+        self.builder.check_configuration(self.SP, self.BC, self.CM)
+        commands = self.builder.get_setup_commands(self.SP, self.BC)
+        self.assertIn("region ins_region_", commands)
+        self.assertIn("fix ins_1 all insert/pack", commands)
+
+        # the region is not defined again
+        self.SP[CUBA.POISSON_RATIO] = [0.3, 0.3]
+        commands = self.builder.get_setup_commands(self.SP, self.BC)
+        self.assertIn("fix ins_1 all insert/pack", commands)
+        self.assertNotIn("\nregion ", commands)
+
+        del self.BC[CUBAExtension.PARTICLE_INSERTIONS]
+        commands = self.builder.get_setup_commands(self.SP, self.BC)
+        self.assertIn("unfix ins_1\n", commands)
+        self.assertIn("unfix ins_pts_1_1\n", commands)
+
+    def test_fixed_groups(self):
+        # a group which is not defined yet is not cleared
+        self.assertEqual(self.builder.get_group_commands(self.BC),
+                         "group group_1 type 1\n")
+
+        self.builder.get_setup_commands(self.SP, self.BC)
+        self.BC[CUBAExtension.FIXED_GROUP] = [0, 1]
+        lines = self.builder.get_group_commands(self.BC).splitlines()
+        self.assertEqual(lines, ["group group_1 clear",
+                                 "group group_1 type 1",
+                                 "group group_2 type 2",
+                                 "group mobile type 1"])
+
+        # the next run defines all groups again
+        lines = self.builder.get_group_commands(self.BC).splitlines()
+        self.assertEqual(lines, ["group group_1 clear",
+                                 "group group_1 type 1",
+                                 "group group_2 clear",
+                                 "group group_2 type 2",
+                                 "group mobile clear",
+                                 "group mobile type 1"])
+
+        # fixed particles are not integrated
+        commands = self.builder.get_setup_commands(self.SP, self.BC)
+        self.assertIn("fix 1 mobile nve", commands)
+        self.assertNotIn("setforce", commands)
+
+        # liggghts is started for the script (no group is defined)
+        script = self.builder.get_script(self.SP, self.BC, self.CM,
+                                         input_data_file="in.data",
+                                         output_data_file="out.data")
+        self.assertNotIn(" clear\n", script)
+        self.assertLess(script.index("group mobile type 1"),
+                        script.index("fix 1 mobile nve"))
+
+        # after a reset (e.g. liggghts restarted), nothing is cleared
+        self.builder.reset()
+        self.assertNotIn(" clear\n", self.builder.get_group_commands(self.BC))
+
+    def test_all_groups_fixed(self):
+        self.BC[CUBAExtension.FIXED_GROUP] = [1, 1]
+        self.assertIn("group mobile subtract all all\n",
+                      self.builder.get_group_commands(self.BC))
+        commands = self.builder.get_group_commands(self.BC)
+        self.assertIn("group mobile clear\n", commands)
+        self.assertNotIn("subtract", commands)
+
+    def test_body_forces(self):
+        commands = self.builder.get_setup_commands(self.SP, self.BC)
+        self.assertNotIn("addforce", commands)
+
+        self.BC[CUBAExtension.GRAVITY] = (0.0, -9.81, 0.0)
+        self.BC[CUBAExtension.FIXED_GROUP] = [0, 1]
+        commands = self.builder.get_setup_commands(self.SP, self.BC)
+        lines = commands.splitlines()
+        self.assertIn("variable bodyforce_x atom 0.0", lines)
+        self.assertIn(
+            "variable bodyforce_y atom (mass*(-9.81))*(type!=2)", lines)
+        self.assertIn("fix bodyforce all addforce "
+                      "v_bodyforce_x v_bodyforce_y v_bodyforce_z", lines)
+
+        # body force of each type
+        self.BC[CUBAExtension.FIXED_GROUP] = [0, 0]
+        self.BC[CUBAExtension.BODY_FORCE] = [(1.0, 0.0, 0.0),
+                                             (2.0, 0.0, 0.0)]
+        self.builder.check_configuration(self.SP, self.BC, self.CM)
+        lines = self.builder.get_setup_commands(self.SP, self.BC).splitlines()
+        self.assertIn(
+            "variable bodyforce_x atom ((1.0)*(type==1)+(2.0)*(type==2))",
+            lines)
+
+        del self.BC[CUBAExtension.GRAVITY]
+        del self.BC[CUBAExtension.BODY_FORCE]
+        commands = self.builder.get_setup_commands(self.SP, self.BC)
+        self.assertIn("unfix bodyforce", commands)
+
+        self.BC[CUBAExtension.BODY_FORCE] = [(1.0, 0.0, 0.0)]
+        with self.assertRaises(ConfigurationError):
+            self.builder.check_configuration(self.SP, self.BC, self.CM)
+
+    def test_mesh_walls(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        funnel = os.path.join(temp_dir, "funnel.stl")
+        with open(funnel, "w") as stl_file:
+            stl_file.write("solid funnel\nendsolid funnel\n")
+
+        self.BC[CUBAExtension.MESH_WALLS] = [
+            funnel,
+            {"file": funnel, "material_type": 2, "scale": 0.001,
+             "offset": (0.0, 0.0, 1.0)}]
+        self.builder.check_configuration(self.SP, self.BC, self.CM)
+        lines = self.builder.get_setup_commands(self.SP, self.BC).splitlines()
+        self.assertIn("fix wall_mesh_1 all mesh/surface file {} type 1 "
+                      "scale 1.0 move 0.0 0.0 0.0".format(funnel), lines)
+        self.assertIn("fix wall_mesh_2 all mesh/surface file {} type 2 "
+                      "scale 0.001 move 0.0 0.0 1.0".format(funnel), lines)
+        self.assertIn("fix wall_mesh all wall/gran model hertz tangential "
+                      "history mesh n_meshes 2 meshes wall_mesh_1 "
+                      "wall_mesh_2", lines)
+
+        # the wall is removed before its meshes
+        del self.BC[CUBAExtension.MESH_WALLS]
+        lines = self.builder.get_setup_commands(self.SP, self.BC).splitlines()
+        self.assertEqual(lines[:3], ["unfix wall_mesh", "unfix wall_mesh_1",
+                                     "unfix wall_mesh_2"])
+
+        for walls in [funnel, [os.path.join(temp_dir, "missing.stl")],
+                      [os.path.join(temp_dir, "funnel.obj")],
+                      [{"file": funnel, "material_type": 3}],
+                      [{"file": funnel, "color": "red"}]]:
+            self.BC[CUBAExtension.MESH_WALLS] = walls
+            with self.assertRaises(ConfigurationError):
+                self.builder.check_configuration(self.SP, self.BC, self.CM)
+
+    def test_neighbor_commands(self):
+        settings = NeighborSettings(5e-4, None, 4)
+        self.assertIn("neighbor 0.0005 bin",
+                      self.builder.get_neighbor_commands(settings))
+        self.assertEqual(self.builder.get_neighbor_commands(settings), "")
+        self.assertIn("every 2", self.builder.get_neighbor_commands(
+            NeighborSettings(5e-4, None, 2)))
+
+        script = self.builder.get_script(self.SP, self.BC, self.CM,
+                                         input_data_file="in.data",
+                                         output_data_file="out.data",
+                                         neighbor=settings)
+        self.assertLess(script.index("every 4"), script.index("run 10"))
+
+    def test_halt_commands(self):
+        condition = region_count([(0.0, 1.0)] * 3, ">", 5) & \
+            kinetic_energy_below(1e-8)
+        commands = self.builder.get_halt_commands(condition, 100)
+        self.assertIn("\nregion ", "\n" + commands)
+        self.assertIn("fix simphony_halt all halt 100", commands)
+        # the region is only defined once
+        self.assertNotIn("\nregion ",
+                         "\n" + self.builder.get_halt_commands(condition, 100))
+        self.assertEqual(
+            self.builder.get_halt_cleanup_commands(condition),
+            "unfix simphony_halt\nuncompute simphony_ke\n")
+
+        script = self.builder.get_script(self.SP, self.BC, self.CM,
+                                         input_data_file="in.data",
+                                         output_data_file="out.data",
+                                         halt_condition=condition,
+                                         check_every=10)
+        self.assertLess(script.index("halt 10"), script.index("run 10"))
+
+    def test_mpi_commands(self):
+        script = self.builder.get_script(
+            self.SP, self.BC, self.CM, input_data_file="in.data",
+            output_data_file="out.data",
+            mpi=MpiSettings(4, processors=(2, 2, 1), balance=True))
+        # the grid of processors is set before the box is created
+        self.assertLess(script.index("processors 2 2 1"),
+                        script.index("read_data in.data"))
+        self.assertLess(script.index("read_data in.data"),
+                        script.index("balance 1.1"))
+        self.assertLess(script.index("balance 1.1"), script.index("run 10"))
+
+    def test_get_script(self):
+        script = self.builder.get_script(self.SP, self.BC, self.CM,
+                                         input_data_file="in.data",
+                                         output_data_file="out.data")
+        lines = script.splitlines()
+        self.assertIn("boundary p p p", lines)
+        self.assertNotIn("change_box", script)
+        self.assertLess(script.index("read_data in.data"),
+                        script.index("pair_coeff"))
+        self.assertLess(script.index("run 10"),
+                        script.index("write_data out.data"))
+
+        # the script is complete each time
+        self.assertEqual(
+            self.builder.get_script(self.SP, self.BC, self.CM,
+                                    input_data_file="in.data",
+                                    output_data_file="out.data"),
+            script)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import math
+import unittest
+
+import numpy
+
+from simliggghts.config.time_step import (get_hertz_times,
+                                          get_rayleigh_times,
+                                          get_stable_time_step,
+                                          RAYLEIGH_FRACTION, HERTZ_FRACTION)
+
+
+class TestTimeStep(unittest.TestCase):
+
+    def setUp(self):
+        self.young_modulus = [5.e6, 5.e7]
+        self.poisson_ratio = [0.45, 0.3]
+
+    def test_rayleigh_times(self):
+        times = get_rayleigh_times([1.0e-3, 2.0e-3], [2500.0, 2500.0],
+                                   [5.e6, 5.e6], [0.45, 0.45])
+        shear_modulus = 5.e6 / (2.0 * 1.45)
+        expected = math.pi * 1.0e-3 * math.sqrt(2500.0 / shear_modulus) / \
+            (0.1631 * 0.45 + 0.8766)
+        self.assertAlmostEqual(times[0], expected)
+        # proportional to the radius
+        self.assertAlmostEqual(times[1], 2.0 * expected)
+
+    def test_hertz_times(self):
+        fast, slow = get_hertz_times([1.0e-3] * 2, [2500.0] * 2,
+                                     [5.e6] * 2, [0.45] * 2, 1.0)
+        self.assertAlmostEqual(fast, slow)
+        faster = get_hertz_times([1.0e-3], [2500.0], [5.e6], [0.45], 32.0)
+        self.assertAlmostEqual(faster[0], 0.5 * fast)
+        self.assertTrue(numpy.isinf(
+            get_hertz_times([1.0e-3], [2500.0], [5.e6], [0.45], 0.0)[0]))
+
+    def test_stable_time_step_resting(self):
+        estimate = get_stable_time_step(
+            [1.0e-3, 2.0e-3], [2500.0, 2500.0], [2, 1],
+            [(0.0, 0.0, 0.0)] * 2, self.young_modulus, self.poisson_ratio)
+
+        # smallest particle (of the stiffer material) limits
+        self.assertAlmostEqual(
+            estimate.rayleigh_time,
+            get_rayleigh_times([1.0e-3], [2500.0], [5.e7], [0.3])[0])
+        self.assertTrue(numpy.isinf(estimate.hertz_time))
+        self.assertAlmostEqual(estimate.time_step,
+                               RAYLEIGH_FRACTION * estimate.rayleigh_time)
+
+    def test_stable_time_step_moving(self):
+        estimate = get_stable_time_step(
+            [1.0e-3], [2500.0], [1], [(0.0, 0.0, -1.0e4)],
+            self.young_modulus, self.poisson_ratio)
+        self.assertLess(HERTZ_FRACTION * estimate.hertz_time,
+                        RAYLEIGH_FRACTION * estimate.rayleigh_time)
+        self.assertAlmostEqual(estimate.time_step,
+                               HERTZ_FRACTION * estimate.hertz_time)
+
+    def test_no_particles(self):
+        estimate = get_stable_time_step([], [], [], [], self.young_modulus,
+                                        self.poisson_ratio)
+        self.assertIsNone(estimate.time_step)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+""" Stable time step derived from the particles and their materials
+
+The time step of a DEM simulation has to resolve the propagation of the
+Rayleigh (surface) waves through the particles and the duration of the
+(Hertzian) contacts between colliding particles. Both times are computed
+for all particles at once and the time step is chosen as a fraction of
+the smaller one.
+
+"""
+from collections import namedtuple
+import math
+
+import numpy
+
+# fraction of the Rayleigh time used as time step
+RAYLEIGH_FRACTION = 0.2
+
+# fraction of the Hertz time used as time step
+HERTZ_FRACTION = 0.1
+
+
+class TimeStepEstimate(namedtuple("TimeStepEstimate",
+                                  ["time_step", "rayleigh_time",
+                                   "hertz_time"])):
+    """ Stable time step and the times it is derived from
+
+    Attributes
+    ----------
+    time_step : float
+        largest stable time step (None if there are no particles)
+    rayleigh_time : float
+        smallest Rayleigh time of the particles
+    hertz_time : float
+        smallest Hertz time of the particles (infinite if the particles
+        do not move)
+
+    """
+    __slots__ = ()
+
+
+def get_rayleigh_times(radii, densities, young_modulus, poisson_ratio):
+    """ Returns the Rayleigh time of each particle
+
+    Parameters
+    ----------
+    radii, densities, young_modulus, poisson_ratio : array_like
+        radius, density, Young's modulus and Poisson's ratio of each
+        particle
+
+    """
+    radii, densities, young_modulus, poisson_ratio = _as_arrays(
+        radii, densities, young_modulus, poisson_ratio)
+    shear_modulus = young_modulus / (2.0 * (1.0 + poisson_ratio))
+    return math.pi * radii * numpy.sqrt(densities / shear_modulus) / \
+        (0.1631 * poisson_ratio + 0.8766)
+
+
+def get_hertz_times(radii, densities, young_modulus, poisson_ratio,
+                    speed):
+    """ Returns the Hertz time of each particle
+
+    The duration of a head-on collision of the particle with a particle
+    of the same size and material where both move with speed is used.
+
+    Parameters
+    ----------
+    radii, densities, young_modulus, poisson_ratio : array_like
+        radius, density, Young's modulus and Poisson's ratio of each
+        particle
+    speed : float
+        speed of the particles
+
+    """
+    radii, densities, young_modulus, poisson_ratio = _as_arrays(
+        radii, densities, young_modulus, poisson_ratio)
+    if speed <= 0.0:
+        return numpy.full(len(radii), numpy.inf)
+
+    mass = 4.0 / 3.0 * math.pi * radii ** 3 * densities
+    effective_mass = 0.5 * mass
+    effective_radius = 0.5 * radii
+    effective_modulus = young_modulus / (2.0 * (1.0 - poisson_ratio ** 2))
+    return 2.87 * (effective_mass ** 2 / (
+        effective_radius * effective_modulus ** 2 * 2.0 * speed)) ** 0.2
+
+
+def get_stable_time_step(radii, densities, material_types, velocities,
+                         young_modulus, poisson_ratio):
+    """ Returns the largest stable time step for the particles
+
+    The time step is the smaller of RAYLEIGH_FRACTION of the Rayleigh time
+    and HERTZ_FRACTION of the Hertz time (at the maximum speed) of all
+    particles.
+
+    Parameters
+    ----------
+    radii : array_like
+        radius of each particle
+    densities : array_like
+        density of each particle
+    material_types : array_like
+        material type (starting at 1) of each particle
+    velocities : array_like
+        velocity of each particle (shape (N, 3))
+    young_modulus : sequence of float
+        Young's modulus of each material type
+    poisson_ratio : sequence of float
+        Poisson's ratio of each material type
+
+    Returns
+    -------
+    estimate : TimeStepEstimate
+
+    """
+    radii = numpy.asarray(radii, dtype=numpy.double)
+    if len(radii) == 0:
+        return TimeStepEstimate(None, numpy.inf, numpy.inf)
+
+    types = numpy.asarray(material_types, dtype=numpy.intp) - 1
+    young_modulus = numpy.asarray(young_modulus, dtype=numpy.double)[types]
+    poisson_ratio = numpy.asarray(poisson_ratio, dtype=numpy.double)[types]
+
+    velocities = numpy.asarray(velocities, dtype=numpy.double)
+    speed = numpy.sqrt((velocities ** 2).sum(axis=1)).max()
+
+    rayleigh_time = get_rayleigh_times(
+        radii, densities, young_modulus, poisson_ratio).min()
+    hertz_time = get_hertz_times(
+        radii, densities, young_modulus, poisson_ratio, speed).min()
+
+    time_step = min(RAYLEIGH_FRACTION * rayleigh_time,
+                    HERTZ_FRACTION * hertz_time)
+    return TimeStepEstimate(float(time_step), float(rayleigh_time),
+                            float(hertz_time))
+
+
+def _as_arrays(*values):
+    return [numpy.asarray(value, dtype=numpy.double) for value in values]
@@ -51,6 +51,43 @@ class CUBAExtension(Enum):
     number: 105
     shape: [20]
     type: string
+    - description: Gravitational acceleration
+    domain: [MD]
+    key: GRAVITY
+    name: Gravity
+    number: 106
+    shape: [3]
+    type: double
+    - description: Body force (per particle and material type)
+    domain: [MD]
+    key: BODY_FORCE
+    name: BodyForce
+    number: 107
+    shape: [20, 3]
+    type: double
+    - description: Mesh walls (STL/VTK geometry, material type, scale and
+      offset of each wall)
+    domain: [MD]
+    key: MESH_WALLS
+    name: MeshWalls
+    number: 108
+    shape: [20]
+    type: string
+    - description: Particle insertions by LIGGGHTS (of each material type)
+    domain: [MD]
+    key: PARTICLE_INSERTIONS
+    name: ParticleInsertions
+    number: 109
+    shape: [20]
+    type: string
+    - description: Coarse-graining factor (ratio of the radius of a parcel
+      to the one of the particles it replaces)
+    domain: [MD]
+    key: COARSE_GRAINING_FACTOR
+    name: CoarseGrainingFactor
+    number: 110
+    shape: [1]
+    type: double
 
 """
 
@@ -60,3 +97,8 @@ class CUBAExtension(Enum):
 #    THERMODYNAMIC_ENSEMBLE = "THERMODYNAMIC_ENSEMBLE"
     PAIR_POTENTIALS = "PAIR_POTENTIALS"
     FIXED_GROUP = "FIXED_GROUP"
+    GRAVITY = "GRAVITY"
+    BODY_FORCE = "BODY_FORCE"
+    MESH_WALLS = "MESH_WALLS"
+    PARTICLE_INSERTIONS = "PARTICLE_INSERTIONS"
+    COARSE_GRAINING_FACTOR = "COARSE_GRAINING_FACTOR"
@@ -0,0 +1,117 @@
+from array import array
+
+import numpy
+
+
+class ContainerIndex(object):
+    """ Index of the particles of each particle container
+
+    Instead of a set of uids per container, the index stores for each
+    particle of the cache (by its index in the cache, i.e. in LIGGGHTS)
+    the id of its container and, for each container, the indices of its
+    particles (rows) in the order they are iterated over. The uid to
+    index lookup of the cache serves as hash index, so checking if a
+    particle belongs to a container is an array look-up and the indices
+    of the particles of a container can be used for array operations.
+
+    """
+    def __init__(self):
+        # id of each container (by uname)
+        self._ids = {}
+        self._next_id = 0
+
+        # container id and uid of each index (-1/None if unused)
+        self._container_of = array('i')
+        self._uids = []
+
+        # indices of the particles of each container (by uname)
+        self._rows = {}
+
+    def add_container(self, uname):
+        """ Add (empty) container
+
+        """
+        self._ids[uname] = self._next_id
+        self._next_id += 1
+        self._rows[uname] = array('l')
+
+    def remove_container(self, uname):
+        """ Remove container (and its particles)
+
+        """
+        for index in self._rows.pop(uname):
+            self._container_of[index] = -1
+            self._uids[index] = None
+        del self._ids[uname]
+
+    def clear(self):
+        """ Remove all particles (but keep the containers)
+
+        """
+        self._container_of = array('i')
+        self._uids = []
+        for uname in self._rows:
+            self._rows[uname] = array('l')
+
+    def add(self, uname, index, uid):
+        """ Add particle at index (of the cache) to container
+
+        """
+        missing = index + 1 - len(self._uids)
+        if missing > 0:
+            self._container_of.extend([-1] * missing)
+            self._uids.extend([None] * missing)
+
+        self._container_of[index] = self._ids[uname]
+        self._uids[index] = uid
+        self._rows[uname].append(index)
+
+    def contains(self, uname, index):
+        """ Returns if particle at index belongs to container
+
+        Parameters
+        ----------
+        uname : string
+            non-changing unique name of container
+        index : int or None
+            index of particle (None if it does not exist)
+
+        """
+        return index is not None and index < len(self._container_of) and \
+            self._container_of[index] == self._ids[uname]
+
+    def count(self, uname):
+        """ Returns number of particles of container
+
+        """
+        return len(self._rows[uname])
+
+    def get_rows(self, uname):
+        """ Returns indices of the particles of container (as array)
+
+        """
+        return numpy.frombuffer(self._rows[uname], dtype=numpy.int_).copy()
+
+    def get_uids(self, uname):
+        """ Returns uids of the particles of container (in order)
+
+        """
+        uids = self._uids
+        return [uids[index] for index in self._rows[uname]]
+
+    def reorder(self, uname, order):
+        """ Reorder particles of container
+
+        Parameters
+        ----------
+        uname : string
+            non-changing unique name of container
+        order : sequence of int
+            current position of each particle in the new order
+
+        """
+        order = numpy.asarray(order, dtype=numpy.intp)
+        if len(order) != self.count(uname):
+            raise ValueError("order has to be given for each particle")
+        rows = self.get_rows(uname)[order]
+        self._rows[uname] = array('l', rows.tolist())
@@ -5,7 +5,12 @@ from simphony.core.data_container import DataContainer
 from simphony.cuds.particles import Particle
 
 from ..common import globals
+from ..common.atom_schema import get_schema
+from ..common.derived_quantities import DerivedQuantities
+from ..common.particle_view import ParticleView
+from ..common.spatial_sort import spatial_order
 from ..config.domain import get_box
+from .container_index import ContainerIndex
 from .particle_data_cache import ParticleDataCache
 from ..abc_data_manager import ABCDataManager
 from ..cuba_extension import CUBAExtension
@@ -18,17 +23,75 @@ class LiggghtsInternalDataManager(ABCDataManager):
     The class performs communicating the data to and from LIGGGHTS using the
     internal interface (i.e. LIGGGHTS shared library).
 
+    LIGGGHTS is only started (and the simulation box set up) when the
+    first particle container is added.
+
     Parameters
     ----------
-    liggghts :
-        liggghts python wrapper
+    liggghts_factory : callable
+        returns the liggghts python wrapper (i.e. starts LIGGGHTS)
     atom_style : AtomStyle
            atom_style
+    instrumentation : Instrumentation, optional
+        records statistics of the communication with LIGGGHTS
+    number_types : int, optional
+        number of atom types of the simulation box
+        (default: MAX_NUMBER_TYPES)
+    schema : AtomSchema, optional
+        schema of the per-atom values (default: the one of the atom style)
+    spatial_sort_interval : int, optional
+        if given, the particles are sorted spatially every
+        spatial_sort_interval reads
     """
-    def __init__(self, liggghts, atom_style):
-        super(LiggghtsInternalDataManager, self).__init__()
+    def __init__(self, liggghts_factory, atom_style, instrumentation=None,
+                 number_types=None, schema=None, spatial_sort_interval=None):
+        super(LiggghtsInternalDataManager, self).__init__(
+            instrumentation, spatial_sort_interval)
+
+        self._liggghts_factory = liggghts_factory
+        self._atom_style = atom_style
+        self._number_types = globals.MAX_NUMBER_TYPES \
+            if number_types is None else number_types
+        self._schema = get_schema(atom_style) if schema is None else schema
+
+        # liggghts python wrapper (None until LIGGGHTS is started)
+        self._liggghts = None
+
+        # particles (i.e. their index in the cache) of each container
+        # (in the order they are iterated over)
+        self._index = ContainerIndex()
+
+        # cache of coordinates and point data
+        # (created once LIGGGHTS is started)
+        self._particle_data_cache = None
+
+        # cache of particle containers's data
+        self._pc_data = {}
+        self._pc_data_extension = {}
 
-        self._liggghts = liggghts
+        # derived quantities of each container (discarded when
+        # particles are added or removed)
+        self._derived = {}
+
+        # atom types of the particles which do not move (fixed groups)
+        self._static_types = ()
+
+    @property
+    def liggghts(self):
+        """ liggghts python wrapper
+
+        LIGGGHTS is started if it has not been started yet.
+
+        """
+        if self._liggghts is None:
+            self._start_liggghts()
+        return self._liggghts
+
+    def _start_liggghts(self):
+        """ Start LIGGGHTS and set up an initial simulation box
+
+        """
+        self._liggghts = self._liggghts_factory()
 
         dummy_bc = {CUBAExtension.BOX_FACES: ("periodic",
                                               "periodic",
@@ -42,7 +105,7 @@ class LiggghtsInternalDataManager(ABCDataManager):
                           CUBAExtension.BOX_ORIGIN: (0.0, 0.0, 0.0)}
 
         commands = "dimension 3\n"
-        script_writer = ScriptWriter(atom_style)
+        script_writer = ScriptWriter(self._atom_style)
         commands += script_writer.get_initial_setup()
 
         commands += ScriptWriter.get_boundary(dummy_bc)
@@ -52,20 +115,22 @@ class LiggghtsInternalDataManager(ABCDataManager):
 
         commands += get_box([dummy_box_data], command_format=True)
 
-        commands += "create_box {} box\n".format(globals.MAX_NUMBER_TYPES)
+        commands += "create_box {} box\n".format(self._number_types)
 
         for command in commands.splitlines():
             self._liggghts.command(command)
 
-        # map from uname of Particles to Set of (particle) uids
-        self._particles = {}
+        self._particle_data_cache = self._create_cache()
 
-        # cache of coordinates and point data
-        self._particle_data_cache = ParticleDataCache(liggghts=self._liggghts)
+    def _create_cache(self):
+        """ Returns new (empty) particle data cache
 
-        # cache of particle containers's data
-        self._pc_data = {}
-        self._pc_data_extension = {}
+        """
+        cache = ParticleDataCache(
+            liggghts=self._liggghts, instrumentation=self._instrumentation,
+            number_types=self._number_types, schema=self._schema)
+        cache.set_static_types(self._static_types)
+        return cache
 
     def get_data(self, uname):
         """Returns data container associated with particle container
@@ -87,6 +152,13 @@ class LiggghtsInternalDataManager(ABCDataManager):
             non-changing unique name of particles
 
         """
+        material_type = data.get(CUBA.MATERIAL_TYPE)
+        if material_type is not None and \
+                material_type != self._pc_data[uname].get(CUBA.MATERIAL_TYPE):
+            # particles without their own type take the container's type
+            cache = self._particle_data_cache
+            cache.set_default_types(self._index.get_rows(uname).tolist(),
+                                    material_type)
 
         self._pc_data[uname] = DataContainer(data)
 
@@ -102,6 +174,29 @@ class LiggghtsInternalDataManager(ABCDataManager):
 
         return dict(self._pc_data_extension[uname])
 
+    def get_data_snapshot(self, uname):
+        """Returns read-only snapshot of the data of a particle container
+
+        Parameters
+        ----------
+        uname : string
+            non-changing unique name of particles
+
+        """
+        return self._data_snapshots.get(uname, self._pc_data[uname])
+
+    def get_data_extension_snapshot(self, uname):
+        """Returns read-only snapshot of the data extension of a container
+
+        Parameters
+        ----------
+        uname : string
+            non-changing unique name of particles
+
+        """
+        return self._data_extension_snapshots.get(
+            uname, self._pc_data_extension[uname])
+
     def set_data_extension(self, data, uname):
         """Sets data container extension associated with particle container
 
@@ -123,14 +218,12 @@ class LiggghtsInternalDataManager(ABCDataManager):
             non-changing unique name of particles
 
         """
-        uids_to_be_deleted = [uid for uid in self._particles[uname]]
-
-        for uid in uids_to_be_deleted:
-            self.remove_particle(uid, uname)
+        self._remove_atoms(self._index.get_uids(uname), uname)
 
+        self._index.remove_container(uname)
         del self._pc_data[uname]
         del self._pc_data_extension[uname]
-        del self._particles[uname]
+        self._derived.pop(uname, None)
 
     def _handle_new_particles(self, uname, particles):
         """Add new particle container to this manager.
@@ -144,7 +237,10 @@ class LiggghtsInternalDataManager(ABCDataManager):
 
         """
 
-        self._particles[uname] = set()
+        if self._liggghts is None:
+            self._start_liggghts()
+
+        self._index.add_container(uname)
 
         self._pc_data[uname] = DataContainer(particles.data)
 
@@ -185,16 +281,9 @@ class LiggghtsInternalDataManager(ABCDataManager):
             name of particle container
 
         """
-        if uid in self._particles[uname]:
+        if self.has_particle(uid, uname):
             coordinates = self._particle_data_cache.get_coordinates(uid)
             data = self._particle_data_cache.get_particle_data(uid)
-
-            # TODO removing type from data as it not kept as a per-particle
-            # data but currently it is on the container.
-            # In liggghts it is only stored as a per-atom based attribute.
-            # This should be changed once #9 issue is addressed
-            del data[CUBA.MATERIAL_TYPE]
-
             p = Particle(uid=uid,
                          coordinates=coordinates,
                          data=data)
@@ -207,8 +296,21 @@ class LiggghtsInternalDataManager(ABCDataManager):
 
         """
         for particle in iterable:
-            if particle.uid in self._particles[uname]:
-                self._set_particle(particle, uname)
+            if self.has_particle(particle.uid, uname):
+                if isinstance(particle, ParticleView) and \
+                        particle.is_view_of(self._particle_data_cache):
+                    # only the changes of the view need to be written
+                    particle.write_back()
+                    # (a view with replaced data might have removed the
+                    # type of the particle)
+                    self._particle_data_cache.set_default_types(
+                        [self._particle_data_cache.index_of(particle.uid)],
+                        self._pc_data[uname][CUBA.MATERIAL_TYPE])
+                else:
+                    if isinstance(particle, ParticleView):
+                        # outdated view (its particle was moved)
+                        particle.relocate()
+                    self._set_particle(particle, uname)
             else:
                 raise ValueError(
                     "particle id ({}) was not found".format(particle.uid))
@@ -230,31 +332,9 @@ class LiggghtsInternalDataManager(ABCDataManager):
             non-changing unique name of particles
 
         """
-
-        # remove the deleted id from our book keeping
-        self._particles[uname].remove(deleted_uid)
-
-        # Make a local copy of ALL the particles EXCEPT for the deleted one
-        saved_particles = {}
-        for uname in self._particles:
-            saved_particles[uname] = {}
-            for uid in self._particles[uname]:
-                coordinates = self._particle_data_cache.get_coordinates(uid)
-                data = self._particle_data_cache.get_particle_data(uid)
-
-                p = Particle(uid=uid,
-                             coordinates=coordinates,
-                             data=data)
-                saved_particles[uname][uid] = p
-
-        self._liggghts.command("delete_atoms group all compress yes")
-
-        # Use the new cache
-        self._particle_data_cache = ParticleDataCache(liggghts=self._liggghts)
-
-        # re-add the saved atoms
-        for uname in saved_particles:
-            self._add_atoms(saved_particles[uname].values(), uname, safe=True)
+        if not self.has_particle(deleted_uid, uname):
+            raise KeyError("uid ({}) was not found".format(deleted_uid))
+        self._remove_atoms([deleted_uid], uname)
 
     def has_particle(self, uid, uname):
         """Has particle
@@ -267,7 +347,11 @@ class LiggghtsInternalDataManager(ABCDataManager):
             non-changing unique name of particles
 
         """
-        return uid in self._particles[uname]
+        try:
+            index = self._particle_data_cache.index_of(uid)
+        except KeyError:
+            return False
+        return self._index.contains(uname, index)
 
     def iter_particles(self, uname, uids=None):
         """Iterate over the particles of a certain type
@@ -285,9 +369,125 @@ class LiggghtsInternalDataManager(ABCDataManager):
             for uid in uids:
                 yield self.get_particle(uid, uname)
         else:
-            for uid in self._particles[uname]:
+            for uid in self._index.get_uids(uname):
                 yield self.get_particle(uid, uname)
 
+    def iter_particle_views(self, uname, uids=None):
+        """Iterate over lightweight views of the particles of a certain type
+
+        Parameters
+        ----------
+        uids : list of particle uids
+            sequence of uids of particles that should be iterated over. If
+            uids is None then all particles will be iterated over.
+        uname : string
+            non-changing unique name of particles
+
+        """
+        cache = self._particle_data_cache
+        if uids:
+            for uid in uids:
+                if not self.has_particle(uid, uname):
+                    raise KeyError("uid ({}) was not found".format(uid))
+                yield ParticleView(cache, cache.index_of(uid), uid)
+        else:
+            uids = self._index.get_uids(uname)
+            for uid, index in zip(uids, self._index.get_rows(uname)):
+                yield ParticleView(cache, int(index), uid)
+
+    def register_atom_field(self, field):
+        """Register an additional per-atom value (e.g. of a fix property/atom)
+
+        Parameters
+        ----------
+        field : AtomField
+            field to be registered
+
+        """
+        self._schema.register(field)
+        if self._particle_data_cache is not None:
+            self._particle_data_cache.add_field(field)
+
+    def get_derived_quantities(self, uname):
+        """Returns quantities derived from the radius and density of particles
+
+        Parameters
+        ----------
+        uname : string
+            non-changing unique name of particles
+
+        """
+        derived = self._derived.get(uname)
+        if derived is None:
+            derived = DerivedQuantities(self._particle_data_cache,
+                                        self._index.get_uids(uname))
+            self._derived[uname] = derived
+        return derived
+
+    def set_values(self, uname, cuba, values, uids=None):
+        """Set a value of several particles at once
+
+        The values are written into the cache at once (and sent to
+        LIGGGHTS with one copy per value when flushed).
+
+        Parameters
+        ----------
+        uname : string
+            non-changing unique name of particles
+        cuba : CUBA
+            CUBA key of value
+        values : array_like
+            values of the particles
+        uids : sequence of uids, optional
+            uids of the particles (default: all, in iteration order)
+
+        """
+        if uids is None:
+            indices = self._index.get_rows(uname)
+        else:
+            indices = []
+            for uid in uids:
+                if not self.has_particle(uid, uname):
+                    raise KeyError("uid ({}) was not found".format(uid))
+                indices.append(self._particle_data_cache.index_of(uid))
+
+        self._particle_data_cache.set_array(cuba, indices, values)
+
+    def get_all_values(self, cuba):
+        """Returns a value of all particles (of all containers) as array
+
+        Parameters
+        ----------
+        cuba : CUBA
+            CUBA key of value
+
+        """
+        return self._particle_data_cache.get_array(cuba)
+
+    def get_all_types(self):
+        """Returns the material type of all particles (of all containers)
+
+        """
+        return self._particle_data_cache.get_types()
+
+    def sort_spatially(self, uname):
+        """Order the particles of a container along a Morton curve
+
+        Only the order in which the particles are iterated over is changed
+        as the cache has to keep the order of the atoms in LIGGGHTS (which
+        e.g. the contact history of the atoms refers to).
+
+        Parameters
+        ----------
+        uname : string
+            non-changing unique name of particles
+
+        """
+        coordinates = self._particle_data_cache.get_coordinates_array()[
+            self._index.get_rows(uname)]
+        self._index.reorder(uname, spatial_order(coordinates))
+        self._derived.pop(uname, None)
+
     def number_of_particles(self, uname):
         """Get number of particles in a container
 
@@ -297,26 +497,27 @@ class LiggghtsInternalDataManager(ABCDataManager):
             non-changing unique name of particles
 
         """
-        return len(self._particles[uname])
+        return self._index.count(uname)
 
     def read(self):
         """read latest state
 
         """
-        self._update_from_liggghts()
+        with self._instrumentation.phase("read"):
+            self._add_inserted_atoms()
+            self._update_from_liggghts()
+
+        self._sort_periodically()
 
     def flush(self):
         """flush state
 
         """
         if self._pc_data:
-            # update particles (container)'s data
-            # (updating only MASS at the moment as MATERIAL_TYPE is sent as a
-            # particle-based attribute to LIGGGHTS even though in SimPhoNy its
-            # a container-based attribute)
-
-            # update the particle-data
-            self._particle_data_cache.send()
+            # update the particle-data (the type of each particle, i.e.
+            # its own or its container's type, is sent as a per-atom value)
+            with self._instrumentation.phase("flush"):
+                self._particle_data_cache.send()
 
         else:
             raise RuntimeError(
@@ -325,14 +526,35 @@ class LiggghtsInternalDataManager(ABCDataManager):
         # or when some of them do not contain any particles
         # (i.e. someone has deleted all the particles)
 
+    def set_static_types(self, material_types):
+        """ Set the atom types of the particles which do not move
+
+        The particles of these types (i.e. of fixed groups) are only sent
+        to LIGGGHTS if they changed and are not retrieved.
+
+        Parameters
+        ----------
+        material_types : sequence of int
+            atom types of the static particles
+
+        """
+        self._static_types = tuple(material_types)
+        if self._particle_data_cache is not None:
+            self._particle_data_cache.set_static_types(self._static_types)
+
     def flush_radius(self):
-        """flush radius state
+        """flush radius state (and atom types if they changed)
+
+        The radius is required for the cutoff distances and the atom types
+        for groups (e.g. of fixed particles) which are defined by type.
 
         """
         if self._pc_data:
 
             # update the particle-data
-            self._particle_data_cache.send_radius()
+            with self._instrumentation.phase("flush_radius"):
+                self._particle_data_cache.send_radius()
+                self._particle_data_cache.send_types()
         else:
             raise RuntimeError(
                 "No particles.  Liggghts cannot run without a particle")
@@ -340,6 +562,68 @@ class LiggghtsInternalDataManager(ABCDataManager):
     def _update_from_liggghts(self):
         self._particle_data_cache.retrieve()
 
+    def _add_inserted_atoms(self):
+        """ Add the atoms which liggghts inserted during the run
+
+        The new atoms (which liggghts appends) are added to the cache and
+        to the container of their type (see set_insertion_target).
+
+        """
+        cache = self._particle_data_cache
+        uids = cache.add_atoms(self._liggghts.extract_global("nlocal", 0))
+        if not uids:
+            return
+
+        by_type = {}
+        for uid in uids:
+            index = cache.index_of(uid)
+            by_type.setdefault(cache.get_type_at(index), []).append(
+                (index, uid))
+
+        for material_type, atoms in by_type.iteritems():
+            uname = self._get_insertion_target(material_type, len(atoms))
+            for index, uid in atoms:
+                self._index.add(uname, index, uid)
+            self._derived.pop(uname, None)
+
+    def _remove_atoms(self, uids, uname):
+        """ Remove particles (atoms) of a container
+
+        All atoms are deleted in LIGGGHTS and the remaining particles are
+        added again (in the order they are iterated over).
+
+        Parameters
+        ----------
+        uids : sequence of UUID
+            uids of particles to be removed
+        uname : str
+            non-changing unique name of particle container
+
+        """
+        removed = set(uids)
+
+        # Make a local copy of ALL the particles EXCEPT for the deleted ones
+        saved_particles = {}
+        cache = self._particle_data_cache
+        for other_uname in self._pc_data:
+            saved_particles[other_uname] = [
+                Particle(uid=uid,
+                         coordinates=cache.get_coordinates(uid),
+                         data=cache.get_particle_data(uid))
+                for uid in self._index.get_uids(other_uname)
+                if other_uname != uname or uid not in removed]
+
+        self._liggghts.command("delete_atoms group all compress yes")
+
+        # Use the new cache
+        self._particle_data_cache = self._create_cache()
+        self._index.clear()
+        self._derived = {}
+
+        # re-add the saved atoms
+        for other_uname, particles in saved_particles.iteritems():
+            self._add_atoms(particles, other_uname, safe=True)
+
     def _set_particle(self, particle, uname):
         """ Set coordinates and data for a particle
 
@@ -351,33 +635,27 @@ class LiggghtsInternalDataManager(ABCDataManager):
             non-changing unique name of particle container
 
         """
-        # TODO using type from container.  in liggghts it is only
-        # stored as a per-atom based attribute.
-        # this should be changed once #9 issue is addressed
-        p_type = self._pc_data[uname][CUBA.MATERIAL_TYPE]
-        data = DataContainer(particle.data)
-        data[CUBA.MATERIAL_TYPE] = p_type
-
-        # Update of mass, since this value is related to density
-        data[CUBA.MASS] = data[CUBA.RADIUS] * data[CUBA.RADIUS] *\
-            data[CUBA.RADIUS] *\
-            4.0 / 3.0 * 3.141592654 * data[CUBA.DENSITY]
-
-        self._particle_data_cache.set_particle(particle.coordinates,
-                                               data,
-                                               particle.uid)
+        # the type of the container is used unless the particle has its
+        # own CUBA.MATERIAL_TYPE
+        self._particle_data_cache.set_particle(
+            particle.coordinates,
+            particle.data,
+            particle.uid,
+            default_type=self._pc_data[uname][CUBA.MATERIAL_TYPE])
 
     def _add_atoms(self, iterable, uname, safe=False):
         """ Add multiple particles as atoms to liggghts
 
         The number of atoms to be added are randomly added somewhere
         in the simulation box by LIGGGHTS and then their positions (and
-        other values are corrected/updated)
+        other values are corrected/updated). All atoms are created with
+        one command (using the type of the container); the type of each
+        particle is sent to LIGGGHTS with the other values.
 
         Parameters
         ----------
         iterable : iterable of Particle objects
-            particle with CUBA.MATERIAL_TYPE
+            particles (optionally with their own CUBA.MATERIAL_TYPE)
 
         uname : str
             non-changing unique name of particle container
@@ -400,16 +678,23 @@ class LiggghtsInternalDataManager(ABCDataManager):
             if particle.uid is None:
                 particle.uid = uuid.uuid4()
 
-            if not safe and particle.uid in self._particles[uname]:
+            exists = self.has_particle(particle.uid, uname)
+            if not safe and exists:
                 raise ValueError(
                     "particle with same uid ({}) already exists".format(
                         particle.uid))
 
-            self._particles[uname].add(particle.uid)
             self._set_particle(particle, uname)
+            if not exists:
+                self._index.add(uname,
+                                self._particle_data_cache.index_of(
+                                    particle.uid),
+                                particle.uid)
 
             uids.append(particle.uid)
 
+        self._derived.pop(uname, None)
+
         # create atoms in liggghts
         self._liggghts.command(
             "create_atoms {} random {} 42 NULL".format(p_type, len(uids)))
@@ -1,15 +1,16 @@
-from collections import namedtuple
+from array import array
+from itertools import izip
+import uuid
 
 import ctypes
 
+import numpy
+
 from simphony.core.cuba import CUBA
 from simphony.core.data_container import DataContainer
 
-# name is liggghts'name (e.g. "x")
-# type = 0 = int or 1 = double
-# count = # of per-atom values, 1 or 3, etc
-_LiggghtsData = namedtuple(
-    '_LiggghtsData', ['CUBA', 'liggghts_name', "type", "count"])
+from ..common.atom_schema import get_schema
+from ..common.atom_style import AtomStyle
 
 
 class ParticleDataCache(object):
@@ -19,147 +20,228 @@ class ParticleDataCache(object):
     in order to retrieve this data from LIGGGHTS and send this
     data to LIGGGHTS.
 
+    Which values are stored (and under which name they are found in
+    LIGGGHTS) is defined by the schema of the atom style (see AtomSchema).
+    The values of each field are stored in a typed array (with 'count'
+    values per particle). Required fields have to be provided by each
+    particle. The other fields are only part of the data of the particles
+    (and only exchanged with LIGGGHTS) once a particle provides a value;
+    particles without a value then have the default value of the field.
+
+    The atom type (CUBA.MATERIAL_TYPE) of each particle is stored in an
+    int array. A particle only has CUBA.MATERIAL_TYPE in its data if it was
+    given one; otherwise the type is the default type passed when the
+    particle is set (i.e. the type of its container). As LIGGGHTS does not
+    change the types, they are not retrieved and only sent when changed.
+
+    Particles of static types (i.e. of fixed groups, which LIGGGHTS does
+    not integrate) are not retrieved and are only sent if one of them
+    changed (or was added); otherwise only the runs of consecutive
+    non-static particles are exchanged.
+
     Parameters
     ----------
     liggghts :
         liggghts python wrapper
+    instrumentation : Instrumentation, optional
+        records the number of transferred bytes and particles
+    number_types : int, optional
+        number of atom types (if given, types are checked when set)
+    schema : AtomSchema, optional
+        schema of the per-atom values (default: granular atom style)
 
     """
-    def __init__(self, liggghts):
+    def __init__(self, liggghts, instrumentation=None, number_types=None,
+                 schema=None):
         self._liggghts = liggghts
+        self._instrumentation = instrumentation
+        self._number_types = number_types
+
+        if schema is None:
+            schema = get_schema(AtomStyle.GRANULAR)
 
-        # TODO this should be based on what atom-style we are using
-        # and configured by the user of this class (instead of
-        # hard coded here)
-        self._data_entries = [_LiggghtsData(CUBA=CUBA.VELOCITY,
-                                            liggghts_name="v",
-                                            type=3,  # array of doubles
-                                            count=3),
-                              _LiggghtsData(CUBA=CUBA.ANGULAR_VELOCITY,
-                                            liggghts_name="omega",
-                                            type=3,  # array of doubles
-                                            count=3),
-                              _LiggghtsData(CUBA=CUBA.DENSITY,
-                                            liggghts_name="density",
-                                            type=2,  # vector of doubles
-                                            count=1),
-                              _LiggghtsData(CUBA=CUBA.RADIUS,
-                                            liggghts_name="radius",
-                                            type=2,  # vector of doubles
-                                            count=1),
-                              _LiggghtsData(CUBA=CUBA.MATERIAL_TYPE,
-                                            liggghts_name="type",
-                                            type=0,  # int
-                                            count=1),
-                              _LiggghtsData(CUBA=CUBA.EXTERNAL_APPLIED_FORCE,
-                                            liggghts_name="df",
-                                            type=1,  # per-atom
-                                            count=3)]  # array
         # map from uid to index in liggghts arrays
         self._index_of_uid = {}
 
+        # cache of coordinates
+        self._coordinates = array('d')
+
+        # fields of the schema (besides the type which is stored
+        # separately) and the ones which are used (i.e. exchanged)
+        self._fields = []
+        self._field_of_cuba = {}
+        self._used_fields = []
+        self._used_cuba = set()
+
+        # CUBA keys of the data of a particle (view) without and with
+        # an explicitly given type
+        self._view_keys = ()
+        self._view_keys_with_type = (CUBA.MATERIAL_TYPE,)
+
         # cache of particle-related data (stored by CUBA keyword)
         self._cache = {}
 
-        # cache of coordinates
-        self._coordinates = []
+        # version of each field (incremented whenever a value changes)
+        self._versions = {}
+
+        for field in schema.fields:
+            if field.cuba != CUBA.MATERIAL_TYPE:
+                self.add_field(field)
+
+        # atom type of each particle and if it was given explicitly
+        # (i.e. if it is part of the data of the particle)
+        self._types = array('i')
+        self._explicit_types = bytearray()
+
+        # if the types have to be sent to liggghts
+        self._types_changed = False
 
-        for entry in self._data_entries:
-            self._cache[entry.CUBA] = []
+        # atom types of static particles, if a static particle has to be
+        # sent to liggghts and the (start, stop) runs of non-static
+        # particles (None if they have to be determined again)
+        self._static_types = frozenset()
+        self._static_changed = False
+        self._mobile_runs = None
+
+    def add_field(self, field):
+        """ Add a field (e.g. which was registered at runtime)
+
+        Particles which are already stored get the default value.
+
+        Parameters
+        ----------
+        field : AtomField
+            field to be added
+        """
+        self._fields.append(field)
+        self._field_of_cuba[field.cuba] = field
+        self._cache[field.cuba] = array(
+            field.typecode,
+            [field.default] * (field.count * len(self._index_of_uid)))
+        self._versions[field.cuba] = 0
+        if field.required:
+            self._use(field)
 
     def retrieve(self):
         """ Retrieve all data from liggghts
 
         """
         natom = self._liggghts.extract_global("nlocal", 0)
+        runs = self._get_mobile_runs(natom)
         pos = self._liggghts.extract_atom("x", 3)
-        k = 0
-        for i in range(0, natom):
-            for j in range(0, 3):
-                self._coordinates[k] = pos[i][j]
-                k += 1
-
-        for entry in self._data_entries:
-            if entry.CUBA is CUBA.EXTERNAL_APPLIED_FORCE:
-                df_retrieve = self._liggghts.extract_fix(
-                                    entry.liggghts_name, 1, 2)
-
-                k = 0
-                for i in range(0, natom):
-                    for j in range(0, 3):
-                        self._cache[entry.CUBA][k] = df_retrieve[i][j]
-                        k += 1
-            elif entry.count > 1:
-                extract_prop = \
-                    self._liggghts.extract_atom(
-                                    entry.liggghts_name, entry.type)
-                k = 0
-                for i in range(0, natom):
-                    for j in range(0, entry.count):
-                        self._cache[entry.CUBA][k] = extract_prop[i][j]
-                        k += 1
-            else:
-                extract_prop =\
-                    self._liggghts.extract_atom(
-                                    entry.liggghts_name, entry.type)
-                k = 0
-                for i in range(0, natom):
-                    self._cache[entry.CUBA][k] = extract_prop[i]
-                    k += 1
+        _copy_from_liggghts(pos, self._coordinates, 3, natom, runs)
+
+        for field in self._used_fields:
+            _copy_from_liggghts(self._extract(field), self._cache[field.cuba],
+                                field.count, natom, runs)
+            self._versions[field.cuba] += 1
+
+        self._record_transfer(_count(runs, natom), self._get_bytes_per_atom())
 
     def send(self):
         """ Send data to liggghts
 
         """
         natom = self._liggghts.extract_global("nlocal", 0)
+        runs = None if self._static_changed else self._get_mobile_runs(natom)
 
         pos = self._liggghts.extract_atom("x", 3)
-        k = 0
-        for i in range(0, natom):
-            for j in range(0, 3):
-                pos[i][j] = self._coordinates[k]
-                k += 1
-
-        for entry in self._data_entries:
-            values = self._cache[entry.CUBA]
-            if entry.CUBA is CUBA.EXTERNAL_APPLIED_FORCE:
-                df_ext = self._liggghts.extract_fix(
-                                    entry.liggghts_name, 1, 2)
-
-                k = 0
-                for i in range(0, natom):
-                    for j in range(0, 3):
-                        df_ext[i][j] = values[k]
-                        k += 1
-            elif entry.count > 1:
-                extract_prop =\
-                    self._liggghts.extract_atom(
-                                    entry.liggghts_name, entry.type)
-                k = 0
-                for i in range(0, natom):
-                    for j in range(0, entry.count):
-                        extract_prop[i][j] = values[k]
-                        k += 1
-            else:
-                extract_prop =\
-                    self._liggghts.extract_atom(
-                                    entry.liggghts_name, entry.type)
-                k = 0
-                for i in range(0, natom):
-                    extract_prop[i] = values[k]
-                    k += 1
+        _copy_to_liggghts(self._coordinates, pos, 3, natom, runs)
+
+        for field in self._used_fields:
+            _copy_to_liggghts(self._cache[field.cuba], self._extract(field),
+                              field.count, natom, runs)
+
+        self._record_transfer(_count(runs, natom), self._get_bytes_per_atom())
+        self._static_changed = False
+
+        self.send_types()
+
+    def send_types(self):
+        """ Send atom types to liggghts (if they changed)
+
+        """
+        if not self._types_changed:
+            return
+
+        natom = self._liggghts.extract_global("nlocal", 0)
+        extract_type = self._liggghts.extract_atom("type", 0)
+        _copy_to_liggghts(self._types, extract_type, 1, natom)
+
+        self._types_changed = False
+        self._record_transfer(natom, ctypes.sizeof(ctypes.c_int))
 
     def send_radius(self):
         """ Send radius data to liggghts
 
         """
-        values = self._cache[CUBA.RADIUS]
-
         natom = self._liggghts.extract_global("nlocal", 0)
+        runs = None if self._static_changed else self._get_mobile_runs(natom)
         extract_rad = self._liggghts.extract_atom("radius", 2)
+        _copy_to_liggghts(self._cache[CUBA.RADIUS], extract_rad, 1, natom,
+                          runs)
 
-        for i in range(0, natom):
-            extract_rad[i] = values[i]
+        self._record_transfer(_count(runs, natom),
+                              ctypes.sizeof(ctypes.c_double))
+
+    def set_static_types(self, material_types):
+        """ Set the atom types of the static particles
+
+        Parameters
+        ----------
+        material_types : iterable of int
+            atom types of the particles which are not moved by liggghts
+        """
+        material_types = frozenset(material_types)
+        if material_types != self._static_types:
+            self._static_types = material_types
+            self._mobile_runs = None
+            # (formerly) static particles might not be up to date
+            self._static_changed = True
+
+    def _get_mobile_runs(self, natom):
+        """ Returns (start, stop) of each run of non-static particles
+
+        None is returned if there are no static particles.
+
+        """
+        if not self._static_types:
+            return None
+        if self._mobile_runs is None:
+            types = numpy.frombuffer(self._types, dtype=numpy.intc)[:natom]
+            mobile = ~numpy.in1d(types, list(self._static_types))
+            edges = numpy.diff(numpy.concatenate(
+                ([0], mobile.astype(numpy.int8), [0])))
+            self._mobile_runs = zip(numpy.flatnonzero(edges == 1).tolist(),
+                                    numpy.flatnonzero(edges == -1).tolist())
+        return self._mobile_runs
+
+    def _extract(self, field):
+        """ Extract (pointer to) the values of a field from liggghts
+
+        """
+        if field.fix:
+            return self._liggghts.extract_fix(
+                field.liggghts_name, 1, field.liggghts_type)
+        else:
+            return self._liggghts.extract_atom(
+                field.liggghts_name, field.liggghts_type)
+
+    def _get_bytes_per_atom(self):
+        """ Number of bytes transferred per atom (coordinates and data)
+
+        """
+        return ctypes.sizeof(ctypes.c_double) * 3 + sum(
+            ctypes.sizeof(_get_ctype(field)) * field.count
+            for field in self._used_fields)
+
+    def _record_transfer(self, natom, bytes_per_atom):
+        """ Record transfer of data (if instrumentation is enabled)
+
+        """
+        if self._instrumentation and self._instrumentation.enabled:
+            self._instrumentation.add_bytes(natom * bytes_per_atom)
+            self._instrumentation.set_number_particles(natom)
 
     def get_particle_data(self, uid):
         """ get particle data
@@ -174,19 +256,16 @@ class ParticleDataCache(object):
         data : DataContainer
             data of the particle
         """
+        index = self._index_of_uid[uid]
         data = DataContainer()
-        for entry in self._data_entries:
-            i = self._index_of_uid[uid] * entry.count
-            if entry.count > 1:
-                # always assuming that its a tuple
-                # ( see https://github.com/simphony/simphony-common/issues/18 )
-                data[entry.CUBA] = tuple(
-                    self._cache[entry.CUBA][i:i+entry.count])
-            else:
-                data[entry.CUBA] = self._cache[entry.CUBA][i]
+        for field in self._used_fields:
+            data[field.cuba] = self._get_value(field, index)
+
+        if self._explicit_types[index]:
+            data[CUBA.MATERIAL_TYPE] = self._types[index]
         return data
 
-    def set_particle(self, coordinates, data, uid):
+    def set_particle(self, coordinates, data, uid, default_type):
         """ set particle coordinates and data
 
         Parameters
@@ -197,30 +276,315 @@ class ParticleDataCache(object):
             data of the particle
         uid : uuid
             uuid of the particle
+        default_type : int
+            atom type used if data has no CUBA.MATERIAL_TYPE
 
+        Raises
+        ------
+        KeyError
+            if the data does not contain a required value
         """
+        for field in self._fields:
+            if field.required and field.cuba not in data:
+                raise KeyError(field.cuba)
+
         if uid not in self._index_of_uid:
             self._index_of_uid[uid] = len(self._index_of_uid)
-
-        i = self._index_of_uid[uid] * 3
-        self._coordinates[i:i+3] = coordinates[0:3]
+            self._mobile_runs = None
+            self._types.append(0)
+            self._explicit_types.append(0)
+            self._coordinates.extend((0.0, 0.0, 0.0))
+            for field in self._fields:
+                self._cache[field.cuba].extend(
+                    [field.default] * field.count)
 
         index = self._index_of_uid[uid]
-        for entry in self._data_entries:
+        self.set_values_at(index, coordinates=coordinates)
 
-            i = index * entry.count
+        if CUBA.MATERIAL_TYPE in data:
+            self._set_type(index, data[CUBA.MATERIAL_TYPE])
+        else:
+            self._set_type(index, default_type, explicit=False)
 
-            if entry.count > 1:
-                self._cache[entry.CUBA][i:i+entry.count] = \
-                    data[entry.CUBA][0:entry.count]
+        for field in self._fields:
+            if field.cuba in data:
+                self._use(field)
+                self._set_value(field, index, data[field.cuba])
             else:
-                if i < len(self._cache[entry.CUBA]):
-                    self._cache[entry.CUBA][i] = data[entry.CUBA]
-                elif i == len(self._cache[entry.CUBA]):
-                    self._cache[entry.CUBA].append(data[entry.CUBA])
-                else:
-                    msg = "Problem with index {}".format(uid)
-                    raise IndexError(msg)
+                self._set_value(
+                    field, index,
+                    field.default if field.count == 1 else
+                    (field.default,) * field.count)
+
+    def add_atoms(self, natom):
+        """ Add the atoms which liggghts created (e.g. inserted) in bulk
+
+        The atoms beyond the cached ones (up to natom) get new uids and
+        the default values; their types are retrieved (and their other
+        values are retrieved with the other particles).
+
+        Parameters
+        ----------
+        natom : int
+            number of atoms in liggghts
+
+        Returns
+        -------
+        uids : list of UUID
+            uids of the added atoms (in the order of their indices)
+        """
+        start = len(self._index_of_uid)
+        number = natom - start
+        if number <= 0:
+            return []
+
+        uids = [uuid.uuid4() for _ in xrange(number)]
+        self._index_of_uid.update(izip(uids, xrange(start, natom)))
+        self._coordinates.extend([0.0] * (3 * number))
+        for field in self._fields:
+            self._cache[field.cuba].extend(
+                [field.default] * (field.count * number))
+        self._types.extend([0] * number)
+        self._explicit_types.extend([0] * number)
+        self._mobile_runs = None
+
+        _copy_from_liggghts(self._liggghts.extract_atom("type", 0),
+                            self._types, 1, natom, [(start, natom)])
+        return uids
+
+    def index_of(self, uid):
+        """ Get index of a particle
+
+        Parameters
+        ----------
+        uid : uid
+            uid of particle
+        """
+        return self._index_of_uid[uid]
+
+    def get_type_at(self, index):
+        """ Get atom type of particle at index
+
+        Parameters
+        ----------
+        index : int
+            index of particle
+        """
+        return self._types[index]
+
+    def set_default_types(self, indices, material_type):
+        """ Set type of the particles (at indices) without an explicit type
+
+        Parameters
+        ----------
+        indices : iterable of int
+            indices of particles
+        material_type : int
+            atom type
+        """
+        for index in indices:
+            if not self._explicit_types[index]:
+                self._set_type(index, material_type, explicit=False)
+
+    def get_keys_at(self, index):
+        """ Get the CUBA keys of the data of particle at index
+
+        Parameters
+        ----------
+        index : int
+            index of particle
+        """
+        if self._explicit_types[index]:
+            return self._view_keys_with_type
+        return self._view_keys
+
+    def get_coordinates_at(self, index):
+        """ Get coordinates of particle at index
+
+        Parameters
+        ----------
+        index : int
+            index of particle
+        """
+        i = index * 3
+        return tuple(self._coordinates[i:i+3])
+
+    def get_value_at(self, cuba, index):
+        """ Get value of particle at index
+
+        Parameters
+        ----------
+        cuba : CUBA
+            CUBA key of value
+        index : int
+            index of particle
+
+        Raises
+        ------
+        KeyError
+            if the value is not part of the data of the particle
+        """
+        if cuba == CUBA.MATERIAL_TYPE:
+            if not self._explicit_types[index]:
+                raise KeyError(cuba)
+            return self._types[index]
+
+        if cuba not in self._used_cuba:
+            raise KeyError(cuba)
+        return self._get_value(self._field_of_cuba[cuba], index)
+
+    def set_values_at(self, index, coordinates=None, data=None):
+        """ Set coordinates and/or values of particle at index
+
+        Values of CUBA keys which are not stored are ignored.
+
+        Parameters
+        ----------
+        index : int
+            index of (existing) particle
+        coordinates : tuple of floats, optional
+            particle coordinates
+        data : mapping, optional
+            values of the particle which are changed
+        """
+        if coordinates is not None:
+            i = index * 3
+            self._coordinates[i:i+3] = array('d', coordinates[0:3])
+            self._mark_changed(index)
+
+        for cuba, value in (data or {}).iteritems():
+            if cuba == CUBA.MATERIAL_TYPE:
+                self._set_type(index, value)
+                continue
+            field = self._field_of_cuba.get(cuba)
+            if field is None:
+                continue
+            self._use(field)
+            self._set_value(field, index, value)
+
+    def remove_values_at(self, index, keys):
+        """ Remove values of particle at index
+
+        The values are reset to their defaults (as when the particle is set
+        without them). A particle without CUBA.MATERIAL_TYPE keeps its type
+        until it is given the default type (see set_default_types).
+
+        Parameters
+        ----------
+        index : int
+            index of (existing) particle
+        keys : iterable of CUBA
+            CUBA keys of the values
+
+        Raises
+        ------
+        KeyError
+            if a required value is removed
+        """
+        fields = []
+        for cuba in keys:
+            if cuba == CUBA.MATERIAL_TYPE:
+                continue
+            field = self._field_of_cuba.get(cuba)
+            if field is None:
+                continue
+            if field.required:
+                raise KeyError(cuba)
+            fields.append(field)
+
+        if CUBA.MATERIAL_TYPE in keys:
+            self._explicit_types[index] = 0
+        for field in fields:
+            self._set_value(
+                field, index,
+                field.default if field.count == 1 else
+                (field.default,) * field.count)
+
+    def get_array(self, cuba):
+        """ Get values of all particles as array (ordered by index)
+
+        Parameters
+        ----------
+        cuba : CUBA
+            CUBA key of value
+        """
+        field = self._field_of_cuba[cuba]
+        values = numpy.array(self._cache[cuba],
+                             dtype=numpy.dtype(field.typecode))
+        if field.count > 1:
+            values = values.reshape(-1, field.count)
+        return values
+
+    def get_types(self):
+        """ Get atom types of all particles as array (ordered by index)
+
+        """
+        return numpy.array(self._types, dtype=numpy.intc)
+
+    def set_array(self, cuba, indices, values):
+        """ Set values of several particles at once
+
+        Parameters
+        ----------
+        cuba : CUBA
+            CUBA key of value (e.g. CUBA.EXTERNAL_APPLIED_FORCE)
+        indices : sequence of int
+            indices of the particles
+        values : array_like
+            values of the particles (in the order of indices), i.e. of
+            shape (len(indices), count) or (len(indices),) for scalars
+
+        Raises
+        ------
+        KeyError
+            if cuba is not stored
+        ValueError
+            if the shape of values does not match
+        """
+        field = self._field_of_cuba[cuba]
+        dtype = numpy.dtype(field.typecode)
+        indices = numpy.asarray(indices, dtype=numpy.intp)
+        values = numpy.asarray(values, dtype=dtype)
+
+        shape = (len(indices), field.count) if field.count > 1 \
+            else (len(indices),)
+        if values.shape != shape:
+            raise ValueError(
+                "Values of {} have to be of shape {} (not {})".format(
+                    cuba, shape, values.shape))
+
+        # view of the stored values (only used while nothing is added)
+        column = numpy.frombuffer(self._cache[cuba], dtype=dtype)
+        if field.count > 1:
+            column = column.reshape(-1, field.count)
+        column[indices] = values
+
+        if self._static_types and numpy.in1d(
+                numpy.frombuffer(self._types, dtype=numpy.intc)[indices],
+                list(self._static_types)).any():
+            self._static_changed = True
+
+        self._use(field)
+        self._versions[cuba] += 1
+
+    def get_coordinates_array(self):
+        """ Get coordinates of all particles as array (ordered by index)
+
+        """
+        return numpy.array(self._coordinates, dtype=numpy.double).reshape(
+            -1, 3)
+
+    def get_version(self, cuba):
+        """ Get version of the values of a CUBA key
+
+        The version changes whenever a value of a particle changes.
+
+        Parameters
+        ----------
+        cuba : CUBA
+            CUBA key of value
+        """
+        return self._versions[cuba]
 
     def get_coordinates(self, uid):
         """ Get coordinates for a particle
@@ -230,23 +594,206 @@ class ParticleDataCache(object):
         uid : uid
             uid of particle
         """
-        i = self._index_of_uid[uid] * 3
-        coords = self._coordinates[i:i+3]
-        return tuple(coords)
+        return self.get_coordinates_at(self._index_of_uid[uid])
+
+    def _get_value(self, field, index):
+        values = self._cache[field.cuba]
+        if field.count > 1:
+            # always assuming that its a tuple
+            # ( see https://github.com/simphony/simphony-common/issues/18 )
+            i = index * field.count
+            return tuple(values[i:i+field.count])
+        else:
+            return values[index]
+
+    def _set_value(self, field, index, value):
+        values = self._cache[field.cuba]
+        if field.count > 1:
+            i = index * field.count
+            values[i:i+field.count] = array(field.typecode,
+                                            value[0:field.count])
+        else:
+            values[index] = value
+        self._versions[field.cuba] += 1
+        self._mark_changed(index)
+
+    def _mark_changed(self, index):
+        """ Note that a value of the particle at index changed
+
+        """
+        if self._types[index] in self._static_types:
+            self._static_changed = True
+
+    def _use(self, field):
+        """ Mark field as used (i.e. part of the data and exchanged)
+
+        """
+        if field.cuba in self._used_cuba:
+            return
+        self._used_cuba.add(field.cuba)
+        self._used_fields.append(field)
+
+        self._view_keys = tuple(f.cuba for f in self._used_fields)
+        self._view_keys_with_type = self._view_keys + (CUBA.MATERIAL_TYPE,)
+
+    def _set_type(self, index, material_type, explicit=True):
+        """ Set atom type of particle at index
+
+        Parameters
+        ----------
+        index : int
+            index of particle
+        material_type : int
+            atom type
+        explicit : bool, optional
+            if the type is part of the data of the particle (or the default
+            type of its container)
+
+        Raises
+        ------
+        ValueError
+            if the type is not one of the atom types
+        """
+        if self._number_types is not None and \
+                not 1 <= material_type <= self._number_types:
+            raise ValueError(
+                "Material type ({}) has to be between 1 and {}".format(
+                    material_type, self._number_types))
+
+        if self._types[index] != material_type:
+            if self._static_types:
+                self._mobile_runs = None
+                if self._types[index] in self._static_types or \
+                        material_type in self._static_types:
+                    self._static_changed = True
+            self._types[index] = material_type
+            self._types_changed = True
+        self._explicit_types[index] = explicit
+
+
+def _copy_to_liggghts(values, pointer, count, natom, runs=None):
+    """ Copy values (of natom atoms) from cache into liggghts
+
+    Parameters
+    ----------
+    values : array.array
+        values in cache (count values per atom)
+    pointer :
+        per-atom vector (count is 1) or array of liggghts
+    count : int
+        number of values per atom
+    natom : int
+        number of atoms
+    runs : list of (int, int), optional
+        (start, stop) of the runs of atoms which are copied (default: all)
+    """
+    if runs is None:
+        runs = [(0, natom)]
+
+    if isinstance(pointer, ctypes._Pointer):
+        _check_length(values, count, natom)
+        address = _get_address(pointer, count)
+        size = count * values.itemsize
+        for start, stop in runs:
+            ctypes.memmove(address + start * size,
+                           values.buffer_info()[0] + start * size,
+                           (stop - start) * size)
+    elif count > 1:
+        for start, stop in runs:
+            for i in range(start, stop):
+                for j in range(0, count):
+                    pointer[i][j] = values[i * count + j]
+    else:
+        for start, stop in runs:
+            for i in range(start, stop):
+                pointer[i] = values[i]
+
+
+def _copy_from_liggghts(pointer, values, count, natom, runs=None):
+    """ Copy values (of natom atoms) from liggghts into cache
+
+    Parameters
+    ----------
+    pointer :
+        per-atom vector (count is 1) or array of liggghts
+    values : array.array
+        values in cache (count values per atom)
+    count : int
+        number of values per atom
+    natom : int
+        number of atoms
+    runs : list of (int, int), optional
+        (start, stop) of the runs of atoms which are copied (default: all)
+    """
+    if runs is None:
+        runs = [(0, natom)]
+
+    if isinstance(pointer, ctypes._Pointer):
+        _check_length(values, count, natom)
+        address = _get_address(pointer, count)
+        size = count * values.itemsize
+        for start, stop in runs:
+            ctypes.memmove(values.buffer_info()[0] + start * size,
+                           address + start * size,
+                           (stop - start) * size)
+    elif count > 1:
+        for start, stop in runs:
+            for i in range(start, stop):
+                for j in range(0, count):
+                    values[i * count + j] = pointer[i][j]
+    else:
+        for start, stop in runs:
+            for i in range(start, stop):
+                values[i] = pointer[i]
+
+
+def _count(runs, natom):
+    """ Returns number of atoms in runs (natom if runs is None)
+
+    """
+    if runs is None:
+        return natom
+    return sum(stop - start for start, stop in runs)
+
+
+def _check_length(values, count, natom):
+    """ Check that the cache has values for natom atoms
+
+    Raises
+    ------
+    IndexError
+        if the cache has less values than liggghts has atoms
+    """
+    if natom * count > len(values):
+        raise IndexError(
+            "Cache has values for {} atoms but liggghts has {} atoms".format(
+                len(values) // count, natom))
+
+
+def _get_address(pointer, count):
+    """ Returns address of first value of per-atom vector or array
+
+    The per-atom arrays of LIGGGHTS (e.g. 'x' or the array of a fix
+    property/atom) are allocated as one contiguous block which the
+    pointers to the rows point into, so all values can be copied at once.
+
+    """
+    pointer = pointer[0] if count > 1 else pointer
+    return ctypes.cast(pointer, ctypes.c_void_p).value
 
 
-def _get_ctype(entry):
-    """ get ctype's type for entry
+def _get_ctype(field):
+    """ get ctype's type for field
 
     Parameters
     ----------
-    entry : LiggghtsData
+    field : AtomField
         info about the atom parameter
     """
-    if entry.type == 0:
+    if field.dtype == "int":
         return ctypes.c_int
-    elif entry.type == 1:
+    elif field.dtype == "double":
         return ctypes.c_double
     else:
         raise RuntimeError(
-            "Unsupported type {}".format(entry.type))
+            "Unsupported type {}".format(field.dtype))
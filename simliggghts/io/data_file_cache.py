@@ -0,0 +1,238 @@
+""" On-disk cache of parsed LIGGGHTS data files
+
+Parsing a large data file line by line is slow, so the parsed values
+(atoms, velocities, masses and box) can be stored as arrays in a '.npz'
+file of a cache directory. The entry of a data file is keyed by its path,
+size and modification time, so it is not used anymore once the data file
+changed. The size of the cache is bounded: the least recently used entries
+are removed once the entries exceed it.
+
+"""
+import hashlib
+import os
+import tempfile
+
+import numpy
+
+from .liggghts_data_file_parser import LiggghtsDataFileParser
+from .liggghts_simple_data_handler import LiggghtsSimpleDataHandler
+
+# name of the cache directory used next to a data file
+CACHE_DIRECTORY_NAME = ".simliggghts_cache"
+
+# default maximum size of the entries of a cache (in bytes)
+DEFAULT_MAX_SIZE = 2 ** 30
+
+_SUFFIX = ".npz"
+
+
+class DataFileCache(object):
+    """ Cache of parsed data files (in a directory)
+
+    Parameters
+    ----------
+    directory : str
+        directory of the cache entries (created if needed)
+    max_size : int, optional
+        maximum total size of the entries (in bytes)
+
+    """
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+    @classmethod
+    def next_to(cls, filename, max_size=DEFAULT_MAX_SIZE):
+        """ Returns cache in a directory next to the data file
+
+        """
+        return cls(os.path.join(os.path.dirname(os.path.abspath(filename)),
+                                CACHE_DIRECTORY_NAME), max_size)
+
+    def parse(self, filename):
+        """ Returns the parsed data file (from the cache if possible)
+
+        Parameters
+        ----------
+        filename : str
+            name of data file
+
+        Returns
+        -------
+        handler : LiggghtsSimpleDataHandler
+            handler holding the parsed values
+
+        """
+        handler = self.load(filename)
+        if handler is None:
+            handler = LiggghtsSimpleDataHandler()
+            LiggghtsDataFileParser(handler=handler).parse(filename)
+            self.store(filename, handler)
+        return handler
+
+    def load(self, filename):
+        """ Returns the cached values of a data file (None if not cached)
+
+        """
+        path = self._get_path(filename)
+        try:
+            with numpy.load(path) as arrays:
+                handler = _to_handler(arrays)
+        except (IOError, OSError, KeyError, ValueError):
+            # not cached (or removed/written by another process meanwhile)
+            return None
+
+        # the modification time of the entry records its last use
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return handler
+
+    def store(self, filename, handler):
+        """ Store the parsed values of a data file
+
+        The entry is written to a temporary file first so that other
+        processes never see an incomplete entry.
+
+        """
+        if not os.path.isdir(self.directory):
+            try:
+                os.makedirs(self.directory)
+            except OSError:
+                if not os.path.isdir(self.directory):
+                    raise
+
+        descriptor, temp_path = tempfile.mkstemp(dir=self.directory,
+                                                 suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as temp_file:
+                numpy.savez(temp_file, **_to_arrays(handler))
+            os.rename(temp_path, self._get_path(filename))
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+        self._evict()
+
+    def clear(self):
+        """ Remove all entries
+
+        """
+        for path, _, _ in self._get_entries():
+            _remove(path)
+
+    def _get_path(self, filename):
+        """ Returns path of the entry of a data file
+
+        """
+        status = os.stat(filename)
+        key = "{}:{}:{!r}".format(os.path.abspath(filename), status.st_size,
+                                  status.st_mtime)
+        return os.path.join(self.directory,
+                            hashlib.sha1(key).hexdigest() + _SUFFIX)
+
+    def _get_entries(self):
+        """ Returns (path, size, time of last use) of each entry
+
+        """
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for name in os.listdir(self.directory):
+            if not name.endswith(_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, status.st_size, status.st_mtime))
+        return entries
+
+    def _evict(self):
+        """ Remove least recently used entries until the entries fit
+
+        """
+        entries = sorted(self._get_entries(), key=lambda entry: entry[2])
+        size = sum(entry[1] for entry in entries)
+        for path, entry_size, _ in entries:
+            if size <= self.max_size:
+                break
+            _remove(path)
+            size -= entry_size
+
+
+def _to_arrays(handler):
+    """ Returns the parsed values of handler as arrays
+
+    """
+    atoms = handler.get_atoms()
+    ids = sorted(atoms)
+    velocities = handler.get_velocities()
+    velocity_ids = sorted(velocities)
+    masses = handler.get_masses()
+    mass_types = sorted(masses)
+
+    arrays = {
+        "ids": numpy.array(ids, dtype=numpy.int64),
+        "types": numpy.array([atoms[i][0] for i in ids], dtype=numpy.int64),
+        "values": numpy.array([atoms[i][1:] for i in ids],
+                              dtype=numpy.double),
+        "velocity_ids": numpy.array(velocity_ids, dtype=numpy.int64),
+        "velocities": numpy.array([velocities[i] for i in velocity_ids],
+                                  dtype=numpy.double),
+        "mass_types": numpy.array(mass_types, dtype=numpy.int64),
+        "masses": numpy.array([masses[i] for i in mass_types], dtype=str),
+        "number_types": numpy.array(
+            -1 if handler.get_number_atom_types() is None
+            else handler.get_number_atom_types())}
+
+    if handler.get_box_origin() is not None:
+        arrays["box_origin"] = numpy.array(handler.get_box_origin())
+    if handler.get_box_vectors() is not None:
+        arrays["box_vectors"] = numpy.array(handler.get_box_vectors())
+    if handler.get_atom_type() is not None:
+        arrays["atom_type"] = numpy.array(handler.get_atom_type())
+    return arrays
+
+
+def _to_handler(arrays):
+    """ Returns handler holding the values of the arrays
+
+    """
+    handler = LiggghtsSimpleDataHandler()
+
+    number_types = int(arrays["number_types"])
+    if number_types >= 0:
+        handler.process_number_atom_types(number_types)
+
+    for i, atom_type, values in zip(arrays["ids"].tolist(),
+                                    arrays["types"].tolist(),
+                                    arrays["values"].tolist()):
+        handler.process_atoms(i, [atom_type] + values)
+    for i, values in zip(arrays["velocity_ids"].tolist(),
+                         arrays["velocities"].tolist()):
+        handler.process_velocities(i, values)
+    for atom_type, mass in zip(arrays["mass_types"].tolist(),
+                               arrays["masses"].tolist()):
+        handler.process_masses(atom_type, mass)
+
+    if "box_origin" in arrays.files:
+        handler.process_box_origin(tuple(arrays["box_origin"].tolist()))
+    if "box_vectors" in arrays.files:
+        handler.process_box_vectors(
+            [tuple(vector) for vector in arrays["box_vectors"].tolist()])
+    if "atom_type" in arrays.files:
+        handler.process_atom_type(str(arrays["atom_type"]))
+    return handler
+
+
+def _remove(path):
+    """ Remove file (if it was not removed by another process meanwhile)
+
+    """
+    try:
+        os.remove(path)
+    except OSError:
+        pass
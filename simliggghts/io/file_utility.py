@@ -2,17 +2,15 @@ from simphony.cuds.particles import Particle, Particles
 from simphony.core.data_container import DataContainer
 from simphony.core.cuba import CUBA
 
-from ..common import globals
 from .liggghts_data_file_parser import LiggghtsDataFileParser
 from .liggghts_simple_data_handler import LiggghtsSimpleDataHandler
 from .liggghts_data_line_interpreter import LiggghtsDataLineInterpreter
 from ..config.domain import get_box
 from ..cuba_extension import CUBAExtension
 from ..common.atom_style import (AtomStyle, get_atom_style)
-from .liggghts_data_file_writer import LiggghtsDataFileWriter
 
 
-def read_data_file(filename, atom_style=None):
+def read_data_file(filename, atom_style=None, cache=None):
     """ Reads liggghts data file and create CUDS objects
 
     Reads liggghts data file and create list of Particles. The returned list
@@ -34,6 +32,12 @@ def read_data_file(filename, atom_style=None):
         type of atoms in the file.  If None, then an attempt of
         interpreting the atom-style in the file is performed.
 
+    cache : DataFileCache or str or bool, optional
+        cache of parsed data files (or name of its directory) which is
+        used instead of parsing the file again if the file did not change
+        (see simliggghts.io.data_file_cache). If True, a cache directory
+        next to the file is used.
+
     Returns
     -------
     particles_list : list of Particles
@@ -42,10 +46,18 @@ def read_data_file(filename, atom_style=None):
         particles of that type.
 
     """
-    handler = LiggghtsSimpleDataHandler()
-    parser = LiggghtsDataFileParser(handler=handler)
-
-    parser.parse(filename)
+    if cache is None or cache is False:
+        handler = LiggghtsSimpleDataHandler()
+        parser = LiggghtsDataFileParser(handler=handler)
+        parser.parse(filename)
+    else:
+        # imported here as the cache (and numpy) is only needed if used
+        from .data_file_cache import DataFileCache
+        if cache is True:
+            cache = DataFileCache.next_to(filename)
+        elif not isinstance(cache, DataFileCache):
+            cache = DataFileCache(cache)
+        handler = cache.parse(filename)
 
     if atom_style is None:
         atom_style = (
@@ -59,8 +71,6 @@ def read_data_file(filename, atom_style=None):
     atoms = handler.get_atoms()
     velocities = handler.get_velocities()
 
-    globals.MAX_NUMBER_TYPES = handler.get_number_atom_types()
-
     box_origin = handler.get_box_origin()
     box_vectors = handler.get_box_vectors()
 
@@ -119,6 +129,8 @@ def write_data_file(filename, particles_list, atom_style=AtomStyle.GRANULAR):
         type of atoms to be written to file
 
     """
+    # imported here as the writer (and numpy) is not needed for reading
+    from .liggghts_data_file_writer import LiggghtsDataFileWriter
 
     num_particles = sum(
         pc.count_of(CUBA.PARTICLE) for pc in particles_list)
@@ -140,7 +152,9 @@ def write_data_file(filename, particles_list, atom_style=AtomStyle.GRANULAR):
     for particles in particles_list:
         material_type = particles.data[CUBA.MATERIAL_TYPE]
         for p in particles.iter(item_type=CUBA.PARTICLE):
-            writer.write_atom(p, material_type)
+            # a particle's own type is used instead of its container's
+            writer.write_atom(
+                p, p.data.get(CUBA.MATERIAL_TYPE, material_type))
     writer.close()
 
 
@@ -2,6 +2,7 @@ from simphony.core.cuba import CUBA
 from simphony.core.keywords import KEYWORDS
 
 from ..common.atom_style_description import ATOM_STYLE_DESCRIPTIONS
+from ..common.derived_quantities import sphere_mass
 
 
 class LiggghtsDataLineInterpreter(object):
@@ -133,10 +134,9 @@ class LiggghtsDataLineInterpreter(object):
         shape = keyword.shape
 
         if shape == [1]:
-            if keyword.name is "MASS":
-                cuba_value =\
-                    values[1]*values[1]*values[1]/8.0 *\
-                    4.0/3.0*3.141592654 * values[2]
+            if keyword.name == "MASS":
+                # from diameter and density
+                cuba_value = sphere_mass(values[1] / 2.0, values[2])
             else:
                 cuba_value = values[index]
                 index += 1
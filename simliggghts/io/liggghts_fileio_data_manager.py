@@ -1,43 +1,28 @@
 import os
+import uuid
+
+import numpy
 
 from simphony.core.cuba import CUBA
 from simphony.core.data_container import DataContainer
-from simphony.cuds.particles import Particles, Particle
+from simphony.cuds.particles import Particle
 
 from .liggghts_data_file_parser import LiggghtsDataFileParser
 from .liggghts_simple_data_handler import LiggghtsSimpleDataHandler
 from .liggghts_data_line_interpreter import LiggghtsDataLineInterpreter
 from .liggghts_data_file_writer import LiggghtsDataFileWriter
 
-from ..common.atom_style_description import (ATOM_STYLE_DESCRIPTIONS,
-                                             get_attributes)
+from ..common.atom_schema import get_schema
+from ..common.atom_style_description import ATOM_STYLE_DESCRIPTIONS
+from ..common.derived_quantities import DerivedQuantities
+from ..common.particle_columns import ParticleColumns
+from ..common.particle_view import ParticleView
 
 from ..config.domain import get_box
 
 from ..abc_data_manager import ABCDataManager
 
 
-def _filter_unsupported_data(iterable, supported_cuba):
-    """Ensure iterators only provide particles with only supported data
-
-    Parameters
-    ----------
-    iterable : iterator of Particles
-        iterable of particles
-    supported_cuba: list of CUBA
-        what cuba is supported
-
-    """
-    for particle in iterable:
-        data = particle.data
-        supported_data = {cuba: data[cuba] for cuba in
-                          data if cuba in supported_cuba}
-        supported_particle = Particle(coordinates=particle.coordinates,
-                                      uid=particle.uid,
-                                      data=supported_data)
-        yield supported_particle
-
-
 class LiggghtsFileIoDataManager(ABCDataManager):
     """  Class managing Liggghts data information using file-io
 
@@ -48,28 +33,48 @@ class LiggghtsFileIoDataManager(ABCDataManager):
 
     Class maintains a cache of the particle information. This information
     is read from file whenever the read() method is called and written to
-    the file whenever the flush() method is called.
+    the file whenever the flush() method is called. The particles of each
+    container are cached in a columnar store (ParticleColumns) which only
+    keeps the CUBA keys supported by the atom style.
 
     Parameters
     ----------
     atom_style : str
+    instrumentation : Instrumentation, optional
+        records statistics of the writing/reading of the data files
+    number_types : int, optional
+        number of atom types written to the data file (at least the
+        number of the highest material type is written)
+    spatial_sort_interval : int, optional
+        if given, the particles are sorted spatially every
+        spatial_sort_interval reads
 
     """
-    def __init__(self, atom_style):
-        super(LiggghtsFileIoDataManager, self).__init__()
+    def __init__(self, atom_style, instrumentation=None, number_types=None,
+                 spatial_sort_interval=None):
+        super(LiggghtsFileIoDataManager, self).__init__(
+            instrumentation, spatial_sort_interval)
 
         self._atom_style = atom_style
+        self._number_types = number_types
 
         # map from Liggghts-id to simphony-uid
         self._liggghtsid_to_uid = {}
 
-        # cache of particle containers
+        # cache of particles (columnar store) and data of each container
         self._pc_cache = {}
+        self._pc_data = {}
 
         # cache of data container extensions
         self._dc_extension_cache = {}
 
-        self._supported_cuba = get_attributes(self._atom_style)
+        # derived quantities of each container (discarded when
+        # particles are added or removed)
+        self._derived = {}
+
+        # the values of the atom style (particles can have their own
+        # type which is used instead of the type of their container)
+        self._supported_cuba = get_schema(self._atom_style).cuba_keys
 
     def get_data(self, uname):
         """Returns data container associated with particle container
@@ -80,7 +85,7 @@ class LiggghtsFileIoDataManager(ABCDataManager):
             non-changing unique name of particles
 
         """
-        return DataContainer(self._pc_cache[uname].data)
+        return DataContainer(self._pc_data[uname])
 
     def set_data(self, data, uname):
         """Sets data container associated with particle container
@@ -91,7 +96,7 @@ class LiggghtsFileIoDataManager(ABCDataManager):
             non-changing unique name of particles
 
         """
-        self._pc_cache[uname].data = DataContainer(data)
+        self._pc_data[uname] = DataContainer(data)
 
     def get_data_extension(self, uname):
         """Returns data container extension associated with particle container
@@ -104,6 +109,29 @@ class LiggghtsFileIoDataManager(ABCDataManager):
         """
         return dict(self._dc_extension_cache[uname])
 
+    def get_data_snapshot(self, uname):
+        """Returns read-only snapshot of the data of a particle container
+
+        Parameters
+        ----------
+        uname : string
+            non-changing unique name of particles
+
+        """
+        return self._data_snapshots.get(uname, self._pc_data[uname])
+
+    def get_data_extension_snapshot(self, uname):
+        """Returns read-only snapshot of the data extension of a container
+
+        Parameters
+        ----------
+        uname : string
+            non-changing unique name of particles
+
+        """
+        return self._data_extension_snapshots.get(
+            uname, self._dc_extension_cache[uname])
+
     def set_data_extension(self, data, uname):
         """Sets data container extension associated with particle container
 
@@ -125,7 +153,9 @@ class LiggghtsFileIoDataManager(ABCDataManager):
 
         """
         del self._pc_cache[uname]
+        del self._pc_data[uname]
         del self._dc_extension_cache[uname]
+        self._derived.pop(uname, None)
 
     def _handle_new_particles(self, uname, particles):
         """Add new particle container to this manager.
@@ -139,18 +169,15 @@ class LiggghtsFileIoDataManager(ABCDataManager):
             particle container to be added
 
         """
-        # create stand-alone particle container to use
+        # create stand-alone columnar store to use
         # as a cache of for input/output to Liggghts
-        pc = Particles(name="_")
-        pc.data = DataContainer(particles.data)
-
+        # (bonds are not supported)
+        columns = ParticleColumns(self._supported_cuba)
         for p in particles.iter(item_type=CUBA.PARTICLE):
-            pc.add([p])
-
-        for b in particles.iter(item_type=CUBA.BOND):
-            pc.add([b])
+            columns.add(p)
 
-        self._pc_cache[uname] = pc
+        self._pc_cache[uname] = columns
+        self._pc_data[uname] = DataContainer(particles.data)
 
         if hasattr(particles, 'data_extension'):
             self._dc_extension_cache[uname] = dict(particles.data_extension)
@@ -169,25 +196,40 @@ class LiggghtsFileIoDataManager(ABCDataManager):
             name of particle container
 
         """
-        return self._pc_cache[uname].get(uid)
+        return self._pc_cache[uname].get_particle(uid)
 
     def update_particles(self, iterable, uname):
         """Update particles
 
         """
-        self._pc_cache[uname].update(
-            _filter_unsupported_data(iterable, self._supported_cuba))
+        columns = self._pc_cache[uname]
+        for particle in iterable:
+            if not columns.has(particle.uid):
+                # e.g. an outdated view of a removed particle
+                raise ValueError(
+                    "particle id ({}) was not found".format(particle.uid))
+            if isinstance(particle, ParticleView) and \
+                    particle.is_view_of(columns):
+                # only the changes of the view need to be written
+                particle.write_back()
+            else:
+                if isinstance(particle, ParticleView):
+                    # outdated view (its particle was moved)
+                    particle.relocate()
+                columns.update(particle)
 
     def add_particles(self, iterable, uname):
         """Add particles
 
         """
-        uids = self._pc_cache[uname].add(iterable)
-
-        # filter the cached particles of unsupported CUBA
-        self._pc_cache[uname].update(_filter_unsupported_data(
-            self._pc_cache[uname].iter(uids), self._supported_cuba))
-
+        columns = self._pc_cache[uname]
+        uids = []
+        for particle in iterable:
+            if particle.uid is None:
+                particle.uid = uuid.uuid4()
+            columns.add(particle)
+            uids.append(particle.uid)
+        self._derived.pop(uname, None)
         return uids
 
     def remove_particle(self, uid, uname):
@@ -201,7 +243,46 @@ class LiggghtsFileIoDataManager(ABCDataManager):
             name of particle container
 
         """
-        self._pc_cache[uname].remove([uid])
+        self._pc_cache[uname].remove(uid)
+        self._derived.pop(uname, None)
+
+    def get_derived_quantities(self, uname):
+        """Returns quantities derived from the radius and density of particles
+
+        Parameters
+        ----------
+        uname : string
+            name of particle container
+
+        """
+        derived = self._derived.get(uname)
+        if derived is None:
+            columns = self._pc_cache[uname]
+            derived = DerivedQuantities(columns, columns.iter_uids())
+            self._derived[uname] = derived
+        return derived
+
+    def set_values(self, uname, cuba, values, uids=None):
+        """Set a value of several particles at once
+
+        Parameters
+        ----------
+        uname : string
+            name of particle container
+        cuba : CUBA
+            CUBA key of value
+        values : array_like
+            values of the particles
+        uids : sequence of uids, optional
+            uids of the particles (default: all, in iteration order)
+
+        """
+        columns = self._pc_cache[uname]
+        if uids is None:
+            indices = range(len(columns))
+        else:
+            indices = [columns.index_of(uid) for uid in uids]
+        columns.set_array(cuba, indices, values)
 
     def has_particle(self, uid, uname):
         """Has particle
@@ -226,7 +307,64 @@ class LiggghtsFileIoDataManager(ABCDataManager):
             uids is None then all particles will be iterated over.
 
         """
-        return self._pc_cache[uname].iter(uids, item_type=CUBA.PARTICLE)
+        return self._pc_cache[uname].iter_particles(uids)
+
+    def iter_particle_views(self, uname, uids=None):
+        """Iterate over lightweight views of the particles of a certain type
+
+        Parameters
+        ----------
+        uids : list of particle uids
+            sequence of uids of particles that should be iterated over. If
+            uids is None then all particles will be iterated over.
+
+        """
+        columns = self._pc_cache[uname]
+        if uids is None:
+            uids = list(columns.iter_uids())
+        for uid in uids:
+            yield ParticleView(columns, columns.index_of(uid), uid)
+
+    def get_all_values(self, cuba):
+        """Returns a value of all particles (of all containers) as array
+
+        Parameters
+        ----------
+        cuba : CUBA
+            CUBA key of value
+
+        """
+        arrays = [columns.get_array(cuba)
+                  for columns in self._pc_cache.itervalues() if len(columns)]
+        if not arrays:
+            return numpy.zeros(0)
+        return numpy.concatenate(arrays)
+
+    def get_all_types(self):
+        """Returns the material type of all particles (of all containers)
+
+        """
+        arrays = [columns.get_array(
+            CUBA.MATERIAL_TYPE,
+            default=self._pc_data[uname][CUBA.MATERIAL_TYPE])
+            for uname, columns in self._pc_cache.iteritems() if len(columns)]
+        if not arrays:
+            return numpy.zeros(0, dtype=int)
+        return numpy.concatenate(arrays).astype(int)
+
+    def sort_spatially(self, uname):
+        """Order the particles of a container along a Morton curve
+
+        The particles are reordered in the columnar store of the container.
+
+        Parameters
+        ----------
+        uname : string
+            name of particle container
+
+        """
+        self._pc_cache[uname].sort_spatially()
+        self._derived.pop(uname, None)
 
     def number_of_particles(self, uname):
         """Get number of particles in a container
@@ -237,7 +375,7 @@ class LiggghtsFileIoDataManager(ABCDataManager):
             non-changing unique name of particles
 
         """
-        return self._pc_cache[uname].count_of(CUBA.PARTICLE)
+        return len(self._pc_cache[uname])
 
     def flush(self, input_data_filename):
         """flush to file
@@ -249,7 +387,9 @@ class LiggghtsFileIoDataManager(ABCDataManager):
             (i.e Liggghts's input).
         """
         if self._pc_cache:
-            self._write_data_file(input_data_filename)
+            with self._instrumentation.phase("flush"):
+                self._write_data_file(input_data_filename)
+                self._record_file(input_data_filename)
         else:
             raise RuntimeError(
                 "No particles.  Liggghts cannot run without a particle")
@@ -265,7 +405,20 @@ class LiggghtsFileIoDataManager(ABCDataManager):
         output_data_filename :
             name of data-file where info read from (i.e Liggghts's output).
         """
-        self._update_from_liggghts(output_data_filename)
+        with self._instrumentation.phase("read"):
+            self._update_from_liggghts(output_data_filename)
+            self._record_file(output_data_filename)
+
+        self._sort_periodically()
+
+    def _record_file(self, filename):
+        """ Record size of data file (if instrumentation is enabled)
+
+        """
+        if self._instrumentation.enabled:
+            self._instrumentation.add_bytes(os.path.getsize(filename))
+            self._instrumentation.set_number_particles(
+                len(self._liggghtsid_to_uid))
 
 # Private methods #######################################################
     def _update_from_liggghts(self, output_data_filename):
@@ -295,34 +448,51 @@ class LiggghtsFileIoDataManager(ABCDataManager):
         for atom_type, mass in masses.iteritems():
             type_data[atom_type][CUBA.MASS] = mass
 
-        # update each particle container with these
-        # material-specific attributes
-        # TODO updating the material_type from Liggghts should possibly be
-        # removed as Liggghts is not going to change it
-        for _, pc in self._pc_cache.iteritems():
-            data = type_data[pc.data[CUBA.MATERIAL_TYPE]]
-            for key, value in data.iteritems():
-                pc.data[key] = value
-
-        for liggghts_id, values in atoms.iteritems():
-            uname, uid = self._liggghtsid_to_uid[liggghts_id]
-            cache_pc = self._pc_cache[uname]
-            p = cache_pc.get(uid)
-            p.coordinates, p.data = interpreter.convert_atom_values(values)
-            p.data.update(
+        # particles inserted by liggghts (by type)
+        inserted = {}
+
+        # the atoms are written in the order of the processors owning them
+        # (if liggghts ran on several processes), so they are sorted by id
+        # in order that inserted particles are added in the same order
+        for liggghts_id in sorted(atoms):
+            values = atoms[liggghts_id]
+            coordinates, data = interpreter.convert_atom_values(values)
+            data.update(
                 interpreter.convert_velocity_values(velocities[liggghts_id]))
 
-            cache_pc.update_particles([p])
+            # the type is not changed by liggghts (and is either the
+            # particle's own type or the one of its container)
+            material_type = data[CUBA.MATERIAL_TYPE]
+            del data[CUBA.MATERIAL_TYPE]
+
+            if liggghts_id not in self._liggghtsid_to_uid:
+                inserted.setdefault(material_type, []).append(
+                    (coordinates, data))
+                continue
 
-            # TODO #9 (removing material type
-            atom_type = p.data[CUBA.MATERIAL_TYPE]
-            del p.data[CUBA.MATERIAL_TYPE]
+            uname, uid = self._liggghtsid_to_uid[liggghts_id]
+            columns = self._pc_cache[uname]
+            columns.set_values_at(columns.index_of(uid),
+                                  coordinates=coordinates,
+                                  data=data)
+
+        for material_type, particles in inserted.iteritems():
+            uname = self._get_insertion_target(material_type, len(particles))
+            uids = [uuid.uuid4() for _ in particles]
+            self.add_particles(
+                (Particle(uid=uid, coordinates=coordinates, data=data)
+                 for uid, (coordinates, data) in zip(uids, particles)),
+                uname)
 
-            # set the pc's material type
-            # (current requirement/assumption is that each
-            # pc has particle containers of one type)
-            # (also related to #9)
-            cache_pc.data[CUBA.MATERIAL_TYPE] = atom_type
+        # update each particle container with these
+        # material-specific attributes
+        # (the data is replaced and not changed in place as it might be
+        # referenced by a read-only snapshot)
+        for uname, pc_data in self._pc_data.items():
+            new_data = DataContainer(pc_data)
+            new_data.update(type_data[pc_data[CUBA.MATERIAL_TYPE]])
+            if new_data != pc_data:
+                self._pc_data[uname] = new_data
 
     def _write_data_file(self, filename):
         """ Write data file containing current state of simulation
@@ -335,10 +505,20 @@ class LiggghtsFileIoDataManager(ABCDataManager):
         # and collect the different material types
         # in oder to determine the number of types
         num_particles = sum(
-            pc.count_of(
-                CUBA.PARTICLE) for pc in self._pc_cache.itervalues())
-        types = set(pc.data[CUBA.MATERIAL_TYPE]
-                    for pc in self._pc_cache.itervalues())
+            len(columns) for columns in self._pc_cache.itervalues())
+        # (including the types particles were given)
+        types = set(pc_data[CUBA.MATERIAL_TYPE]
+                    for pc_data in self._pc_data.itervalues())
+        types.update(self.get_all_types().tolist())
+        number_atom_types = len(types)
+        if self._number_types is not None:
+            # the material tables are given for number_types types
+            for material_type in sorted(types):
+                if not 1 <= material_type <= self._number_types:
+                    raise ValueError(
+                        "Material type ({}) has to be between 1 and "
+                        "{}".format(material_type, self._number_types))
+            number_atom_types = self._number_types
 
         box = get_box([de for _, de in self._dc_extension_cache.iteritems()])
 
@@ -348,13 +528,15 @@ class LiggghtsFileIoDataManager(ABCDataManager):
         writer = LiggghtsDataFileWriter(filename,
                                         atom_style=self._atom_style,
                                         number_atoms=num_particles,
-                                        number_atom_types=len(types),
+                                        number_atom_types=number_atom_types,
                                         simulation_box=box,
                                         material_type_to_mass=mass)
-        for uname, pc in self._pc_cache.iteritems():
-            material_type = pc.data[CUBA.MATERIAL_TYPE]
-            for p in pc.iter_particles():
-                liggghts_id = writer.write_atom(p, material_type)
+        for uname in self._pc_cache:
+            material_type = self._pc_data[uname][CUBA.MATERIAL_TYPE]
+            # views avoid copying the data of each particle
+            for p in self.iter_particle_views(uname):
+                liggghts_id = writer.write_atom(
+                    p, p.data.get(CUBA.MATERIAL_TYPE, material_type))
                 self._liggghtsid_to_uid[liggghts_id] = (uname, p.uid)
         writer.close()
 
@@ -374,8 +556,7 @@ class LiggghtsFileIoDataManager(ABCDataManager):
 
         """
         mass = {}
-        for uname, pc in self._pc_cache.iteritems():
-            data = pc.data
+        for uname, data in self._pc_data.iteritems():
             material_type = data[CUBA.MATERIAL_TYPE]
             if material_type in mass:
                 # check that mass is consistent with an matching type
@@ -0,0 +1,183 @@
+""" LIGGGHTS log parser
+
+This module provides a way to extract information (e.g. the timing
+breakdown or the number of neighbor list builds) from the log file
+written by liggghts
+"""
+import re
+
+# mapping of the (abbreviated) section names used by LIGGGHTS
+_section_names = {"Outpt": "Output",
+                  "Modfy": "Modify"}
+
+# e.g. "Pair  time (%) = 0.0123 (45.6)"
+_timing_line_re = re.compile(
+    r"^\s*(\w+)\s+time \(%\)\s*=\s*([-+.\deE]+)")
+
+# e.g. "Pair    | 0.01 | 0.012 | 0.014 |   1.2 | 45.6"
+# (newer versions of the log, the average time is used)
+_timing_table_re = re.compile(
+    r"^\s*([A-Z]\w*)\s*\|[^|]*\|\s*([-+.\deE]+)\s*\|")
+
+# e.g. "Loop time of 0.0283 on 1 procs for 100 steps with 1000 atoms"
+_loop_time_re = re.compile(r"^\s*Loop time of\s+([-+.\deE]+)")
+_loop_steps_re = re.compile(r"^\s*Loop time of .* for\s+(\d+)\s+steps")
+
+# e.g. "Neighbor list builds = 12" and "Dangerous builds = 0"
+_builds_re = re.compile(r"^\s*Neighbor list builds\s*=\s*(\d+)")
+_dangerous_builds_re = re.compile(r"^\s*Dangerous builds\s*=\s*(\d+)")
+
+
+def parse_timing(log_text):
+    """ Parse the timing breakdown from a LIGGGHTS log
+
+    The timing of each run in the log is summed up.
+
+    Parameters
+    ----------
+    log_text : str
+        contents of a LIGGGHTS log file
+
+    Returns
+    -------
+    timing : dict
+        map from section (e.g. 'Pair', 'Neigh', 'Comm', 'Output', 'Modify',
+        'Other' and 'Loop' for the total loop time) to time in seconds
+
+    """
+    timing = {}
+    for line in log_text.splitlines():
+        match = _loop_time_re.match(line)
+        if match:
+            _add(timing, "Loop", match.group(1))
+            continue
+
+        match = _timing_line_re.match(line)
+        if match:
+            _add(timing, match.group(1), match.group(2))
+            continue
+
+        match = _timing_table_re.match(line)
+        if match:
+            _add(timing, match.group(1), match.group(2))
+    return timing
+
+
+def parse_timing_file(filename):
+    """ Parse the timing breakdown from a LIGGGHTS log file
+
+    Parameters
+    ----------
+    filename : str
+        name of log file
+
+    Returns
+    -------
+    timing : dict
+        see parse_timing (empty if file does not exist)
+
+    """
+    log_text = _read(filename)
+    return {} if log_text is None else parse_timing(log_text)
+
+
+def parse_neighbor_builds(log_text):
+    """ Parse the number of neighbor list builds from a LIGGGHTS log
+
+    The builds of each run in the log are summed up.
+
+    Parameters
+    ----------
+    log_text : str
+        contents of a LIGGGHTS log file
+
+    Returns
+    -------
+    builds : tuple
+        number of builds and of dangerous builds (None if the log
+        does not report them, e.g. 'Dangerous builds not checked')
+
+    """
+    builds = None
+    dangerous_builds = None
+    for line in log_text.splitlines():
+        match = _builds_re.match(line)
+        if match:
+            builds = (builds or 0) + int(match.group(1))
+            continue
+
+        match = _dangerous_builds_re.match(line)
+        if match:
+            dangerous_builds = (dangerous_builds or 0) + int(match.group(1))
+    return builds, dangerous_builds
+
+
+def parse_neighbor_builds_file(filename):
+    """ Parse the number of neighbor list builds from a LIGGGHTS log file
+
+    Parameters
+    ----------
+    filename : str
+        name of log file
+
+    Returns
+    -------
+    builds : tuple
+        see parse_neighbor_builds ((None, None) if file does not exist)
+
+    """
+    log_text = _read(filename)
+    return (None, None) if log_text is None \
+        else parse_neighbor_builds(log_text)
+
+
+def parse_number_steps(log_text):
+    """ Parse the number of steps which were run from a LIGGGHTS log
+
+    The steps of each run in the log are summed up (a run stopped early,
+    e.g. by 'fix halt', reports the steps it actually ran).
+
+    Parameters
+    ----------
+    log_text : str
+        contents of a LIGGGHTS log file
+
+    """
+    return sum(int(match.group(1))
+               for match in (_loop_steps_re.match(line)
+                             for line in log_text.splitlines())
+               if match)
+
+
+def parse_number_steps_file(filename):
+    """ Parse the number of steps which were run from a LIGGGHTS log file
+
+    Parameters
+    ----------
+    filename : str
+        name of log file
+
+    Returns
+    -------
+    number_steps : int
+        see parse_number_steps (None if file does not exist)
+
+    """
+    log_text = _read(filename)
+    return None if log_text is None else parse_number_steps(log_text)
+
+
+def _read(filename):
+    """ Returns contents of file (None if it cannot be read)
+
+    """
+    try:
+        with open(filename, 'r') as log_file:
+            return log_file.read()
+    except IOError:
+        return None
+
+
+def _add(timing, section, value):
+    section = _section_names.get(section, section)
+    timing[section] = timing.get(section, 0.0) + float(value)
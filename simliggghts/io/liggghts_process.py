@@ -6,6 +6,10 @@ This module provides a way to run the liggghts
 import os
 import subprocess
 
+from .liggghts_log_parser import (parse_neighbor_builds_file,
+                                  parse_number_steps_file,
+                                  parse_timing_file)
+
 
 class LiggghtsProcess(object):
     """ Class runs the liggghts program
@@ -17,14 +21,24 @@ class LiggghtsProcess(object):
     log_directory : str, optional
         name of directory of log file ('log.liggghts') for liggghts.
         If not given, then pwd is where 'log.liggghts' will be written.
+    instrumentation : Instrumentation, optional
+        if given (and enabled), the timing breakdown and the number of
+        neighbor list builds of LIGGGHTS are parsed from the log and
+        recorded after each run
+    mpi : MpiSettings, optional
+        if given, liggghts is started on several processes through the
+        MPI launcher (see simliggghts.config.parallel)
 
     Raises
     ------
     RuntimeError
         if liggghts did not run correctly
     """
-    def __init__(self, liggghts_name="liggghts", log_directory=None):
+    def __init__(self, liggghts_name="liggghts", log_directory=None,
+                 instrumentation=None, mpi=None):
         self._liggghts_name = liggghts_name
+        self._mpi = mpi
+        self._instrumentation = None
         self._returncode = 0
         self._stderr = ""
         self._stdout = ""
@@ -44,6 +58,9 @@ class LiggghtsProcess(object):
                 msg += " stdout/err: " + self._stdout + " " + self._stderr
             raise RuntimeError(msg)
 
+        # only set now so the test run above is not recorded
+        self._instrumentation = instrumentation
+
     def run(self, commands):
         """Run liggghts with a set of commands
 
@@ -58,13 +75,17 @@ class LiggghtsProcess(object):
             if Liggghts did not run correctly
         """
 
+        args = [self._liggghts_name, '-log', self._log]
+        if self._mpi:
+            args = self._mpi.get_launcher_args() + args
+
         proc = subprocess.Popen(
-            [self._liggghts_name, '-log', self._log], stdin=subprocess.PIPE,
+            args, stdin=subprocess.PIPE,
             stdout=subprocess.PIPE, stderr=subprocess.PIPE)
         self._stdout, self._stderr = proc.communicate(commands)
         self._returncode = proc.returncode
 
-        if self._returncode != 0 or self._stderr:
+        if self._returncode != 0 or self._has_error():
             msg = "LIGGGHTS ('{}') did not run correctly. ".format(
                 self._liggghts_name)
             msg += "Error code: {} ".format(proc.returncode)
@@ -73,3 +94,26 @@ class LiggghtsProcess(object):
             if self._stdout:
                 msg += "stdout: \'{}\n\'".format(self._stdout)
             raise RuntimeError(msg)
+
+        if self._instrumentation and self._instrumentation.enabled:
+            self._instrumentation.set_liggghts_timing(
+                parse_timing_file(self._log))
+            self._instrumentation.set_neighbor_builds(
+                *parse_neighbor_builds_file(self._log))
+
+    def _has_error(self):
+        """ Returns if liggghts reported an error (on stderr)
+
+        MPI launchers also write warnings (e.g. about the network
+        interfaces) to stderr, so then only errors of liggghts count.
+
+        """
+        if self._mpi:
+            return "ERROR" in self._stderr
+        return bool(self._stderr)
+
+    def get_number_steps(self):
+        """Returns the number of steps of the last run (from the log)
+
+        """
+        return parse_number_steps_file(self._log)
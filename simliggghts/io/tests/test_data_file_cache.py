@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from simliggghts.io.data_file_cache import (CACHE_DIRECTORY_NAME,
+                                            DataFileCache)
+from simliggghts.io.liggghts_data_file_parser import LiggghtsDataFileParser
+from simliggghts.io.liggghts_simple_data_handler import (
+    LiggghtsSimpleDataHandler)
+
+_data_file_contents = """LIGGGHTS data file via write_data
+
+2 atoms
+2 atom types
+
+-10.0000000000000000e+00 15.0000000000000000e+00 xlo xhi
+-7.5000000000000000e+00 7.5000000000000000e+00 ylo yhi
+-5.0000000000000000e-01 5.0000000000000000e-01 zlo zhi
+
+Atoms # granular
+
+1 1 0.5 1.0000000000000000e+00 -5.0 0.0 0.0000000000000000e+00 0 0 0
+2 2 0.5 1.0000000000000000e+00 10.0 0.0 0.0000000000000000e+00 0 0 0
+
+Velocities
+
+1 5.0 0.0 0.0 0.0 0.0 1.0
+2 5.0 0.0 0.0 0.0 0.0 1.0
+"""
+
+
+class TestDataFileCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.filename = self._write_file("data.txt")
+        self.cache = DataFileCache(os.path.join(self.temp_dir, "cache"))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write_file(self, name, contents=_data_file_contents):
+        filename = os.path.join(self.temp_dir, name)
+        with open(filename, "w") as data_file:
+            data_file.write(contents)
+        return filename
+
+    def _assert_same(self, handler, expected):
+        self.assertEqual(handler.get_atoms(), expected.get_atoms())
+        self.assertEqual(handler.get_velocities(), expected.get_velocities())
+        self.assertEqual(handler.get_masses(), expected.get_masses())
+        self.assertEqual(handler.get_number_atom_types(),
+                         expected.get_number_atom_types())
+        self.assertEqual(handler.get_box_origin(),
+                         expected.get_box_origin())
+        self.assertEqual(handler.get_box_vectors(),
+                         expected.get_box_vectors())
+        self.assertEqual(handler.get_atom_type(), expected.get_atom_type())
+
+    def test_parsed_values_are_cached(self):
+        expected = LiggghtsSimpleDataHandler()
+        LiggghtsDataFileParser(expected).parse(self.filename)
+
+        self.assertIsNone(self.cache.load(self.filename))
+        self._assert_same(self.cache.parse(self.filename), expected)
+        self._assert_same(self.cache.load(self.filename), expected)
+
+    def test_changed_file_is_parsed_again(self):
+        self.cache.parse(self.filename)
+
+        self._write_file("data.txt", _data_file_contents.replace(
+            "1 5.0 0.0 0.0", "1 6.0 0.0 0.0"))
+        # (same size, so only the modification time differs)
+        status = os.stat(self.filename)
+        os.utime(self.filename, (status.st_atime, status.st_mtime + 10.0))
+        self.assertIsNone(self.cache.load(self.filename))
+        self.assertEqual(
+            self.cache.parse(self.filename).get_velocities()[1][0], 6.0)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        filenames = [self._write_file("data{}.txt".format(i))
+                     for i in range(3)]
+        self.cache.parse(filenames[0])
+        entry_size = os.path.getsize(os.path.join(
+            self.cache.directory, os.listdir(self.cache.directory)[0]))
+        self.cache.max_size = 2 * entry_size
+
+        self.cache.parse(filenames[1])
+        # the first entry is used again (so the second one is older)
+        time.sleep(0.01)
+        self.assertIsNotNone(self.cache.load(filenames[0]))
+        time.sleep(0.01)
+        self.cache.parse(filenames[2])
+
+        self.assertEqual(len(os.listdir(self.cache.directory)), 2)
+        self.assertIsNotNone(self.cache.load(filenames[0]))
+        self.assertIsNone(self.cache.load(filenames[1]))
+        self.assertIsNotNone(self.cache.load(filenames[2]))
+
+        self.cache.clear()
+        self.assertEqual(os.listdir(self.cache.directory), [])
+
+    def test_next_to(self):
+        cache = DataFileCache.next_to(self.filename)
+        self.assertEqual(cache.directory,
+                         os.path.join(self.temp_dir, CACHE_DIRECTORY_NAME))
+
+
+if __name__ == '__main__':
+    unittest.main()
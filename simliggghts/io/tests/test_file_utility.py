@@ -58,6 +58,25 @@ class TestFileUtility(unittest.TestCase):
             assert_almost_equal(p.data[CUBA.RADIUS], 0.5/2)
             assert_almost_equal(p.data[CUBA.DENSITY], 1.0)
 
+    def test_read_with_cache(self):
+        filename = self._write_example_file(
+            _explicit_sphere_style_file_contents)
+        cache_dir = os.path.join(self.temp_dir, "cache")
+
+        # when (the second read uses the cache)
+        read_data_file(filename, cache=cache_dir)
+        particles_list = read_data_file(filename, cache=cache_dir)
+
+        # then
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        self.assertEqual(
+            [particles.count_of(CUBA.PARTICLE) for particles in
+             particles_list],
+            [particles.count_of(CUBA.PARTICLE) for particles in
+             read_data_file(filename)])
+        for p in particles_list[0].iter(item_type=CUBA.PARTICLE):
+            assert_almost_equal(p.data[CUBA.VELOCITY], [5.0, 0.0, 0.0])
+
     def test_write_file_sphere(self):
         # given
         original_particles_list = read_data_file(self._write_example_file(
@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from simliggghts.io.liggghts_log_parser import (parse_neighbor_builds,
+                                                parse_number_steps,
+                                                parse_timing,
+                                                parse_timing_file)
+
+_old_log = """
+Loop time of 0.5 on 1 procs for 100 steps with 1000 atoms
+
+Pair  time (%) = 0.2 (40.0)
+Neigh time (%) = 0.1 (20.0)
+Comm  time (%) = 0.05 (10.0)
+Outpt time (%) = 0.05 (10.0)
+Other time (%) = 0.1 (20.0)
+"""
+
+_new_log = """
+Loop time of 0.5 on 1 procs for 100 steps with 1000 atoms
+
+MPI task timing breakdown:
+Section |  min time  |  avg time  |  max time  |%varavg| %total
+---------------------------------------------------------------
+Pair    | 0.2        | 0.2        | 0.2        |   0.0 | 40.00
+Neigh   | 0.1        | 0.1        | 0.1        |   0.0 | 20.00
+Modify  | 0.1        | 0.1        | 0.1        |   0.0 | 20.00
+Other   |            | 0.1        |            |       | 20.00
+
+Total # of neighbors = 5000
+Ave neighs/atom = 5
+Neighbor list builds = 12
+Dangerous builds = 1
+"""
+
+
+class TestLiggghtsLogParser(unittest.TestCase):
+
+    def test_parse_old_format(self):
+        timing = parse_timing(_old_log)
+        self.assertAlmostEqual(timing["Loop"], 0.5)
+        self.assertAlmostEqual(timing["Pair"], 0.2)
+        self.assertAlmostEqual(timing["Output"], 0.05)
+        self.assertAlmostEqual(timing["Other"], 0.1)
+
+    def test_parse_new_format(self):
+        timing = parse_timing(_new_log)
+        self.assertEqual(set(timing),
+                         set(["Loop", "Pair", "Neigh", "Modify", "Other"]))
+        self.assertAlmostEqual(timing["Neigh"], 0.1)
+        self.assertAlmostEqual(timing["Other"], 0.1)
+
+    def test_timing_of_runs_is_summed(self):
+        timing = parse_timing(_old_log + _old_log)
+        self.assertAlmostEqual(timing["Loop"], 1.0)
+        self.assertAlmostEqual(timing["Pair"], 0.4)
+
+    def test_parse_neighbor_builds(self):
+        self.assertEqual(parse_neighbor_builds(_new_log + _new_log),
+                         (24, 2))
+        self.assertEqual(parse_neighbor_builds(_old_log), (None, None))
+        self.assertEqual(
+            parse_neighbor_builds("Neighbor list builds = 3\n"
+                                  "Dangerous builds not checked\n"),
+            (3, None))
+
+    def test_parse_number_steps(self):
+        self.assertEqual(parse_number_steps(_old_log + _new_log), 200)
+        self.assertEqual(parse_number_steps(
+            "Loop time of 0.1 on 1 procs for 37 steps with 10 atoms\n"), 37)
+        self.assertEqual(parse_number_steps(""), 0)
+
+    def test_parse_file(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(temp_dir, "log.liggghts")
+            with open(filename, "w") as log_file:
+                log_file.write(_new_log)
+            self.assertAlmostEqual(parse_timing_file(filename)["Pair"], 0.2)
+            self.assertEqual(
+                parse_timing_file(os.path.join(temp_dir, "missing")), {})
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -13,6 +13,13 @@ class LiggghtsParticles(ABCParticles):
         holds data
     data_extension : dict
         holds non-approved CUBA keywords
+    data_snapshot : ReadOnlyDataContainer
+        read-only view of data (no copy is made, unlike for data)
+    data_extension_snapshot : ReadOnlyDataContainer
+        read-only view of data_extension
+    derived_quantities : DerivedQuantities
+        mass, volume and moment of inertia of each particle (read-only
+        arrays computed from the radius and density of all particles)
 
     """
     def __init__(self, manager, uname):
@@ -44,6 +51,18 @@ class LiggghtsParticles(ABCParticles):
     def data_extension(self, value):
         self._manager.set_data_extension(value, self._uname)
 
+    @property
+    def data_snapshot(self):
+        return self._manager.get_data_snapshot(self._uname)
+
+    @property
+    def data_extension_snapshot(self):
+        return self._manager.get_data_extension_snapshot(self._uname)
+
+    @property
+    def derived_quantities(self):
+        return self._manager.get_derived_quantities(self._uname)
+
     # Particle methods ######################################################
 
     def _add_particles(self, iterable):
@@ -104,8 +123,70 @@ class LiggghtsParticles(ABCParticles):
         """Get iterator over particles
 
         """
-        for p in self._manager.iter_particles(self._uname, uids):
-            yield p
+        # iteration happens outside of a run so it is only passed
+        # to the profiling hooks
+        with self._manager.instrumentation.phase(
+                "iterate", record_statistics=False):
+            for p in self._manager.iter_particles(self._uname, uids):
+                yield p
+
+    def iter_particle_views(self, uids=None):
+        """Get iterator over lightweight views of the particles
+
+        Compared to iterating over particles, no copy of the coordinates
+        and data is made for each particle. The views have the same
+        attributes as a Particle (uid, coordinates and data); changes to a
+        view are written through when the view is passed to update.  Use
+        to_particle() to get a stand-alone Particle of a view.
+
+        Parameters
+        ----------
+        uids : list of particle uids, optional
+            sequence of uids of particles that should be iterated over. If
+            uids is None then all particles will be iterated over.
+
+        """
+        with self._manager.instrumentation.phase(
+                "iterate", record_statistics=False):
+            for p in self._manager.iter_particle_views(self._uname, uids):
+                yield p
+
+    def sort_spatially(self):
+        """Order the particles along a Morton curve of their coordinates
+
+        Afterwards, the particles (and views) are iterated over in a
+        spatially coherent order (and the derived quantities are given in
+        this order). Particles added later come last until the particles
+        are sorted again.
+
+        """
+        self._manager.sort_spatially(self._uname)
+
+    def set_external_forces(self, forces, uids=None):
+        """Set the external force (CUBA.EXTERNAL_APPLIED_FORCE) of particles
+
+        All forces are set at once (e.g. the forces computed by a coupled
+        fluid solver each step) instead of updating each particle.
+
+        Parameters
+        ----------
+        forces : array_like
+            force of each particle (shape (N, 3))
+        uids : list of particle uids, optional
+            uids of the particles (in the order of forces). If uids is None
+            then the forces are given in the order the particles are
+            iterated over.
+
+        Raises
+        ------
+        KeyError
+            if a particle does not exist
+        ValueError
+            if the number of forces does not match
+
+        """
+        self._manager.set_values(self._uname, CUBA.EXTERNAL_APPLIED_FORCE,
+                                 forces, uids)
 
     # Bond methods #######################################################
 
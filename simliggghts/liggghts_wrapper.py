@@ -4,19 +4,29 @@ This module provides a wrapper for  LIGGGHTS
 """
 import contextlib
 import os
+import pickle
+import sys
 import tempfile
 import shutil
+import traceback
+
+import numpy
 
 from simphony.cuds.abc_modeling_engine import ABCModelingEngine
 from simphony.cuds.abc_particles import ABCParticles
+from simphony.core.cuba import CUBA
 from simphony.core.data_container import DataContainer
+from simphony.cuds.particles import Particles
 
-from .io.liggghts_fileio_data_manager import LiggghtsFileIoDataManager
-from .io.liggghts_process import LiggghtsProcess
-from .internal.liggghts_internal_data_manager import (
-    LiggghtsInternalDataManager)
 from .config.script_writer import ScriptWriter
+from .config.neighbor import get_neighbor_settings
+from .config.time_step import get_stable_time_step
+from .config.script_builder import ScriptBuilder
+from .common import globals
+from .common.atom_schema import AtomField, get_schema
 from .common.atom_style import AtomStyle
+from .common.coarse_graining import coarsen, refine
+from .common.instrumentation import Instrumentation
 from .cuba_extension import CUBAExtension
 
 
@@ -28,8 +38,10 @@ def _temp_directory():
     and this directory is deleted when context is exited
     """
     temp_dir = tempfile.mkdtemp()
-    yield temp_dir
-    shutil.rmtree(temp_dir)
+    try:
+        yield temp_dir
+    finally:
+        shutil.rmtree(temp_dir)
 
 
 class LiggghtsWrapper(ABCModelingEngine):
@@ -37,7 +49,10 @@ class LiggghtsWrapper(ABCModelingEngine):
 
 
     """
-    def __init__(self, use_internal_interface=False):
+    def __init__(self, use_internal_interface=False,
+                 collect_statistics=False, number_types=None,
+                 spatial_sort_interval=None, tune_neighbor=False,
+                 auto_time_step=False, mpi=None, coarse_graining_factor=None):
         """ Constructor.
 
         Parameters
@@ -50,23 +65,104 @@ class LiggghtsWrapper(ABCModelingEngine):
             communicating with LIGGGHTS, if false, then file-io interface is
             used where input/output files are used to communicate with LIGGGHTS
 
+        collect_statistics : bool, optional
+            If true, then statistics (wall time, bytes transferred etc.)
+            of each phase of a run are recorded (see run_statistics)
+
+        number_types : int, optional
+            number of atom types (i.e. of different CUBA.MATERIAL_TYPE)
+            which the material parameters (SP) and fixed groups (BC) are
+            given for (default: MAX_NUMBER_TYPES)
+
+        spatial_sort_interval : int, optional
+            If given, the particles of each dataset are sorted spatially
+            (along a Morton curve of their coordinates) after every
+            spatial_sort_interval runs, so that iterating over them (and
+            their derived quantities) is in a spatially coherent order
+
+        tune_neighbor : bool, optional
+            If true, then the neighbor skin, bin size and how often the
+            neighbor lists are checked are derived from the radii and
+            velocities of the particles and the time step before each run
+            (see simliggghts.config.neighbor). Otherwise fixed settings
+            are used (the lists are checked every step). As the tuned
+            interval of the checks is derived from the speeds at the start
+            of a run, it can be too long if the particles are accelerated
+            (e.g. by gravity) during the run.
+
+        auto_time_step : bool, optional
+            If true, then the largest stable time step is derived from the
+            radii, densities, velocities and materials of the particles
+            (Rayleigh and Hertz time, see simliggghts.config.time_step)
+            before each run. A configured CM[CUBA.TIME_STEP] is then only
+            used as upper bound.
+
+        mpi : MpiSettings, optional
+            If given, LIGGGHTS is started on several processes through an
+            MPI launcher (e.g. 'mpirun -np 4') with a grid of processors
+            and optional balancing (see simliggghts.config.parallel).
+            Only supported by the file-io interface.
+
+        coarse_graining_factor : float, optional
+            If given (and larger than 1), the particles of each added
+            dataset are replaced by fewer, larger parcels (each of about
+            coarse_graining_factor**3 particles of the same total mass)
+            and LIGGGHTS scales the contact models accordingly. The
+            results can be mapped back onto the original particles with
+            iter_original_particles (see simliggghts.common.coarse_graining).
+            The factor is stored in
+            SP_extension[CUBAExtension.COARSE_GRAINING_FACTOR].
+
+        Raises
+        ------
+        ValueError
+            if mpi is given for the internal interface
+
         """
+        if use_internal_interface and mpi is not None:
+            raise ValueError(
+                "Running on several processes (mpi) is only supported by "
+                "the file-io interface")
 
         self._use_internal_interface = use_internal_interface
+        self._instrumentation = Instrumentation(enabled=collect_statistics)
 
         atom_style = AtomStyle.GRANULAR
+        if number_types is None:
+            number_types = globals.MAX_NUMBER_TYPES
+        self._number_types = number_types
+        self._tune_neighbor = tune_neighbor
+        self._auto_time_step = auto_time_step
+        self._mpi = mpi
+        # map from unique name (which does not change when a dataset is
+        # renamed) to ParcelMap (of coarse-grained datasets)
+        self._parcel_maps = {}
+        # (condition, maximum number of steps, check interval) ending the
+        # current run (see run_until) and the number of steps of the run
+        self._halt = None
+        self._number_steps = None
         self._executable_name = "liggghts"
-        self._script_writer = ScriptWriter(atom_style)
-
+        # keeps track of the configuration in order to only
+        # validate/generate commands that changed
+        self._script_builder = ScriptBuilder(atom_style, number_types)
+        # per-atom values exchanged with LIGGGHTS
+        self._schema = get_schema(atom_style)
+
+        # only the modules of the used interface are imported and LIGGGHTS
+        # itself is only started once the first dataset is added
         if self._use_internal_interface:
-            import liggghts
-            self._liggghts = liggghts.liggghts(
-                cmdargs=["-screen", "none", "-log", "none"])
+            from .internal.liggghts_internal_data_manager import (
+                LiggghtsInternalDataManager)
             self._data_manager = LiggghtsInternalDataManager(
-                self._liggghts, atom_style)
+                _create_liggghts, atom_style, self._instrumentation,
+                number_types, self._schema, spatial_sort_interval)
 
         else:
-            self._data_manager = LiggghtsFileIoDataManager(atom_style)
+            from .io.liggghts_fileio_data_manager import (
+                LiggghtsFileIoDataManager)
+            self._data_manager = LiggghtsFileIoDataManager(
+                atom_style, self._instrumentation, number_types,
+                spatial_sort_interval)
 
         self.BC = DataContainer()
         self.CM = DataContainer()
@@ -75,6 +171,223 @@ class LiggghtsWrapper(ABCModelingEngine):
         self.SP_extension = {}
         self.BC_extension = {}
 
+        if coarse_graining_factor is not None:
+            self.SP_extension[CUBAExtension.COARSE_GRAINING_FACTOR] = \
+                coarse_graining_factor
+
+    @property
+    def number_types(self):
+        """ Number of atom types (fixed when the wrapper is created)
+
+        """
+        return self._number_types
+
+    def register_atom_field(self, cuba, liggghts_name, count=1, default=0.0):
+        """ Register a per-atom value stored by a 'fix property/atom'
+
+        The fix is created (with the default value) when running and the
+        values of the particles are exchanged with LIGGGHTS like the other
+        per-atom values (e.g. CUBA.VELOCITY) once a particle provides one.
+
+        Parameters
+        ----------
+        cuba : CUBA
+            CUBA key of the value (in the data of the particles)
+        liggghts_name : str
+            id of the fix (and name of the property)
+        count : int, optional
+            number of values per atom (1 for a scalar)
+        default : float, optional
+            default value
+
+        Raises
+        ------
+        RuntimeError
+            if the file-io interface is used (fix properties are not
+            part of the data files)
+        ValueError
+            if a value is already registered for cuba or liggghts_name
+
+        """
+        if not self._use_internal_interface:
+            raise RuntimeError(
+                "Per-atom values of fixes are only supported "
+                "by the internal interface")
+
+        self._data_manager.register_atom_field(
+            AtomField(cuba, liggghts_name, count=count, fix=True,
+                      default=default))
+
+    def set_body_force(self, force, material_type=None):
+        """ Set a uniform body force acting on each (non-fixed) particle
+
+        The body force is stored in BC_extension[CUBAExtension.BODY_FORCE]
+        and applied by a single 'fix addforce' (together with the
+        acceleration in BC_extension[CUBAExtension.GRAVITY]) instead of
+        by a force given for each particle.
+
+        Parameters
+        ----------
+        force : sequence of float
+            force (vector) acting on each particle
+        material_type : int, optional
+            if given, the force only acts on the particles of this type
+            (otherwise on all particles)
+
+        Raises
+        ------
+        ValueError
+            if material_type is not one of the atom types
+
+        """
+        force = tuple(float(value) for value in force)
+        if material_type is None:
+            self.BC_extension[CUBAExtension.BODY_FORCE] = force
+            return
+
+        if not 1 <= material_type <= self._number_types:
+            raise ValueError(
+                "Material type ({}) has to be between 1 and {}".format(
+                    material_type, self._number_types))
+
+        forces = self.BC_extension.get(CUBAExtension.BODY_FORCE,
+                                       (0.0, 0.0, 0.0))
+        if numpy.shape(forces) == (3,):
+            forces = [tuple(forces)] * self._number_types
+        forces = [tuple(f) for f in forces]
+        forces[material_type - 1] = force
+        self.BC_extension[CUBAExtension.BODY_FORCE] = forces
+
+    def add_insertion(self, name, insertion):
+        """ Let LIGGGHTS insert particles into a dataset during the runs
+
+        The insertion (of the type of the dataset) is stored in
+        BC_extension[CUBAExtension.PARTICLE_INSERTIONS] and carried out by
+        LIGGGHTS' insertion fixes. The inserted particles are added (with
+        new uids) to the dataset after each run.
+
+        Parameters
+        ----------
+        name : str
+            name of the dataset (particle container)
+        insertion : ParticleInsertion
+            size distribution, density, number and region or face of the
+            inserted particles (see simliggghts.config.insertion)
+
+        Raises
+        ------
+        ValueError
+            if there is no dataset with the name or there is already an
+            insertion of the type of the dataset
+
+        """
+        if name not in self._data_manager:
+            raise ValueError(
+                'Particle container \'{}\' does not exist'.format(name))
+
+        material_type = self._data_manager[name].data[CUBA.MATERIAL_TYPE]
+        insertions = dict(self.BC_extension.get(
+            CUBAExtension.PARTICLE_INSERTIONS, {}))
+        if material_type in insertions:
+            raise ValueError(
+                "There is already an insertion of type {}".format(
+                    material_type))
+
+        insertions[material_type] = insertion
+        self.BC_extension[CUBAExtension.PARTICLE_INSERTIONS] = insertions
+        self._data_manager.set_insertion_target(name, material_type)
+
+    def remove_insertion(self, name):
+        """ Stop the insertion of particles into a dataset
+
+        Parameters
+        ----------
+        name : str
+            name of the dataset (particle container)
+
+        Raises
+        ------
+        ValueError
+            if there is no insertion into the dataset
+
+        """
+        insertions = dict(self.BC_extension.get(
+            CUBAExtension.PARTICLE_INSERTIONS, {}))
+        material_type = self._data_manager[name].data[CUBA.MATERIAL_TYPE] \
+            if name in self._data_manager else None
+        if material_type not in insertions:
+            raise ValueError(
+                "There is no insertion into '{}'".format(name))
+
+        del insertions[material_type]
+        self.BC_extension[CUBAExtension.PARTICLE_INSERTIONS] = insertions
+        self._data_manager.remove_insertion_target(material_type)
+
+    @property
+    def collect_statistics(self):
+        """ If statistics of each run are recorded
+
+        """
+        return self._instrumentation.enabled
+
+    @collect_statistics.setter
+    def collect_statistics(self, value):
+        self._instrumentation.enabled = bool(value)
+
+    @property
+    def run_statistics(self):
+        """ Statistics of the last run (RunStatistics)
+
+        The statistics contain the wall time, number of bytes transferred
+        and number of particles of each phase of the run (e.g. 'flush',
+        'setup', 'liggghts', 'read') as well as, if available, the timing
+        breakdown reported by LIGGGHTS.  None if no run has been performed
+        while collect_statistics was enabled.
+
+        """
+        return self._instrumentation.statistics
+
+    def add_profiling_hook(self, hook):
+        """ Attach a hook (e.g. a profiler) to the phases of the wrapper
+
+        The hook is notified whenever a phase (e.g. 'run', 'flush',
+        'liggghts', 'read' or 'iterate') is entered and exited.
+
+        Parameters
+        ----------
+        hook : ProfilingHook
+            hook to be attached (see simliggghts.common.profiling)
+
+        """
+        self._instrumentation.hooks.append(hook)
+
+    def remove_profiling_hook(self, hook):
+        """ Detach a hook from the phases of the wrapper
+
+        Parameters
+        ----------
+        hook : ProfilingHook
+            hook to be removed
+
+        """
+        self._instrumentation.hooks.remove(hook)
+
+    @contextlib.contextmanager
+    def profile(self, hook):
+        """ Context manager attaching a hook while the context is entered
+
+        Parameters
+        ----------
+        hook : ProfilingHook
+            hook to be attached (see simliggghts.common.profiling)
+
+        """
+        self.add_profiling_hook(hook)
+        try:
+            yield hook
+        finally:
+            self.remove_profiling_hook(hook)
+
     def add_dataset(self, container):
         """Add a CUDS container
 
@@ -100,8 +413,15 @@ class LiggghtsWrapper(ABCModelingEngine):
             raise ValueError(
                 'Particle container \'{}\' already exists'.format(
                     container.name))
-        else:
-            self._data_manager.new_particles(container)
+
+        parcel_map = None
+        factor = self.SP_extension.get(CUBAExtension.COARSE_GRAINING_FACTOR)
+        if factor is not None and factor > 1.0:
+            container, parcel_map = self._coarsen(container, factor)
+        self._data_manager.new_particles(container)
+        if parcel_map is not None:
+            self._parcel_maps[
+                self._data_manager.get_uname(container.name)] = parcel_map
 
     def get_dataset(self, name):
         """ Get the dataset
@@ -154,6 +474,7 @@ class LiggghtsWrapper(ABCModelingEngine):
 
         """
         if name in self._data_manager:
+            self._parcel_maps.pop(self._data_manager.get_uname(name), None)
             del self._data_manager[name]
         else:
             raise ValueError(
@@ -181,115 +502,490 @@ class LiggghtsWrapper(ABCModelingEngine):
                         'Particle container \'{}\` does not exist'.format(
                             name))
 
+    def iter_original_particles(self, name):
+        """ Returns an iterator over the original particles of a dataset
+
+        For a coarse-grained dataset, the (current) state of the parcels is
+        mapped back onto the particles they replaced: each particle keeps
+        its offset to the centre of its parcel and has the velocity of the
+        parcel. The particles of parcels which were removed are skipped.
+        Otherwise the particles of the dataset are returned.
+
+        Parameters
+        ----------
+        name : str
+            name of the dataset
+
+        Raises
+        ------
+        ValueError:
+            If there is no dataset with the given name
+
+        """
+        dataset = self.get_dataset(name)
+        parcel_map = self._parcel_maps.get(self._data_manager.get_uname(name))
+        if parcel_map is None:
+            return dataset.iter(item_type=CUBA.PARTICLE)
+
+        parcels = dict((view.uid, view)
+                       for view in dataset.iter_particle_views())
+        return refine(parcels, parcel_map)
+
     def run(self):
         """ Run liggghts-engine based on configuration and data
 
         """
+        self._instrumentation.begin_run()
 
-        if self._use_internal_interface:
+        with self._instrumentation.phase("run"):
+            if self._use_internal_interface:
+                self._run_internal()
+            else:
+                self._run_file_io()
 
-            for name in self._data_manager:
-                partcont = self.get_dataset(name)
+    def run_until(self, condition, max_steps, check_every=100):
+        """ Run until a condition holds (but at most max_steps steps)
 
-            self.SP_extension[CUBAExtension.BOX_VECTORS] = \
-                partcont.data_extension[
-                                    CUBAExtension.BOX_VECTORS]
-            self.SP_extension[CUBAExtension.BOX_ORIGIN] = \
-                partcont.data_extension[
-                                    CUBAExtension.BOX_ORIGIN]
+        The condition is evaluated by LIGGGHTS (every check_every steps)
+        which stops the run itself ('fix halt') once it holds, i.e. a
+        single run is made instead of several short ones. For example::
 
-            ScriptWriter.check_configuration_SP(
-                                _combine(self.SP, self.SP_extension))
-            ScriptWriter.check_configuration_BC(
-                                _combine(self.BC, self.BC_extension))
-            ScriptWriter.check_configuration_CM(
-                                _combine(self.CM, self.CM_extension))
+            from simliggghts.config.halt import kinetic_energy_below
+            wrapper.run_until(kinetic_energy_below(1e-8), 100000)
 
-            # Flush radius once to give liggghts the required information for
-            # cutoff distances
-            self._data_manager.flush_radius()
+        Parameters
+        ----------
+        condition : HaltCondition
+            condition ending the run (see simliggghts.config.halt)
+        max_steps : int
+            maximum number of steps (instead of
+            CM[CUBA.NUMBER_OF_TIME_STEPS])
+        check_every : int, optional
+            number of steps between two checks of the condition
 
-            commands = ""
+        Returns
+        -------
+        number_steps : int
+            number of steps which were run
 
-            commands += ScriptWriter.get_pair_style_liggghts(
-                                _combine(self.SP, self.SP_extension))
+        Raises
+        ------
+        ValueError
+            if max_steps or check_every is not positive
 
-            commands += "pair_coeff      * *\n"
+        """
+        if max_steps < 1 or check_every < 1:
+            raise ValueError(
+                "max_steps and check_every have to be positive")
 
-            commands += ScriptWriter.get_material_data(
-                                _combine(self.SP, self.SP_extension))
+        self._halt = (condition, int(max_steps), int(check_every))
+        self._number_steps = None
+        try:
+            self.run()
+        finally:
+            self._halt = None
+        return self._number_steps
 
-            commands += ScriptWriter.get_boundary(
-                                _combine(self.BC, self.BC_extension),
-                                change_existing_boundary=True)
+    def fork(self, n, function, max_processes=None):
+        """ Run function on n copies of the wrapper (in child processes)
 
-            commands += "fix 1 all nve\n"
+        Each copy is made by forking the process (copy-on-write), i.e.
+        the datasets and (for the internal interface) the state of
+        LIGGGHTS are not set up again. This way an ensemble of runs can be
+        started from the same prepared (e.g. equilibrated) state::
 
-            commands += ScriptWriter.get_box_planes(
-                                _combine(self.SP, self.SP_extension),
-                                _combine(self.BC, self.BC_extension))
+            def run_member(wrapper, member):
+                wrapper.CM[CUBA.TIME_STEP] = time_steps[member]
+                wrapper.run()
+                return wrapper.run_statistics
 
-            commands += ScriptWriter.get_fixed_groups(
-                            _combine(self.BC, self.BC_extension))
+            results = wrapper.fork(len(time_steps), run_member)
 
-            commands += "group group_1 type 1\n"
+        Changes made by function only affect the copy, the wrapper itself
+        is not changed.
 
+        Parameters
+        ----------
+        n : int
+            number of copies
+        function : callable
+            function(wrapper, member) called with the copy of the wrapper
+            and the number of the copy (0 to n - 1); its return value has
+            to be picklable
+        max_processes : int, optional
+            maximum number of child processes running at the same time
+            (default: n)
+
+        Returns
+        -------
+        results : list
+            return value of function for each copy
+
+        Raises
+        ------
+        RuntimeError
+            if processes cannot be forked (on this platform) or function
+            failed for a copy
+
+        """
+        if not hasattr(os, "fork"):
+            raise RuntimeError("Forking is not supported on this platform")
+        if max_processes is None:
+            max_processes = n
+        if max_processes < 1:
+            raise ValueError("max_processes has to be positive")
+
+        # output which is still buffered would be written by each child
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        with _temp_directory() as temp_dir:
+            result_files = [os.path.join(temp_dir, "result_{}".format(i))
+                            for i in xrange(n)]
+            running = []
+            statuses = [None] * n
+            try:
+                for member in xrange(n):
+                    if len(running) == max_processes:
+                        pid, waited = running[0]
+                        statuses[waited] = os.waitpid(pid, 0)[1]
+                        running.pop(0)
+                    try:
+                        pid = os.fork()
+                    except OSError as error:
+                        raise RuntimeError(
+                            "Copy {} of the wrapper could not be "
+                            "forked: {}".format(member, error))
+                    if pid == 0:
+                        self._run_forked(function, member,
+                                         result_files[member])
+                    running.append((pid, member))
+            finally:
+                # the children already started are waited for (even if
+                # forking failed) before their directory is removed
+                while running:
+                    pid, member = running[0]
+                    statuses[member] = os.waitpid(pid, 0)[1]
+                    running.pop(0)
+
+            results = []
+            for member, filename in enumerate(result_files):
+                try:
+                    with open(filename, "rb") as result_file:
+                        succeeded, result = pickle.load(result_file)
+                except (IOError, EOFError, pickle.UnpicklingError,
+                        ValueError, TypeError, AttributeError, ImportError,
+                        IndexError):
+                    # no (complete) result was written
+                    raise RuntimeError(
+                        "Copy {} of the wrapper exited without result "
+                        "(status {})".format(member, statuses[member]))
+                if not succeeded:
+                    raise RuntimeError(
+                        "Copy {} of the wrapper failed: {}".format(
+                            member, result))
+                results.append(result)
+        return results
+
+    def _run_forked(self, function, member, filename):
+        """ Run function in the child process and exit it
+
+        The return value (or the traceback if function failed) is pickled
+        to filename.
+
+        """
+        status = 0
+        try:
+            try:
+                result = (True, function(self, member))
+            except Exception:
+                result = (False, traceback.format_exc())
+            with open(filename, "wb") as result_file:
+                try:
+                    pickle.dump(result, result_file, pickle.HIGHEST_PROTOCOL)
+                except Exception:
+                    result_file.seek(0)
+                    result_file.truncate()
+                    pickle.dump((False, traceback.format_exc()), result_file,
+                                pickle.HIGHEST_PROTOCOL)
+        except BaseException:
+            status = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            # the child must not run any cleanup of the parent (e.g. of
+            # temporary directories or of LIGGGHTS)
+            os._exit(status)
+
+    def _coarsen(self, container, factor):
+        """ Returns container with the particles replaced by parcels (and
+        the map from the particles to the parcels)
+
+        """
+        parcels, parcel_map = coarsen(
+            container.iter(item_type=CUBA.PARTICLE), factor)
+
+        coarse = Particles(container.name)
+        coarse.data = container.data
+        if hasattr(container, 'data_extension'):
+            coarse.data_extension = dict(container.data_extension)
+        coarse.add(parcels)
+        return coarse, parcel_map
+
+    def _run_internal(self):
+        """ Run using the internal interface
+
+        """
+        instrumentation = self._instrumentation
+
+        liggghts = self._data_manager.liggghts
+
+        for name in self._data_manager:
+            partcont = self.get_dataset(name)
+
+        data_extension = partcont.data_extension_snapshot
+        self.SP_extension[CUBAExtension.BOX_VECTORS] = \
+            data_extension[CUBAExtension.BOX_VECTORS]
+        self.SP_extension[CUBAExtension.BOX_ORIGIN] = \
+            data_extension[CUBAExtension.BOX_ORIGIN]
+
+        SP = _combine(self.SP, self.SP_extension)
+        BC = _combine(self.BC, self.BC_extension)
+        CM = _combine(self.CM, self.CM_extension)
+        if self._halt is not None:
+            CM[CUBA.NUMBER_OF_TIME_STEPS] = self._halt[1]
+
+        with instrumentation.phase("check"):
+            self._select_time_step(SP, CM)
+            self._script_builder.check_configuration(SP, BC, CM)
+
+        # particles of fixed groups are only sent to (and retrieved from)
+        # liggghts if they changed
+        self._data_manager.set_static_types(
+            [material_type for material_type, fixed in enumerate(
+                BC[CUBAExtension.FIXED_GROUP], 1) if fixed])
+
+        # Flush radius once to give liggghts the required information for
+        # cutoff distances
+        self._data_manager.flush_radius()
+
+        with instrumentation.phase("commands"):
+            # the groups (which atoms might have been added to) and
+            # only the setup commands which changed since the last run
+            commands = self._script_builder.get_group_commands(BC)
+            commands += self._script_builder.get_setup_commands(SP, BC)
+            neighbor = self._get_neighbor_settings(CM)
+            if neighbor is not None:
+                commands += self._script_builder.get_neighbor_commands(
+                    neighbor)
+
+        with instrumentation.phase("setup"):
             for command in commands.splitlines():
-                self._liggghts.command(command)
+                liggghts.command(command)
 
             # Extra treatment for external forces, since df vector must
             # be updated for the case of particle(s) addition or removal
             commands = ""
             commands += ScriptWriter.get_ext_forces(self)
+            # fixes of the registered per-atom values
+            commands += self._schema.get_fix_commands()
             commands += "run 0"     # Building external force vector df
             for command in commands.splitlines():
-                self._liggghts.command(command)
+                liggghts.command(command)
+
+        # before running, we flush any changes to liggghts
+        self._data_manager.flush()
+
+        commands = self._script_builder.get_run(CM)
+        if self._halt is not None:
+            condition, _, check_every = self._halt
+            commands = self._script_builder.get_halt_commands(
+                condition, check_every) + commands
+            commands += self._script_builder.get_halt_cleanup_commands(
+                condition)
+
+        with instrumentation.phase("liggghts"):
+            builds = self._get_neighbor_builds(liggghts)
+            step = self._get_step(liggghts)
+            for command in commands.splitlines():
+                liggghts.command(command)
+            if step is not None:
+                self._number_steps = self._get_step(liggghts) - step
+            if builds is not None:
+                after = self._get_neighbor_builds(liggghts)
+                instrumentation.set_neighbor_builds(after[0] - builds[0],
+                                                    after[1] - builds[1])
+
+        # after running, we read any changes from liggghts
+        # TODO rework
+        self._data_manager.read()
+
+    def _run_file_io(self):
+        """ Run using the file-io interface
+
+        """
+        instrumentation = self._instrumentation
+
+        with _temp_directory() as temp_dir:
+            input_data_filename = os.path.join(
+                temp_dir, "data_in.liggghts")
+            output_data_filename = os.path.join(
+                temp_dir, "data_out.liggghts")
 
             # before running, we flush any changes to liggghts
-            self._data_manager.flush()
+            self._data_manager.flush(input_data_filename)
 
-            commands = ""
-            commands += \
-                ScriptWriter.get_run(CM=_combine(self.CM, self.CM_extension))
+            for name in self._data_manager:
+                partcont = self.get_dataset(name)
 
-            for command in commands.splitlines():
-                self._liggghts.command(command)
+            data_extension = partcont.data_extension_snapshot
+            self.SP_extension[CUBAExtension.BOX_VECTORS] = \
+                data_extension[CUBAExtension.BOX_VECTORS]
+            self.SP_extension[CUBAExtension.BOX_ORIGIN] = \
+                data_extension[CUBAExtension.BOX_ORIGIN]
+
+            SP = _combine(self.SP, self.SP_extension)
+            BC = _combine(self.BC, self.BC_extension)
+            CM = _combine(self.CM, self.CM_extension)
+            if self._halt is not None:
+                CM[CUBA.NUMBER_OF_TIME_STEPS] = self._halt[1]
+
+            # liggghts is started anew, so only the particles which are
+            # still to be inserted are inserted through a face
+            if CUBAExtension.PARTICLE_INSERTIONS in BC:
+                BC[CUBAExtension.PARTICLE_INSERTIONS] = \
+                    self._get_remaining_insertions(
+                        BC[CUBAExtension.PARTICLE_INSERTIONS])
+
+            with instrumentation.phase("check"):
+                self._select_time_step(SP, CM)
+                self._script_builder.check_configuration(SP, BC, CM)
+
+            with instrumentation.phase("commands"):
+                commands = self._script_builder.get_script(
+                    SP=SP,
+                    BC=BC,
+                    CM=CM,
+                    input_data_file=input_data_filename,
+                    output_data_file=output_data_filename,
+                    neighbor=self._get_neighbor_settings(CM),
+                    halt_condition=None if self._halt is None
+                    else self._halt[0],
+                    check_every=None if self._halt is None
+                    else self._halt[2],
+                    mpi=self._mpi)
+            from .io.liggghts_process import LiggghtsProcess
+            process = LiggghtsProcess(liggghts_name=self._executable_name,
+                                      log_directory=temp_dir,
+                                      instrumentation=instrumentation,
+                                      mpi=self._mpi)
+            with instrumentation.phase("liggghts"):
+                process.run(commands)
+            self._number_steps = process.get_number_steps()
 
             # after running, we read any changes from liggghts
-            # TODO rework
-            self._data_manager.read()
+            self._data_manager.read(output_data_filename)
 
-        else:
+    def _get_remaining_insertions(self, insertions):
+        """ Returns insertions (through a face) of the remaining particles
 
-            with _temp_directory() as temp_dir:
-                input_data_filename = os.path.join(
-                    temp_dir, "data_in.liggghts")
-                output_data_filename = os.path.join(
-                    temp_dir, "data_out.liggghts")
+        """
+        remaining = {}
+        for material_type, insertion in insertions.iteritems():
+            if insertion.mode == "stream":
+                insertion = insertion._replace(
+                    number=insertion.number -
+                    self._data_manager.get_number_inserted(material_type))
+            remaining[material_type] = insertion
+        return remaining
+
+    def _select_time_step(self, SP, CM):
+        """ Set the largest stable time step for the current particles
+
+        Nothing is done if the time step is not selected automatically,
+        if there are no particles or if the materials are not (correctly)
+        configured (which the configuration check reports).
 
-                # before running, we flush any changes to liggghts
-                self._data_manager.flush(input_data_filename)
+        """
+        if not self._auto_time_step:
+            return
+
+        young_modulus = SP.get(CUBA.YOUNG_MODULUS, ())
+        poisson_ratio = SP.get(CUBA.POISSON_RATIO, ())
+        if len(young_modulus) != self._number_types or \
+                len(poisson_ratio) != self._number_types:
+            return
+
+        data_manager = self._data_manager
+        estimate = get_stable_time_step(
+            data_manager.get_all_values(CUBA.RADIUS),
+            data_manager.get_all_values(CUBA.DENSITY),
+            data_manager.get_all_types(),
+            data_manager.get_all_values(CUBA.VELOCITY),
+            young_modulus, poisson_ratio)
+        self._instrumentation.set_time_step_estimate(estimate)
+
+        if estimate.time_step is not None:
+            CM[CUBA.TIME_STEP] = min(
+                CM.get(CUBA.TIME_STEP, estimate.time_step),
+                estimate.time_step)
+
+    def _get_neighbor_settings(self, CM):
+        """ Returns neighbor settings for the current particles
+
+        None if the neighbor settings are not tuned.
 
-                for name in self._data_manager:
-                    partcont = self.get_dataset(name)
+        """
+        if not self._tune_neighbor:
+            return None
 
-                self.SP_extension[CUBAExtension.BOX_VECTORS] = \
-                    partcont.data_extension[CUBAExtension.BOX_VECTORS]
-                self.SP_extension[CUBAExtension.BOX_ORIGIN] = \
-                    partcont.data_extension[CUBAExtension.BOX_ORIGIN]
+        settings = get_neighbor_settings(
+            self._data_manager.get_all_values(CUBA.RADIUS),
+            self._data_manager.get_all_values(CUBA.VELOCITY),
+            CM[CUBA.TIME_STEP])
+        self._instrumentation.set_neighbor_settings(settings)
+        return settings
 
-                commands = self._script_writer.get_configuration(
-                    input_data_file=input_data_filename,
-                    output_data_file=output_data_filename,
-                    BC=_combine(self.BC, self.BC_extension),
-                    CM=_combine(self.CM, self.CM_extension),
-                    SP=_combine(self.SP, self.SP_extension))
-                process = LiggghtsProcess(liggghts_name=self._executable_name,
-                                          log_directory=temp_dir)
-                process.run(commands)
+    def _get_step(self, liggghts):
+        """ Returns current step of liggghts
+
+        The step is only queried for runs ending on a condition (otherwise
+        None is returned).
+
+        """
+        if self._halt is None:
+            return None
+
+        liggghts.command("variable simphony_step equal step")
+        return int(liggghts.extract_variable("simphony_step", None, 0))
 
-                # after running, we read any changes from liggghts
-                self._data_manager.read(output_data_filename)
+    def _get_neighbor_builds(self, liggghts):
+        """ Returns total number of (dangerous) neighbor list builds
+
+        The numbers are only queried if statistics are collected
+        (otherwise None is returned).
+
+        """
+        if not self._instrumentation.enabled:
+            return None
+
+        liggghts.command("variable simphony_nbuild equal nbuild")
+        liggghts.command("variable simphony_ndanger equal ndanger")
+        return (int(liggghts.extract_variable("simphony_nbuild", None, 0)),
+                int(liggghts.extract_variable("simphony_ndanger", None, 0)))
+
+
+def _create_liggghts():
+    """ Start LIGGGHTS (using the library interface)
+
+    Returns
+    -------
+    liggghts :
+        liggghts python wrapper
+
+    """
+    import liggghts
+    return liggghts.liggghts(cmdargs=["-screen", "none", "-log", "none"])
 
 
 def _combine(data_container, data_container_extension):
@@ -11,6 +11,8 @@ from simphony.cuds.particles import Particles, Particle
 
 from .md_example_configurator import MDExampleConfigurator
 
+from ..common.derived_quantities import sphere_mass
+from ..common.spatial_sort import spatial_order
 from ..cuba_extension import CUBAExtension
 
 
@@ -177,3 +179,112 @@ class ABCLiggghtsMDEngineCheck(object):
 
         with self.assertRaises(RuntimeError):
             self.wrapper.run()
+
+    def test_iter_particle_views(self):
+        MDExampleConfigurator.configure_wrapper(self.wrapper)
+        _, particles = _get_particle(self.wrapper)
+
+        views = list(particles.iter_particle_views())
+        self.assertEqual(len(views), particles.count_of(CUBA.PARTICLE))
+        for view in views:
+            p = particles.get(view.uid)
+            assert_almost_equal(view.coordinates, p.coordinates)
+            self.assertEqual(DataContainer(view.data), p.data)
+            self.assertEqual(view.to_particle(), p)
+
+        # changes are written through when the views are updated
+        view = views[0]
+        view.coordinates = (1.5, 1.5, 1.5)
+        view.data[CUBA.VELOCITY] = (0.5, 0.5, 0.5)
+        particles.update([view])
+
+        p = particles.get(view.uid)
+        assert_almost_equal(p.coordinates, (1.5, 1.5, 1.5))
+        assert_almost_equal(p.data[CUBA.VELOCITY], (0.5, 0.5, 0.5))
+        assert_almost_equal(view.data[CUBA.VELOCITY], (0.5, 0.5, 0.5))
+
+        self.wrapper.run()
+
+    def test_data_snapshot(self):
+        MDExampleConfigurator.configure_wrapper(self.wrapper)
+        _, particles = _get_particle(self.wrapper)
+
+        snapshot = particles.data_snapshot
+        self.assertEqual(snapshot.copy(), particles.data)
+        self.assertIs(particles.data_snapshot, snapshot)
+        self.assertEqual(dict(particles.data_extension_snapshot),
+                         particles.data_extension)
+
+        data = particles.data
+        data[CUBA.MASS] = 42.0
+        particles.data = data
+
+        self.assertEqual(particles.data_snapshot[CUBA.MASS], 42.0)
+        self.assertNotEqual(snapshot.get(CUBA.MASS), 42.0)
+
+        self.wrapper.run()
+
+    def test_particles_with_own_material_type(self):
+        MDExampleConfigurator.configure_wrapper(self.wrapper)
+        _, particles = _get_particle(self.wrapper)
+        container_type = particles.data[CUBA.MATERIAL_TYPE]
+        other_type = 2 if container_type == 1 else 1
+
+        # a particle with its own type (i.e. a container of mixed types)
+        p = particles.get(next(particles.iter_particle_views()).uid)
+        p.data[CUBA.MATERIAL_TYPE] = other_type
+        particles.update([p])
+
+        self.wrapper.run()
+
+        types = [q.data.get(CUBA.MATERIAL_TYPE) for q in
+                 particles.iter(item_type=CUBA.PARTICLE)]
+        self.assertEqual(types.count(other_type), 1)
+        self.assertEqual(types.count(None), len(types) - 1)
+        self.assertEqual(particles.get(p.uid).data[CUBA.MATERIAL_TYPE],
+                         other_type)
+        self.assertEqual(particles.data[CUBA.MATERIAL_TYPE], container_type)
+
+    def test_derived_quantities(self):
+        MDExampleConfigurator.configure_wrapper(self.wrapper)
+        _, particles = _get_particle(self.wrapper)
+
+        derived = particles.derived_quantities
+        self.assertEqual(len(derived.uids), particles.count_of(CUBA.PARTICLE))
+        for uid, mass in zip(derived.uids, derived.mass):
+            data = particles.get(uid).data
+            assert_almost_equal(
+                mass, sphere_mass(data[CUBA.RADIUS], data[CUBA.DENSITY]))
+
+        # the quantities are updated when the density changes
+        p = particles.get(derived.uids[0])
+        p.data[CUBA.DENSITY] *= 2.0
+        particles.update([p])
+        assert_almost_equal(
+            particles.derived_quantities.mass[0],
+            sphere_mass(p.data[CUBA.RADIUS], p.data[CUBA.DENSITY]))
+
+    def test_set_external_forces(self):
+        MDExampleConfigurator.configure_wrapper(self.wrapper)
+        _, particles = _get_particle(self.wrapper)
+
+        uids = [p.uid for p in particles.iter(item_type=CUBA.PARTICLE)]
+        forces = [(0.1 * i, 0.0, -0.1 * i) for i in range(len(uids))]
+        particles.set_external_forces(forces, uids)
+        for uid, force in zip(uids, forces):
+            assert_almost_equal(
+                particles.get(uid).data[CUBA.EXTERNAL_APPLIED_FORCE], force)
+
+        with self.assertRaises(ValueError):
+            particles.set_external_forces(forces[1:], uids)
+
+    def test_sort_spatially(self):
+        MDExampleConfigurator.configure_wrapper(self.wrapper)
+        _, particles = _get_particle(self.wrapper)
+
+        particles.sort_spatially()
+        sorted_particles = list(particles.iter(item_type=CUBA.PARTICLE))
+        order = spatial_order([p.coordinates for p in sorted_particles])
+        self.assertEqual(order.tolist(), range(len(sorted_particles)))
+        self.assertEqual(list(particles.derived_quantities.uids),
+                         [p.uid for p in sorted_particles])
@@ -0,0 +1,225 @@
+import ctypes
+import unittest
+import uuid
+
+from simphony.core.cuba import CUBA
+from simphony.core.data_container import DataContainer
+
+from simliggghts.common.atom_schema import AtomField, get_schema
+from simliggghts.common.atom_style import AtomStyle
+from simliggghts.internal.particle_data_cache import ParticleDataCache
+
+
+class _Liggghts(object):
+    """ Records which per-atom values were extracted """
+
+    def __init__(self, natom):
+        self.natom = natom
+        self.extracted = []
+
+    def extract_global(self, name, type):
+        return self.natom
+
+    def extract_atom(self, name, type):
+        self.extracted.append(name)
+        return [[0.0, 0.0, 0.0] if type in (1, 3) else 0.0
+                for _ in range(self.natom)]
+
+    def extract_fix(self, name, style, type):
+        self.extracted.append(name)
+        return [[0.0, 0.0, 0.0] if type == 2 else 0.0
+                for _ in range(self.natom)]
+
+
+def _create_data():
+    data = DataContainer()
+    data[CUBA.VELOCITY] = (0.1, 0.2, 0.3)
+    data[CUBA.ANGULAR_VELOCITY] = (0.0, 0.0, 0.1)
+    data[CUBA.DENSITY] = 1.0
+    data[CUBA.RADIUS] = 0.5
+    return data
+
+
+class TestAtomSchema(unittest.TestCase):
+
+    def test_granular(self):
+        schema = get_schema(AtomStyle.GRANULAR)
+        self.assertIn(CUBA.RADIUS, schema)
+        field = schema.get_field(CUBA.VELOCITY)
+        self.assertEqual(field.liggghts_name, "v")
+        self.assertEqual(field.liggghts_type, 3)
+        self.assertEqual(schema.get_field(CUBA.MATERIAL_TYPE).liggghts_type,
+                         0)
+        self.assertEqual(
+            schema.get_field(CUBA.EXTERNAL_APPLIED_FORCE).liggghts_type, 2)
+        self.assertEqual(schema.get_fix_commands(), "")
+
+    def test_register(self):
+        schema = get_schema(AtomStyle.GRANULAR)
+        schema.register(AtomField(CUBA.TEMPERATURE, "temp", fix=True,
+                                  default=300.0))
+        self.assertIn(CUBA.TEMPERATURE, schema)
+        self.assertEqual(
+            schema.get_fix_commands(),
+            "fix temp all property/atom temp scalar no no no 300.0\n")
+
+        # the schema of the atom style is not changed
+        self.assertNotIn(CUBA.TEMPERATURE, get_schema(AtomStyle.GRANULAR))
+        self.assertIn(CUBA.TEMPERATURE, schema.copy())
+
+        with self.assertRaises(ValueError):
+            schema.register(AtomField(CUBA.TEMPERATURE, "temp2"))
+        with self.assertRaises(ValueError):
+            schema.register(AtomField(CUBA.CHARGE, "temp"))
+        with self.assertRaises(ValueError):
+            AtomField(CUBA.CHARGE, "charge", dtype="float")
+
+
+class TestParticleDataCacheSchema(unittest.TestCase):
+
+    def setUp(self):
+        self.liggghts = _Liggghts(natom=2)
+        self.cache = ParticleDataCache(self.liggghts)
+        self.uids = [uuid.uuid4() for _ in range(2)]
+        for uid in self.uids:
+            self.cache.set_particle((0.0, 0.0, 0.0), _create_data(), uid,
+                                    default_type=1)
+
+    def test_unused_fields_are_not_transferred(self):
+        self.cache.send()
+        self.assertNotIn("df", self.liggghts.extracted)
+        self.assertNotIn(CUBA.EXTERNAL_APPLIED_FORCE,
+                         self.cache.get_particle_data(self.uids[0]))
+
+        # once a particle provides a value, the value is transferred
+        # (with the default for the other particles)
+        self.cache.set_values_at(
+            0, data={CUBA.EXTERNAL_APPLIED_FORCE: (1.0, 2.0, 3.0)})
+        self.liggghts.extracted = []
+        self.cache.retrieve()
+        self.assertIn("df", self.liggghts.extracted)
+        self.assertEqual(
+            self.cache.get_particle_data(self.uids[1])[
+                CUBA.EXTERNAL_APPLIED_FORCE], (0.0, 0.0, 0.0))
+
+    def test_set_array(self):
+        self.cache.set_array(CUBA.EXTERNAL_APPLIED_FORCE, [1, 0],
+                             [(1.0, 2.0, 3.0), (4.0, 5.0, 6.0)])
+        self.assertEqual(
+            self.cache.get_particle_data(self.uids[0])[
+                CUBA.EXTERNAL_APPLIED_FORCE], (4.0, 5.0, 6.0))
+        self.assertEqual(
+            self.cache.get_value_at(CUBA.EXTERNAL_APPLIED_FORCE, 1),
+            (1.0, 2.0, 3.0))
+
+        with self.assertRaises(ValueError):
+            self.cache.set_array(CUBA.EXTERNAL_APPLIED_FORCE, [0],
+                                 [1.0, 2.0, 3.0])
+
+    def test_copy_with_pointers(self):
+        # per-atom array of liggghts (rows pointing into one block)
+        values = (ctypes.c_double * 6)()
+        size = ctypes.sizeof(ctypes.c_double)
+        rows = (ctypes.POINTER(ctypes.c_double) * 2)(
+            *[ctypes.cast(ctypes.addressof(values) + 3 * i * size,
+                          ctypes.POINTER(ctypes.c_double)) for i in range(2)])
+        pointer = ctypes.cast(rows,
+                              ctypes.POINTER(ctypes.POINTER(ctypes.c_double)))
+        self.liggghts.extract_fix = lambda name, style, type: pointer
+
+        self.cache.set_array(CUBA.EXTERNAL_APPLIED_FORCE, [0, 1],
+                             [(1.0, 2.0, 3.0), (4.0, 5.0, 6.0)])
+        self.cache.send()
+        self.assertEqual(list(values), [1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+
+        values[5] = 42.0
+        self.cache.retrieve()
+        self.assertEqual(
+            self.cache.get_value_at(CUBA.EXTERNAL_APPLIED_FORCE, 1),
+            (4.0, 5.0, 42.0))
+
+    def test_static_particles(self):
+        # liggghts which keeps the per-atom values
+        stored = {}
+
+        def extract_atom(name, type):
+            if name not in stored:
+                stored[name] = [[0.0, 0.0, 0.0] if type in (1, 3) else 0.0
+                                for _ in range(self.liggghts.natom)]
+            return stored[name]
+        self.liggghts.extract_atom = extract_atom
+
+        self.liggghts.natom = 3
+        uid = uuid.uuid4()
+        self.cache.set_particle((1.0, 1.0, 1.0), _create_data(), uid,
+                                default_type=2)
+        self.cache.set_static_types([2])
+
+        # static particles are sent (once)
+        self.cache.send()
+        self.assertEqual(stored["x"][2], [1.0, 1.0, 1.0])
+        stored["x"][2][0] = 42.0
+        stored["x"][0][0] = 42.0
+        self.cache.send()
+        self.assertEqual(stored["x"][2], [42.0, 1.0, 1.0])
+        self.assertEqual(stored["x"][0], [0.0, 0.0, 0.0])
+
+        # and not retrieved
+        stored["x"][0][0] = 42.0
+        self.cache.retrieve()
+        self.assertEqual(self.cache.get_coordinates(uid), (1.0, 1.0, 1.0))
+        self.assertEqual(self.cache.get_coordinates_at(0), (42.0, 0.0, 0.0))
+
+        # unless they changed
+        self.cache.set_values_at(2, coordinates=(2.0, 2.0, 2.0))
+        self.cache.send()
+        self.assertEqual(stored["x"][2], [2.0, 2.0, 2.0])
+
+        # or are no longer static
+        self.cache.set_static_types([])
+        self.cache.retrieve()
+        self.assertEqual(self.cache.get_coordinates(uid), (2.0, 2.0, 2.0))
+
+    def test_add_atoms(self):
+        self.liggghts.natom = 4
+        self.liggghts.extract_atom = lambda name, type: (
+            [1, 1, 2, 2] if name == "type" else
+            [[float(i)] * 3 if type in (1, 3) else float(i)
+             for i in range(4)])
+
+        uids = self.cache.add_atoms(4)
+        self.assertEqual(len(uids), 2)
+        self.assertEqual(self.cache.index_of(uids[1]), 3)
+        self.assertEqual(self.cache.get_type_at(3), 2)
+        self.assertNotIn(CUBA.MATERIAL_TYPE,
+                         self.cache.get_particle_data(uids[1]))
+
+        self.cache.retrieve()
+        self.assertEqual(self.cache.get_coordinates(uids[1]),
+                         (3.0, 3.0, 3.0))
+        self.assertEqual(
+            self.cache.get_particle_data(uids[0])[CUBA.RADIUS], 2.0)
+
+        self.assertEqual(self.cache.add_atoms(4), [])
+
+    def test_missing_required_value(self):
+        data = _create_data()
+        del data[CUBA.RADIUS]
+        with self.assertRaises(KeyError):
+            self.cache.set_particle((0.0, 0.0, 0.0), data, uuid.uuid4(),
+                                    default_type=1)
+
+    def test_add_field(self):
+        self.cache.add_field(AtomField(CUBA.TEMPERATURE, "temp", fix=True,
+                                       default=300.0))
+        self.cache.set_values_at(1, data={CUBA.TEMPERATURE: 350.0})
+
+        self.assertEqual(self.cache.get_value_at(CUBA.TEMPERATURE, 0), 300.0)
+        self.assertEqual(self.cache.get_value_at(CUBA.TEMPERATURE, 1), 350.0)
+
+        self.cache.send()
+        self.assertIn("temp", self.liggghts.extracted)
+
+
+if __name__ == '__main__':
+    unittest.main()
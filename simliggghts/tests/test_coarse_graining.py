@@ -0,0 +1,102 @@
+import unittest
+import uuid
+
+import numpy
+from numpy.testing import assert_array_almost_equal
+
+from simphony.core.cuba import CUBA
+from simphony.core.data_container import DataContainer
+from simphony.cuds.particles import Particle
+
+from simliggghts.common.coarse_graining import (coarsen, get_parcel_size,
+                                                refine)
+
+
+def _get_particles(number, material_type=1):
+    particles = []
+    for i in range(number):
+        data = DataContainer()
+        data[CUBA.RADIUS] = 0.5
+        data[CUBA.DENSITY] = 2.0
+        data[CUBA.MATERIAL_TYPE] = material_type
+        data[CUBA.VELOCITY] = (float(i), 0.0, 0.0)
+        particles.append(
+            Particle(uid=uuid.uuid4(),
+                     coordinates=(float(i % 2), float(i // 2 % 2),
+                                  float(i // 4) + 10.0 * material_type),
+                     data=data))
+    return particles
+
+
+class TestCoarseGraining(unittest.TestCase):
+
+    def test_parcel_size(self):
+        self.assertEqual(get_parcel_size(2.0), 8)
+        self.assertEqual(get_parcel_size(1.5), 3)
+        self.assertEqual(get_parcel_size(0.5), 1)
+
+    def test_coarsen(self):
+        particles = _get_particles(16)
+        parcels, parcel_map = coarsen(particles, 2.0)
+
+        self.assertEqual(len(parcels), 2)
+        self.assertEqual(len(parcel_map.uids), 16)
+        # the volume (and mass) is conserved
+        for parcel in parcels:
+            self.assertAlmostEqual(parcel.data[CUBA.RADIUS], 1.0)
+            self.assertAlmostEqual(parcel.data[CUBA.DENSITY], 2.0)
+
+        # each parcel replaces a cube of 8 neighbouring particles
+        assert_array_almost_equal(
+            sorted(parcel.coordinates for parcel in parcels),
+            [(0.5, 0.5, 10.5), (0.5, 0.5, 12.5)])
+        velocities = sorted(parcel.data[CUBA.VELOCITY][0]
+                            for parcel in parcels)
+        assert_array_almost_equal(velocities, [3.5, 11.5])
+
+    def test_types_are_not_mixed(self):
+        particles = _get_particles(5, 1) + _get_particles(3, 2)
+        parcels, parcel_map = coarsen(particles, 2.0)
+
+        self.assertEqual(sorted(parcel.data[CUBA.MATERIAL_TYPE]
+                                for parcel in parcels), [1, 2])
+        # the volume of the (incomplete) parcels is the one of their
+        # particles
+        self.assertAlmostEqual(
+            sum(parcel.data[CUBA.RADIUS] ** 3 for parcel in parcels),
+            8 * 0.5 ** 3)
+
+    def test_refine(self):
+        particles = _get_particles(8)
+        parcels, parcel_map = coarsen(particles, 2.0)
+
+        parcel = parcels[0]
+        parcel.coordinates = tuple(
+            numpy.add(parcel.coordinates, (1.0, 2.0, 3.0)).tolist())
+        parcel.data[CUBA.VELOCITY] = (0.0, 0.0, -1.0)
+
+        refined = list(refine({parcel.uid: parcel}, parcel_map))
+        self.assertEqual([p.uid for p in refined],
+                         [p.uid for p in particles])
+        for original, particle in zip(particles, refined):
+            assert_array_almost_equal(
+                particle.coordinates,
+                numpy.add(original.coordinates, (1.0, 2.0, 3.0)))
+            self.assertEqual(particle.data[CUBA.VELOCITY], (0.0, 0.0, -1.0))
+            self.assertEqual(particle.data[CUBA.RADIUS], 0.5)
+
+    def test_refine_without_removed_parcel(self):
+        particles = _get_particles(16)
+        parcels, parcel_map = coarsen(particles, 2.0)
+
+        refined = list(refine({parcels[1].uid: parcels[1]}, parcel_map))
+        self.assertEqual(len(refined), 8)
+        self.assertEqual(
+            set(p.uid for p in refined),
+            set(uid for uid, parcel_uid in zip(parcel_map.uids,
+                                               parcel_map.parcel_uids)
+                if parcel_uid == parcels[1].uid))
+
+
+if __name__ == '__main__':
+    unittest.main()
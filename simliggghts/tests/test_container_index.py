@@ -0,0 +1,51 @@
+import unittest
+import uuid
+
+from numpy.testing import assert_array_equal
+
+from simliggghts.internal.container_index import ContainerIndex
+
+
+class TestContainerIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = ContainerIndex()
+        self.index.add_container("foo")
+        self.index.add_container("bar")
+        self.uids = [uuid.uuid4() for _ in range(4)]
+        # particles of the containers are not stored contiguously
+        for i, uid in enumerate(self.uids):
+            self.index.add("foo" if i % 2 == 0 else "bar", i, uid)
+
+    def test_contains(self):
+        self.assertTrue(self.index.contains("foo", 0))
+        self.assertFalse(self.index.contains("foo", 1))
+        self.assertTrue(self.index.contains("bar", 1))
+        self.assertFalse(self.index.contains("bar", 4))
+
+    def test_rows_and_uids(self):
+        self.assertEqual(self.index.count("foo"), 2)
+        assert_array_equal(self.index.get_rows("foo"), [0, 2])
+        self.assertEqual(self.index.get_uids("bar"),
+                         [self.uids[1], self.uids[3]])
+
+    def test_reorder(self):
+        self.index.reorder("foo", [1, 0])
+        self.assertEqual(self.index.get_uids("foo"),
+                         [self.uids[2], self.uids[0]])
+        with self.assertRaises(ValueError):
+            self.index.reorder("foo", [0])
+
+    def test_remove_and_clear(self):
+        self.index.remove_container("bar")
+        self.assertFalse(self.index.contains("foo", 1))
+        with self.assertRaises(KeyError):
+            self.index.count("bar")
+
+        self.index.clear()
+        self.assertEqual(self.index.count("foo"), 0)
+        self.assertFalse(self.index.contains("foo", 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import math
+import unittest
+import uuid
+
+from numpy.testing import assert_almost_equal
+
+from simphony.core.cuba import CUBA
+from simphony.core.data_container import DataContainer
+from simphony.cuds.particles import Particle
+
+from simliggghts.common.derived_quantities import (DerivedQuantities,
+                                                   sphere_mass,
+                                                   sphere_moment_of_inertia,
+                                                   sphere_volume)
+from simliggghts.common.particle_columns import ParticleColumns
+
+
+def _create_particle(radius, density, velocity=(0.0, 0.0, 0.0)):
+    data = DataContainer()
+    data[CUBA.RADIUS] = radius
+    data[CUBA.DENSITY] = density
+    data[CUBA.VELOCITY] = velocity
+    return Particle(uid=uuid.uuid4(), coordinates=(0.0, 0.0, 0.0), data=data)
+
+
+class TestSphereFunctions(unittest.TestCase):
+
+    def test_scalars(self):
+        self.assertAlmostEqual(sphere_volume(1.0), 4.0 / 3.0 * math.pi)
+        self.assertAlmostEqual(sphere_mass(0.5, 2.0),
+                               2.0 * 4.0 / 3.0 * math.pi * 0.125)
+        self.assertAlmostEqual(sphere_moment_of_inertia(0.5, 2.0),
+                               0.4 * sphere_mass(0.5, 2.0) * 0.25)
+
+
+class TestDerivedQuantities(unittest.TestCase):
+
+    def setUp(self):
+        self.columns = ParticleColumns(
+            [CUBA.RADIUS, CUBA.DENSITY, CUBA.VELOCITY])
+        self.particles = [_create_particle(1.0, 1.0, (1.0, 0.0, 0.0)),
+                          _create_particle(2.0, 3.0, (0.0, 1.0, 0.0))]
+        for particle in self.particles:
+            self.columns.add(particle)
+
+        # reversed order of the particles
+        self.uids = [p.uid for p in reversed(self.particles)]
+        self.derived = DerivedQuantities(self.columns, self.uids)
+
+    def test_quantities(self):
+        self.assertEqual(list(self.derived.uids), self.uids)
+        assert_almost_equal(self.derived.volume,
+                            [sphere_volume(2.0), sphere_volume(1.0)])
+        assert_almost_equal(self.derived.mass,
+                            [sphere_mass(2.0, 3.0), sphere_mass(1.0, 1.0)])
+        assert_almost_equal(
+            self.derived.moment_of_inertia,
+            [sphere_moment_of_inertia(2.0, 3.0),
+             sphere_moment_of_inertia(1.0, 1.0)])
+        self.assertAlmostEqual(self.derived.total_mass,
+                               sphere_mass(2.0, 3.0) + sphere_mass(1.0, 1.0))
+
+    def test_volume_weighted_mean(self):
+        assert_almost_equal(self.derived.volume_weighted_mean(CUBA.VELOCITY),
+                            [1.0 / 9.0, 8.0 / 9.0, 0.0])
+
+    def test_read_only(self):
+        with self.assertRaises(ValueError):
+            self.derived.mass[0] = 42.0
+
+    def test_cached_until_radius_or_density_changes(self):
+        mass = self.derived.mass
+        self.assertIs(self.derived.mass, mass)
+
+        # other values do not invalidate the quantities
+        self.columns.set_values_at(0, data={CUBA.VELOCITY: (0.0, 0.0, 1.0)})
+        self.assertIs(self.derived.mass, mass)
+
+        self.columns.set_values_at(0, data={CUBA.DENSITY: 2.0})
+        self.assertIsNot(self.derived.mass, mass)
+        self.assertAlmostEqual(self.derived.mass[1], sphere_mass(1.0, 2.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+from simliggghts.common.instrumentation import Instrumentation
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_disabled(self):
+        instrumentation = Instrumentation()
+        instrumentation.begin_run()
+        with instrumentation.phase("flush") as phase:
+            instrumentation.add_bytes(100)
+        self.assertIsNone(phase)
+        self.assertIsNone(instrumentation.statistics)
+
+    def test_phases(self):
+        instrumentation = Instrumentation(enabled=True)
+        instrumentation.begin_run()
+        for _ in range(2):
+            with instrumentation.phase("flush", number_particles=10):
+                instrumentation.add_bytes(100)
+        with instrumentation.phase("liggghts"):
+            with instrumentation.phase("read"):
+                instrumentation.add_bytes(50)
+                instrumentation.set_number_particles(5)
+        instrumentation.set_liggghts_timing({"Pair": 0.5})
+
+        statistics = instrumentation.statistics
+        self.assertEqual(list(statistics.phases),
+                         ["flush", "liggghts", "read"])
+        flush = statistics.get_phase("flush")
+        self.assertEqual(flush.calls, 2)
+        self.assertEqual(flush.bytes_transferred, 200)
+        self.assertEqual(flush.number_particles, 10)
+        self.assertEqual(statistics.get_phase("read").number_particles, 5)
+        self.assertEqual(statistics.get_phase("liggghts").bytes_transferred,
+                         0)
+        self.assertEqual(statistics.bytes_transferred, 250)
+        self.assertEqual(statistics.liggghts_timing, {"Pair": 0.5})
+
+        # nested phases are not counted twice
+        self.assertAlmostEqual(
+            statistics.wall_time,
+            flush.wall_time + statistics.get_phase("liggghts").wall_time)
+        self.assertIn("flush", str(statistics))
+        self.assertEqual(statistics.to_dict()["phases"]["flush"]["calls"], 2)
+
+    def test_begin_run_resets(self):
+        instrumentation = Instrumentation(enabled=True)
+        instrumentation.begin_run()
+        with instrumentation.phase("flush"):
+            pass
+        instrumentation.begin_run()
+        self.assertEqual(len(instrumentation.statistics.phases), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
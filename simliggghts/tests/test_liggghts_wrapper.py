@@ -1,8 +1,12 @@
+import errno
+import os
 import unittest
 
 from simphony.testing.abc_check_engine import ParticlesEngineCheck
+from simphony.core.cuba import CUBA
 from simphony.cuds.abc_particles import ABCParticles
 
+from simliggghts.cuba_extension import CUBAExtension
 from simliggghts.liggghts_wrapper import LiggghtsWrapper
 from simliggghts.testing.abc_liggghts_md_engine_check import\
     ABCLiggghtsMDEngineCheck
@@ -107,5 +111,132 @@ class TestFILEIOEngineCheck(FixedParticlesEngineCheck, unittest.TestCase):
         return LiggghtsWrapper(use_internal_interface=False)
 
 
+class TestAutoTimeStep(unittest.TestCase):
+
+    def _check_auto_time_step(self, use_internal_interface):
+        wrapper = LiggghtsWrapper(
+            use_internal_interface=use_internal_interface,
+            collect_statistics=True, auto_time_step=True)
+        MDExampleConfigurator.configure_wrapper(wrapper)
+
+        # a particle with its own type (the others have the type of
+        # their container)
+        particles = next(wrapper.iter_datasets())
+        p = particles.get(next(particles.iter_particle_views()).uid)
+        p.data[CUBA.MATERIAL_TYPE] = 2
+        particles.update([p])
+
+        wrapper.run()
+
+        estimate = wrapper.run_statistics.time_step_estimate
+        self.assertIsNotNone(estimate)
+        self.assertGreater(estimate.time_step, 0.0)
+        self.assertGreater(estimate.rayleigh_time, estimate.time_step)
+
+    def test_internal(self):
+        self._check_auto_time_step(use_internal_interface=True)
+
+    def test_file_io(self):
+        self._check_auto_time_step(use_internal_interface=False)
+
+
+class TestMaterialTypeRange(unittest.TestCase):
+
+    def _check_type_out_of_range(self, use_internal_interface):
+        wrapper = LiggghtsWrapper(
+            use_internal_interface=use_internal_interface)
+        MDExampleConfigurator.configure_wrapper(wrapper)
+
+        particles = next(wrapper.iter_datasets())
+        p = particles.get(next(particles.iter_particle_views()).uid)
+        p.data[CUBA.MATERIAL_TYPE] = wrapper.number_types + 1
+
+        # rejected when the particle is set (internal) or written (file-io)
+        with self.assertRaises(ValueError):
+            particles.update([p])
+            wrapper.run()
+
+    def test_internal(self):
+        self._check_type_out_of_range(use_internal_interface=True)
+
+    def test_file_io(self):
+        self._check_type_out_of_range(use_internal_interface=False)
+
+
+class TestCoarseGraining(unittest.TestCase):
+
+    def setUp(self):
+        self.wrapper = LiggghtsWrapper(use_internal_interface=False)
+        MDExampleConfigurator.set_configuration(self.wrapper)
+        self.wrapper.SP_extension[CUBAExtension.COARSE_GRAINING_FACTOR] = 2.0
+        MDExampleConfigurator.add_particles(self.wrapper)
+
+    def test_renamed_dataset(self):
+        dataset = self.wrapper.get_dataset("foo1")
+        self.assertEqual(dataset.count_of(CUBA.PARTICLE), 2)
+
+        dataset.name = "bar"
+        self.assertEqual(
+            len(list(self.wrapper.iter_original_particles("bar"))), 10)
+
+    def test_removed_parcel(self):
+        dataset = self.wrapper.get_dataset("foo1")
+        parcel = next(dataset.iter_particle_views())
+        dataset.remove([parcel.uid])
+
+        # the particles of the removed parcel are skipped
+        self.assertLess(
+            len(list(self.wrapper.iter_original_particles("foo1"))), 10)
+
+
+class TestFork(unittest.TestCase):
+
+    def test_fork(self):
+        wrapper = LiggghtsWrapper(use_internal_interface=False)
+        wrapper.CM_extension["member"] = None
+
+        def run_member(wrapper, member):
+            wrapper.CM_extension["member"] = member
+            return member * member, wrapper.CM_extension["member"]
+
+        self.assertEqual(wrapper.fork(4, run_member, max_processes=2),
+                         [(0, 0), (1, 1), (4, 2), (9, 3)])
+        # the wrapper itself is not changed
+        self.assertIsNone(wrapper.CM_extension["member"])
+
+    def test_fork_failure(self):
+        wrapper = LiggghtsWrapper(use_internal_interface=False)
+
+        def run_member(wrapper, member):
+            if member == 1:
+                raise ValueError("member failed")
+            return member
+
+        with self.assertRaisesRegexp(RuntimeError, "member failed"):
+            wrapper.fork(2, run_member)
+
+    def test_fork_error(self):
+        wrapper = LiggghtsWrapper(use_internal_interface=False)
+        fork = os.fork
+        calls = []
+
+        def failing_fork():
+            calls.append(None)
+            if len(calls) == 3:
+                raise OSError(errno.EAGAIN, "no more processes")
+            return fork()
+
+        os.fork = failing_fork
+        try:
+            with self.assertRaisesRegexp(RuntimeError, "could not be forked"):
+                wrapper.fork(4, lambda wrapper, member: member)
+        finally:
+            os.fork = fork
+
+        # the children forked before were waited for
+        with self.assertRaises(OSError):
+            os.wait()
+
+
 if __name__ == '__main__':
     unittest.main()
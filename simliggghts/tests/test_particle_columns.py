@@ -0,0 +1,178 @@
+import unittest
+import uuid
+
+from simphony.core.cuba import CUBA
+from simphony.core.data_container import DataContainer
+from simphony.cuds.particles import Particle
+
+from simliggghts.common.particle_columns import ParticleColumns
+from simliggghts.common.particle_view import ParticleView
+
+_SUPPORTED = [CUBA.RADIUS, CUBA.DENSITY, CUBA.VELOCITY]
+
+
+def _create_particle(i, with_density=True):
+    data = DataContainer()
+    data[CUBA.RADIUS] = 0.1 * i
+    data[CUBA.VELOCITY] = (i, 0.0, 0.0)
+    data[CUBA.MASS] = 3.0   # not supported
+    if with_density:
+        data[CUBA.DENSITY] = 1.0 + i
+    return Particle(uid=uuid.uuid4(), coordinates=(i, i, i), data=data)
+
+
+class TestParticleColumns(unittest.TestCase):
+
+    def setUp(self):
+        self.columns = ParticleColumns(_SUPPORTED)
+        self.particles = [_create_particle(i, with_density=i != 1)
+                          for i in range(4)]
+        for p in self.particles:
+            self.columns.add(p)
+
+    def _check(self, expected):
+        actual = self.columns.get_particle(expected.uid)
+        self.assertEqual(actual.uid, expected.uid)
+        self.assertEqual(actual.coordinates, expected.coordinates)
+        expected_data = dict((key, value) for key, value
+                             in expected.data.iteritems()
+                             if key in _SUPPORTED)
+        self.assertEqual(dict(actual.data), expected_data)
+
+    def test_get(self):
+        self.assertEqual(len(self.columns), 4)
+        for p in self.particles:
+            self._check(p)
+        self.assertNotIn(CUBA.DENSITY,
+                         self.columns.get_particle(self.particles[1].uid).data)
+        with self.assertRaises(KeyError):
+            self.columns.get_particle(uuid.uuid4())
+
+    def test_add_existing(self):
+        with self.assertRaises(ValueError):
+            self.columns.add(self.particles[0])
+
+    def test_update(self):
+        p = self.particles[2]
+        p.coordinates = (-1.0, -2.0, -3.0)
+        del p.data[CUBA.DENSITY]
+        p.data[CUBA.RADIUS] = 42.0
+        self.columns.update(p)
+        self._check(p)
+        with self.assertRaises(ValueError):
+            self.columns.update(_create_particle(5))
+
+    def test_remove(self):
+        self.columns.remove(self.particles[1].uid)
+        self.assertEqual(len(self.columns), 3)
+        self.assertFalse(self.columns.has(self.particles[1].uid))
+        for p in [self.particles[0], self.particles[2], self.particles[3]]:
+            self._check(p)
+        self.columns.remove(self.particles[3].uid)
+        self._check(self.particles[2])
+        with self.assertRaises(KeyError):
+            self.columns.remove(self.particles[3].uid)
+
+    def test_iter(self):
+        uids = set(p.uid for p in self.columns.iter_particles())
+        self.assertEqual(uids, set(p.uid for p in self.particles))
+        selected = [self.particles[3].uid, self.particles[0].uid]
+        self.assertEqual(
+            [p.uid for p in self.columns.iter_particles(selected)], selected)
+
+    def test_view(self):
+        uid = self.particles[1].uid
+        view = ParticleView(self.columns, self.columns.index_of(uid), uid)
+        self.assertEqual(set(view.data), set([CUBA.RADIUS, CUBA.VELOCITY]))
+        view.data[CUBA.DENSITY] = 5.0
+        view.write_back()
+        self.assertEqual(
+            self.columns.get_particle(uid).data[CUBA.DENSITY], 5.0)
+
+    def test_view_with_replaced_data(self):
+        p = self.particles[2]
+        view = ParticleView(self.columns, self.columns.index_of(p.uid), p.uid)
+        data = DataContainer(view.data)
+        del data[CUBA.DENSITY]
+        view.data = data
+        view.write_back()
+
+        # as when updating with the particle
+        del p.data[CUBA.DENSITY]
+        self._check(p)
+
+    def test_outdated_view(self):
+        uid = self.particles[3].uid
+        view = ParticleView(self.columns, self.columns.index_of(uid), uid)
+        view.data[CUBA.RADIUS] = 7.0
+        self.assertTrue(view.is_view_of(self.columns))
+
+        # the last particle is moved into the place of the removed one
+        self.columns.remove(self.particles[1].uid)
+        self.assertFalse(view.is_view_of(self.columns))
+        view.relocate()
+        self.columns.update(view)
+
+        self.particles[3].data[CUBA.RADIUS] = 7.0
+        self._check(self.particles[3])
+        self._check(self.particles[2])
+
+    def test_view_after_sorting(self):
+        views = [ParticleView(self.columns, self.columns.index_of(p.uid),
+                              p.uid) for p in self.particles]
+        self.columns.reorder([3, 2, 1, 0])
+        for view, p in zip(views, self.particles):
+            self.assertEqual(view.is_view_of(self.columns),
+                             self.columns.index_of(p.uid) == view._index)
+
+        view = views[0]
+        view.coordinates = (5.0, 5.0, 5.0)
+        self.assertFalse(view.is_view_of(self.columns))
+        view.relocate()
+        self.assertTrue(view.is_view_of(self.columns))
+        self.columns.update(view)
+
+        self.particles[0].coordinates = (5.0, 5.0, 5.0)
+        for p in self.particles:
+            self._check(p)
+
+    def test_view_of_removed_particle(self):
+        uid = self.particles[2].uid
+        view = ParticleView(self.columns, self.columns.index_of(uid), uid)
+        self.columns.remove(uid)
+        with self.assertRaises(KeyError):
+            view.is_view_of(self.columns)
+        with self.assertRaises(KeyError):
+            view.relocate()
+
+    def test_get_array_with_default(self):
+        # particle 1 has no density
+        with self.assertRaises(KeyError):
+            self.columns.get_array(CUBA.DENSITY)
+        self.assertEqual(
+            self.columns.get_array(CUBA.DENSITY, default=-1.0).tolist(),
+            [1.0, -1.0, 3.0, 4.0])
+        with self.assertRaises(KeyError):
+            self.columns.get_array(CUBA.MASS, default=1.0)
+
+    def test_set_array(self):
+        self.columns.set_array(CUBA.VELOCITY, [3, 1],
+                               [(1.0, 2.0, 3.0), (4.0, 5.0, 6.0)])
+        self.assertEqual(
+            self.columns.get_particle(self.particles[3].uid).data[
+                CUBA.VELOCITY], (1.0, 2.0, 3.0))
+        self.assertEqual(
+            self.columns.get_value_at(CUBA.VELOCITY, 1), (4.0, 5.0, 6.0))
+
+        # a missing value is set as well
+        self.columns.set_array(CUBA.DENSITY, [1], [7.0])
+        self.assertEqual(self.columns.get_value_at(CUBA.DENSITY, 1), 7.0)
+
+        with self.assertRaises(ValueError):
+            self.columns.set_array(CUBA.DENSITY, [0, 1], [7.0])
+        with self.assertRaises(KeyError):
+            self.columns.set_array(CUBA.MASS, [0], [7.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+import uuid
+
+from simphony.core.cuba import CUBA
+from simphony.core.data_container import DataContainer
+from simphony.cuds.particles import Particle
+
+from simliggghts.common.particle_view import ParticleView
+from simliggghts.internal.particle_data_cache import ParticleDataCache
+
+
+def _create_data(i):
+    data = DataContainer()
+    data[CUBA.VELOCITY] = (0.1 * i, 0.2 * i, 0.3 * i)
+    data[CUBA.ANGULAR_VELOCITY] = (0.0, 0.0, 0.1 * i)
+    data[CUBA.DENSITY] = 1.0 + i
+    data[CUBA.RADIUS] = 0.5
+    data[CUBA.EXTERNAL_APPLIED_FORCE] = (0.0, 0.0, -1.0)
+    return data
+
+
+class TestParticleView(unittest.TestCase):
+
+    def setUp(self):
+        # the cache does not need liggghts unless sending/retrieving
+        self.cache = ParticleDataCache(liggghts=None)
+        self.uids = [uuid.uuid4() for _ in range(3)]
+        for i, uid in enumerate(self.uids):
+            self.cache.set_particle((i, i, i), _create_data(i), uid,
+                                    default_type=1)
+
+    def _view(self, i):
+        uid = self.uids[i]
+        return ParticleView(self.cache, self.cache.index_of(uid), uid)
+
+    def test_lookup(self):
+        view = self._view(2)
+        self.assertIsInstance(view, Particle)
+        self.assertEqual(view.coordinates, (2, 2, 2))
+        self.assertEqual(view.data[CUBA.VELOCITY], (0.2, 0.4, 0.6))
+        self.assertEqual(view.data[CUBA.DENSITY], 3.0)
+        self.assertNotIn(CUBA.MATERIAL_TYPE, view.data)
+        self.assertFalse(hasattr(view, "__dict__") and view.__dict__)
+
+    def test_to_particle(self):
+        particle = self._view(1).to_particle()
+        self.assertNotIsInstance(particle, ParticleView)
+        self.assertEqual(particle.uid, self.uids[1])
+        self.assertEqual(particle.coordinates, (1, 1, 1))
+        self.assertEqual(dict(particle.data), dict(_create_data(1)))
+
+    def test_changes_are_only_written_back_explicitly(self):
+        view = self._view(1)
+        view.coordinates = (5, 6, 7)
+        view.data[CUBA.RADIUS] = 0.25
+
+        # view shows the changes but the store is not changed yet
+        self.assertEqual(view.coordinates, (5, 6, 7))
+        self.assertEqual(view.data[CUBA.RADIUS], 0.25)
+        self.assertEqual(self.cache.get_coordinates(self.uids[1]), (1, 1, 1))
+        self.assertEqual(
+            self.cache.get_particle_data(self.uids[1])[CUBA.RADIUS], 0.5)
+
+        view.write_back()
+        self.assertEqual(self.cache.get_coordinates(self.uids[1]), (5, 6, 7))
+        data = self.cache.get_particle_data(self.uids[1])
+        self.assertEqual(data[CUBA.RADIUS], 0.25)
+        self.assertEqual(data[CUBA.DENSITY], 2.0)
+
+        # other particles are untouched
+        self.assertEqual(self.cache.get_coordinates(self.uids[0]), (0, 0, 0))
+
+    def test_replace_data(self):
+        view = self._view(0)
+        data = DataContainer(view.data)
+        data[CUBA.DENSITY] = 42.0
+        view.data = data
+        view.write_back()
+        self.assertEqual(
+            self.cache.get_particle_data(self.uids[0])[CUBA.DENSITY], 42.0)
+
+    def test_replaced_data_without_key(self):
+        view = self._view(1)
+        view.data[CUBA.MATERIAL_TYPE] = 2
+        view.write_back()
+
+        view = self._view(1)
+        data = DataContainer(view.data)
+        del data[CUBA.MATERIAL_TYPE]
+        del data[CUBA.EXTERNAL_APPLIED_FORCE]
+        view.data = data
+        view.write_back()
+
+        data = self.cache.get_particle_data(self.uids[1])
+        self.assertNotIn(CUBA.MATERIAL_TYPE, data)
+        self.assertEqual(data[CUBA.EXTERNAL_APPLIED_FORCE], (0.0, 0.0, 0.0))
+        self.cache.set_default_types([1], 1)
+        self.assertEqual(self.cache.get_type_at(1), 1)
+
+        # a required value can not be removed
+        view = self._view(1)
+        data = DataContainer(view.data)
+        del data[CUBA.RADIUS]
+        data[CUBA.DENSITY] = 42.0
+        view.data = data
+        with self.assertRaises(KeyError):
+            view.write_back()
+        self.assertEqual(
+            self.cache.get_particle_data(self.uids[1])[CUBA.DENSITY], 2.0)
+
+    def test_material_type(self):
+        # only particles given their own type have it in their data
+        view = self._view(1)
+        view.data[CUBA.MATERIAL_TYPE] = 2
+        view.write_back()
+
+        self.assertEqual(self._view(1).data[CUBA.MATERIAL_TYPE], 2)
+        self.assertNotIn(CUBA.MATERIAL_TYPE, self._view(0).data)
+        self.assertEqual(self.cache.get_type_at(0), 1)
+        self.assertEqual(self.cache.get_type_at(1), 2)
+
+        # a new default type only changes particles without their own type
+        self.cache.set_default_types([0, 1, 2], 3)
+        self.assertEqual(
+            [self.cache.get_type_at(index) for index in range(3)], [3, 2, 3])
+        self.assertEqual(
+            self.cache.get_particle_data(self.uids[1])[CUBA.MATERIAL_TYPE], 2)
+
+    def test_is_view_of(self):
+        view = self._view(0)
+        self.assertTrue(view.is_view_of(self.cache))
+        self.assertFalse(view.is_view_of(ParticleDataCache(liggghts=None)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -121,5 +121,43 @@ class TestInternalParticlesManipulatingParticles(
         CheckManipulatingParticles.setUp(self)
 
 
+class _CheckParticleViews(object):
+
+    def setUp(self):
+        MDExampleConfigurator.configure_wrapper(self.wrapper)
+        self.pc = next(self.wrapper.iter_datasets())
+
+    def test_update_view_of_removed_particle(self):
+        views = list(self.pc.iter_particle_views())
+        self.pc.remove([views[0].uid])
+        with self.assertRaises(ValueError):
+            self.pc.update([views[0]])
+
+    def test_update_outdated_view(self):
+        views = list(self.pc.iter_particle_views())
+        other = self.pc.get(views[1].uid)
+        # the last particle might be moved into the place of the removed one
+        self.pc.remove([views[0].uid])
+        view = views[-1]
+        view.data[CUBA.RADIUS] = 0.125
+        self.pc.update([view])
+        self.assertEqual(self.pc.get(view.uid).data[CUBA.RADIUS], 0.125)
+        self.assertEqual(self.pc.get(other.uid), other)
+
+
+class TestFileIoParticleViews(_CheckParticleViews, unittest.TestCase):
+
+    def setUp(self):
+        self.wrapper = LiggghtsWrapper(use_internal_interface=False)
+        _CheckParticleViews.setUp(self)
+
+
+class TestInternalParticleViews(_CheckParticleViews, unittest.TestCase):
+
+    def setUp(self):
+        self.wrapper = LiggghtsWrapper(use_internal_interface=True)
+        _CheckParticleViews.setUp(self)
+
+
 if __name__ == '__main__':
     unittest.main()
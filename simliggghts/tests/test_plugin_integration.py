@@ -1,3 +1,5 @@
+import subprocess
+import sys
 import unittest
 
 
@@ -9,6 +11,29 @@ class TestPluginIntegration(unittest.TestCase):
 
         self.assertTrue(hasattr(liggghts, 'LiggghtsWrapper'))
 
+    def test_import_is_lazy(self):
+        # check in new process as the modules might have been imported
+        # already by other tests
+        code = ("import sys\n"
+                "import simliggghts\n"
+                "print(' '.join(sorted(sys.modules)))\n")
+        modules = subprocess.check_output(
+            [sys.executable, "-c", code]).split()
+
+        self.assertNotIn('yaml', modules)
+        self.assertNotIn('simliggghts.liggghts_wrapper', modules)
+        self.assertNotIn('simliggghts.io.file_utility', modules)
+
+    def test_lazy_attributes(self):
+        import simliggghts
+        from simliggghts.liggghts_wrapper import LiggghtsWrapper
+        from simliggghts.io.file_utility import read_data_file
+
+        self.assertIs(simliggghts.LiggghtsWrapper, LiggghtsWrapper)
+        self.assertIs(simliggghts.read_data_file, read_data_file)
+        with self.assertRaises(AttributeError):
+            simliggghts.NotAnAttribute
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from simliggghts.common.instrumentation import Instrumentation
+from simliggghts.common.profiling import (CProfileHook, ProfilingHook,
+                                          TracemallocHook, _get_source_file)
+
+
+class _RecordingHook(ProfilingHook):
+
+    def __init__(self, directory, phases=None, every=1):
+        super(_RecordingHook, self).__init__(directory, phases, every)
+        self.reports = []
+
+    def _start(self):
+        return None
+
+    def _stop(self, state, filename_base):
+        self.reports.append(os.path.basename(filename_base))
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.instrumentation = Instrumentation()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _enter_phases(self):
+        self.instrumentation.begin_run()
+        for _ in range(4):
+            with self.instrumentation.phase("run"):
+                with self.instrumentation.phase("flush"):
+                    [str(i) for i in range(100)]
+                with self.instrumentation.phase("read"):
+                    pass
+
+    def test_hook_without_stop(self):
+        class _StartOnlyHook(ProfilingHook):
+            def _start(self):
+                return None
+
+        with self.assertRaises(TypeError):
+            _StartOnlyHook(self.temp_dir)
+
+    def test_selected_phases(self):
+        hook = _RecordingHook(self.temp_dir, phases=["flush", "read"],
+                              every=2)
+        self.instrumentation.hooks.append(hook)
+        self._enter_phases()
+        self.assertEqual(hook.reports, ["flush_0001", "read_0001",
+                                        "flush_0003", "read_0003"])
+
+    def test_nested_phases_are_part_of_enclosing_phase(self):
+        hook = _RecordingHook(self.temp_dir)
+        self.instrumentation.hooks.append(hook)
+        self._enter_phases()
+        self.assertEqual(hook.reports, ["run_0001", "run_0002",
+                                        "run_0003", "run_0004"])
+
+    def test_disabled_without_hooks(self):
+        # without statistics and hooks, entering a phase is a no-op
+        phase = self.instrumentation.phase("flush")
+        self.assertIs(phase, self.instrumentation.phase("read"))
+
+    def test_cprofile(self):
+        hook = CProfileHook(self.temp_dir, phases=["flush"])
+        self.instrumentation.hooks.append(hook)
+        self._enter_phases()
+        for extension in [".prof", ".txt"]:
+            self.assertTrue(os.path.isfile(
+                os.path.join(self.temp_dir, "flush_0004" + extension)))
+
+    def test_tracemalloc(self):
+        try:
+            hook = TracemallocHook(self.temp_dir, phases=["flush"], every=4)
+        except ImportError:
+            self.skipTest("tracemalloc is not available")
+        self.instrumentation.hooks.append(hook)
+        self._enter_phases()
+        self.assertEqual(os.listdir(self.temp_dir), ["flush_0001.txt"])
+
+    def test_source_file(self):
+        self.assertEqual(_get_source_file("/a/profiling.pyc"),
+                         "/a/profiling.py")
+        self.assertEqual(_get_source_file("/a/profiling.py"),
+                         "/a/profiling.py")
+
+
+if __name__ == '__main__':
+    unittest.main()
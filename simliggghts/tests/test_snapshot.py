@@ -0,0 +1,61 @@
+import unittest
+
+from simphony.core.cuba import CUBA
+from simphony.core.data_container import DataContainer
+
+from simliggghts.common.snapshot import ReadOnlyDataContainer, SnapshotCache
+
+
+class TestReadOnlyDataContainer(unittest.TestCase):
+
+    def setUp(self):
+        self.data = DataContainer()
+        self.data[CUBA.MATERIAL_TYPE] = 1
+        self.data[CUBA.MASS] = 2.0
+        self.snapshot = ReadOnlyDataContainer(self.data)
+
+    def test_read(self):
+        self.assertEqual(self.snapshot[CUBA.MASS], 2.0)
+        self.assertIn(CUBA.MATERIAL_TYPE, self.snapshot)
+        self.assertEqual(len(self.snapshot), 2)
+        self.assertEqual(dict(self.snapshot), dict(self.data))
+        self.assertEqual(self.snapshot.get(CUBA.RADIUS, 3.0), 3.0)
+
+    def test_read_only(self):
+        with self.assertRaises(TypeError):
+            self.snapshot[CUBA.MASS] = 3.0
+        with self.assertRaises(TypeError):
+            del self.snapshot[CUBA.MASS]
+
+    def test_copy(self):
+        data = self.snapshot.copy()
+        self.assertIsInstance(data, DataContainer)
+        data[CUBA.MASS] = 3.0
+        self.assertEqual(self.snapshot[CUBA.MASS], 2.0)
+
+
+class TestSnapshotCache(unittest.TestCase):
+
+    def test_get(self):
+        cache = SnapshotCache()
+        data = {CUBA.MASS: 1.0}
+        snapshot = cache.get("foo", data)
+
+        # repeated requests return the same snapshot
+        self.assertIs(cache.get("foo", data), snapshot)
+
+        # replacing the data creates a new version
+        new_data = {CUBA.MASS: 2.0}
+        new_snapshot = cache.get("foo", new_data)
+        self.assertIsNot(new_snapshot, snapshot)
+        self.assertGreater(new_snapshot.version, snapshot.version)
+        self.assertEqual(new_snapshot[CUBA.MASS], 2.0)
+        self.assertEqual(snapshot[CUBA.MASS], 1.0)
+
+        cache.discard("foo")
+        cache.discard("bar")
+        self.assertIsNot(cache.get("foo", new_data), new_snapshot)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import uuid
+
+import numpy
+from numpy.testing import assert_array_equal
+
+from simphony.core.cuba import CUBA
+from simphony.core.data_container import DataContainer
+from simphony.cuds.particles import Particle
+
+from simliggghts.common.particle_columns import ParticleColumns
+from simliggghts.common.spatial_sort import morton_codes, spatial_order
+
+
+class TestSpatialSort(unittest.TestCase):
+
+    def test_morton_codes(self):
+        # corners of the unit cube (with one bit per coordinate)
+        coordinates = [(0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (0.0, 1.0, 0.0),
+                       (0.0, 0.0, 1.0), (1.0, 1.0, 1.0)]
+        assert_array_equal(morton_codes(coordinates, bits=1),
+                           [0, 1, 2, 4, 7])
+        self.assertEqual(len(morton_codes(numpy.zeros((0, 3)))), 0)
+        with self.assertRaises(ValueError):
+            morton_codes(coordinates, bits=22)
+
+    def test_spatial_order(self):
+        # two clusters of points which are given interleaved
+        coordinates = [(0.0, 0.0, 0.0), (9.0, 9.0, 9.0),
+                       (0.1, 0.1, 0.1), (9.1, 9.1, 9.1)]
+        order = spatial_order(coordinates).tolist()
+        self.assertEqual(order, [0, 2, 1, 3])
+
+
+class TestParticleColumnsSort(unittest.TestCase):
+
+    def test_sort_spatially(self):
+        columns = ParticleColumns([CUBA.RADIUS])
+        particles = []
+        for x in [5.0, 0.0, 4.0, 1.0]:
+            data = DataContainer()
+            data[CUBA.RADIUS] = x
+            particles.append(Particle(uid=uuid.uuid4(),
+                                      coordinates=(x, 0.0, 0.0), data=data))
+            columns.add(particles[-1])
+
+        version = columns.get_version(CUBA.RADIUS)
+        columns.sort_spatially()
+
+        self.assertEqual([p.data[CUBA.RADIUS]
+                          for p in columns.iter_particles()],
+                         [0.0, 1.0, 4.0, 5.0])
+        assert_array_equal(columns.get_array(CUBA.RADIUS),
+                           [0.0, 1.0, 4.0, 5.0])
+        self.assertNotEqual(columns.get_version(CUBA.RADIUS), version)
+        for p in particles:
+            self.assertEqual(columns.get_particle(p.uid).coordinates,
+                             p.coordinates)
+
+        with self.assertRaises(ValueError):
+            columns.reorder([0, 0, 1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()